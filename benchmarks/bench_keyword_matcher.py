@@ -0,0 +1,149 @@
+# =============================================================================
+# benchmarks/bench_keyword_matcher.py - 关键词匹配基准测试
+# =============================================================================
+
+"""
+对比规则提取中关键词匹配方式在大文本上的耗时：原有的逐句子串查找，
+与 TextAnalyzer 的规则提取（KeywordMatcher 查找全文，命中按偏移归入句子）
+分别使用逐关键词 str.find 和 Aho-Corasick 自动机。第一行为随附的默认关键词。
+
+运行方法：
+    python benchmarks/bench_keyword_matcher.py --size-mb 2 --keywords 13 200 1000 5000
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.config import Config
+from modules.keyword_matcher import KeywordMatcher
+from modules.sentence_index import SentenceIndex
+from modules.text_analyzer import TextAnalyzer
+
+
+# 常用汉字范围，用于生成合成文本与关键词
+CJK_START = 0x4e00
+CJK_COUNT = 3000
+DELIMITERS = "。！？；"
+
+
+def make_keywords(count: int, rng: random.Random) -> list:
+    """生成 count 个 2~4 字的随机关键词"""
+
+    keywords = set()
+    while len(keywords) < count:
+        length = rng.randint(2, 4)
+        keywords.add("".join(chr(CJK_START + rng.randrange(CJK_COUNT)) for _ in range(length)))
+    return sorted(keywords)
+
+
+def make_text(size_mb: float, keywords: list, density: float, rng: random.Random) -> str:
+    """生成约 size_mb MB（UTF-8）的文本，约 density 比例的句子包含关键词"""
+
+    target_chars = int(size_mb * 1024 * 1024 / 3)
+    sentences = []
+    total = 0
+    while total < target_chars:
+        sentence = "".join(chr(CJK_START + rng.randrange(CJK_COUNT)) for _ in range(rng.randint(15, 40)))
+        if rng.random() < density:
+            cut = rng.randrange(len(sentence))
+            sentence = sentence[:cut] + rng.choice(keywords) + sentence[cut:]
+        sentence += rng.choice(DELIMITERS)
+        sentences.append(sentence)
+        total += len(sentence)
+    return "".join(sentences)
+
+
+def naive_match(text: str, keywords: list) -> int:
+    """原有的规则提取：逐句切分后对每个关键词做子串查找，命中的句子产生一个场景"""
+
+    scenes = []
+    for i, sentence in enumerate(re.split(r'[。！？；]', text)):
+        sentence = sentence.strip()
+        if sentence and any(keyword in sentence for keyword in keywords):
+            scenes.append({
+                "id": f"scene_{len(scenes) + 1:03d}",
+                "prompt": sentence,
+                "position": i + 1,
+                "duration": 5,
+                "style": "realistic",
+                "type": "narrative"
+            })
+    return len(scenes)
+
+
+def matcher_match(text: str, index: SentenceIndex, matcher: KeywordMatcher) -> int:
+    """规则提取：KeywordMatcher 查找全文，每个命中的句子产生一个场景"""
+
+    analyzer = TextAnalyzer(use_cache=False, keyword_matcher=matcher)
+    return len(analyzer._extract_scenes_by_rules(text, index))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_case(label: str, text: str, keywords: list, run_naive: bool):
+    """
+    对同一组关键词分别计时子串查找与自动机两种方式，* 标出默认配置选用的方式
+
+    句子索引与流水线中一样只建一次、由提取与插入共用，不计入提取耗时。
+    """
+
+    index = SentenceIndex(text)
+    substrings, substring_time = timed(matcher_match, text, index,
+                                       KeywordMatcher(keywords, automaton_min=len(keywords) + 1))
+    automaton_matcher, build_time = timed(KeywordMatcher, keywords, 0)
+    hits, automaton_time = timed(matcher_match, text, index, automaton_matcher)
+    assert substrings == hits, f"命中数不一致: {substrings} != {hits}"
+
+    use_automaton = KeywordMatcher(keywords).use_automaton
+    marks = ("", "*") if use_automaton else ("*", "")
+
+    naive_time = "-"
+    if run_naive:
+        naive_hits, elapsed = timed(naive_match, text, keywords)
+        naive_time = f"{elapsed:.3f}"
+        assert naive_hits == hits, f"命中数不一致: {naive_hits} != {hits}"
+
+    print(f"{label:>8} {substring_time:>9.3f}{marks[0]:1} {automaton_time:>9.3f}{marks[1]:1} "
+          f"{build_time:>8.3f} {naive_time:>10} {hits:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='关键词匹配基准测试')
+    parser.add_argument('--size-mb', type=float, default=2, help='合成文本大小（MB）')
+    parser.add_argument('--keywords', type=int, nargs='+', default=[13, 100, 200, 500, 1000, 5000],
+                        help='关键词数量')
+    parser.add_argument('--density', type=float, default=0.2, help='包含关键词的句子比例')
+    parser.add_argument('--skip-naive-above', type=int, default=2000,
+                        help='关键词数超过该值时跳过原有方式（耗时过长）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'关键词数':>8} {'子串查找(s)':>10} {'自动机(s)':>10} {'构建(s)':>8} {'原方式(s)':>10} {'命中句数':>8}")
+
+    # 默认配置：随附的规则关键词
+    text = make_text(args.size_mb, Config.RULE_KEYWORDS, args.density, rng)
+    run_case("默认", text, Config.RULE_KEYWORDS, True)
+
+    all_keywords = make_keywords(max(args.keywords), rng)
+    text = make_text(args.size_mb, all_keywords[:min(args.keywords)], args.density, rng)
+    for count in args.keywords:
+        run_case(str(count), text, all_keywords[:count], count <= args.skip_naive_above)
+
+    print(f"文本大小约 {args.size_mb} MB，句子索引单独建立一次；* 为默认配置（RULE_KEYWORDS_AUTOMATON_MIN = "
+          f"{Config.RULE_KEYWORDS_AUTOMATON_MIN}）选用的方式")
+
+
+if __name__ == "__main__":
+    main()
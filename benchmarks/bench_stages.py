@@ -0,0 +1,233 @@
+# =============================================================================
+# benchmarks/bench_stages.py - 分阶段基准测试
+# =============================================================================
+
+"""
+用规模递增（1 KB ~ 50 MB）、关键词密度不同的合成中文语料，
+分别测量处理流程各阶段的耗时与峰值内存：
+
+    rules      TextAnalyzer._extract_scenes_by_rules
+    generate   VideoGenerator.generate_videos（模拟后端，生成耗时为 0）
+    html       VideoInserter.insert_videos（HTML）
+    markdown   VideoInserter.insert_videos（Markdown）
+
+结果保存为JSON，可与之前的结果对比，发现性能回退。
+
+运行方法：
+    python benchmarks/bench_stages.py
+    python benchmarks/bench_stages.py --sizes 1KB 1MB 10MB --densities 0.2 --output base.json
+    python benchmarks/bench_stages.py --compare base.json --threshold 1.2
+"""
+
+import argparse
+import json
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# 添加项目根目录到路径
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+from bench_keyword_matcher import make_text
+from config.config import Config
+
+# 计时期间不输出逐场景日志，模拟视频不等待
+Config.LOG_LEVEL = "ERROR"
+Config.MOCK_VIDEO_DELAY = 0
+
+from modules.text_analyzer import TextAnalyzer
+from modules.video_generator import VideoGenerator
+from modules.video_inserter import VideoInserter
+
+
+STAGES = ["rules", "generate", "html", "markdown"]
+DEFAULT_SIZES = ["1KB", "100KB", "1MB", "10MB", "50MB"]
+DEFAULT_DENSITIES = [0.05, 0.2, 0.5]
+UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(value: str) -> int:
+    """解析 1KB / 10MB 形式的大小"""
+
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([KMG]?B)?', value.strip().upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"无法解析的大小: {value}")
+    return int(float(match.group(1)) * UNITS[match.group(2) or "B"])
+
+
+def measure(func: Callable, track_memory: bool) -> Tuple[object, float, float]:
+    """
+    运行一次 func
+
+    Returns:
+        (返回值, 耗时秒数, 峰值内存MB)。track_memory 为 False 时峰值内存为 None
+    """
+
+    if track_memory:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024 if track_memory else None
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_case(size: int, density: float, stages: List[str], args) -> List[Dict]:
+    """对一份语料依次运行各阶段"""
+
+    rng = random.Random(args.seed)
+    text = make_text(size / 1024 / 1024, Config.RULE_KEYWORDS, density, rng)
+    results = []
+
+    analyzer = TextAnalyzer(use_cache=False)
+    inserter = VideoInserter()
+    generator = VideoGenerator(use_cache=False, use_dedup=False)
+
+    def record(stage, func):
+        # 计时与内存分开测量：tracemalloc 本身会显著拖慢执行
+        result, elapsed, _ = measure(func, False)
+        peak = None
+        if args.memory:
+            result, _, peak = measure(func, True)
+        count = len(result) if stage == "rules" else len(scenes)
+        results.append({
+            "stage": stage,
+            "size": size,
+            "density": density,
+            "chars": len(text),
+            "scenes": count,
+            "seconds": round(elapsed, 6),
+            "peak_mb": None if peak is None else round(peak, 3)
+        })
+        print(f"{stage:<9} {format_size(size):>7} {density:>6.2f} {count:>9} "
+              f"{elapsed:>10.4f} {'-' if peak is None else f'{peak:.1f}':>9}", flush=True)
+        return result
+
+    try:
+        if "rules" in stages:
+            scenes = record("rules", lambda: analyzer._extract_scenes_by_rules(text))
+        else:
+            scenes = analyzer._extract_scenes_by_rules(text)
+
+        with tempfile.TemporaryDirectory(prefix="bench_stages_") as output_dir:
+            video_results = {
+                scene["id"]: {"status": "success", "video_path": f"{output_dir}/{scene['id']}_mock.mp4",
+                              "generator": "mock"}
+                for scene in scenes
+            }
+            if "generate" in stages:
+                video_results = record("generate", lambda: generator.generate_videos(scenes, output_dir))
+
+            for fmt in ("html", "markdown"):
+                if fmt in stages:
+                    record(fmt, lambda: inserter.insert_videos(text, scenes, video_results, fmt))
+    finally:
+        generator.close()
+
+    return results
+
+
+def format_size(size: int) -> str:
+    for unit in ("GB", "MB", "KB"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(results: List[Dict], baseline_file: str, threshold: float) -> int:
+    """与基准结果对比，返回耗时或内存超过阈值倍数的用例数"""
+
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r["stage"], r["size"], r["density"]): r for r in baseline["results"]}
+
+    print(f"\n与 {baseline_file}（{baseline['meta'].get('revision', '')}）对比，阈值 {threshold:.2f}x")
+    print(f"{'阶段':<9} {'大小':>7} {'密度':>6} {'耗时比':>8} {'内存比':>8}")
+
+    regressions = 0
+    for result in results:
+        old = previous.get((result["stage"], result["size"], result["density"]))
+        if old is None:
+            continue
+        time_ratio = result["seconds"] / old["seconds"] if old["seconds"] else 1.0
+        memory_ratio = None
+        if result["peak_mb"] is not None and old.get("peak_mb"):
+            memory_ratio = result["peak_mb"] / old["peak_mb"]
+
+        regressed = time_ratio > threshold or (memory_ratio is not None and memory_ratio > threshold)
+        regressions += regressed
+        print(f"{result['stage']:<9} {format_size(result['size']):>7} {result['density']:>6.2f} "
+              f"{time_ratio:>7.2f}x {'-' if memory_ratio is None else f'{memory_ratio:.2f}x':>8}"
+              f"{'  <- 回退' if regressed else ''}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分阶段基准测试')
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[parse_size(s) for s in DEFAULT_SIZES],
+                        help='语料大小，如 1KB 100KB 1MB 50MB')
+    parser.add_argument('--densities', type=float, nargs='+', default=DEFAULT_DENSITIES,
+                        help='包含关键词的句子比例')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help='要测量的阶段')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='不测量峰值内存')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--output', default=None,
+                        help='结果JSON文件，默认 benchmarks/results/stages-<时间>.json')
+    parser.add_argument('--compare', default=None, help='与该基准结果JSON对比')
+    parser.add_argument('--threshold', type=float, default=1.2, help='判定为回退的耗时/内存倍数')
+    args = parser.parse_args()
+
+    print(f"{'阶段':<9} {'大小':>7} {'密度':>6} {'场景数':>9} {'耗时(s)':>10} {'峰值(MB)':>9}")
+    results = []
+    for size in args.sizes:
+        for density in args.densities:
+            results.extend(run_case(size, density, args.stages, args))
+
+    output_file = args.output or str(
+        ROOT / "benchmarks" / "results" / f"stages-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            "meta": {
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "seed": args.seed
+            },
+            "results": results
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {output_file}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{regressions} 项超过阈值")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+# =============================================================================
+# benchmarks/fake_server.py - DeepSeek / Kling 本地模拟服务
+# =============================================================================
+
+"""
+在本地模拟 DeepSeek chat-completions 与 Kling 生成/状态/下载接口，
+用于离线测试和压测完整的 HTTP 提交、轮询、下载路径。
+
+各接口的响应延迟服从对数正态分布（中位数 + sigma），可配置错误率（返回500）
+和限流（超过每秒请求数时返回429并带 Retry-After）。GET /_stats 返回请求统计。
+
+运行方法：
+    python benchmarks/fake_server.py --port 8900 --kling-job-time 5 --error-rate 0.02
+
+然后把 Config 中的接口地址指向：
+    DEEPSEEK_API_URL = http://127.0.0.1:8900/v1/chat/completions
+    KLING_API_URL    = http://127.0.0.1:8900/v1/videos/generate
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+# 默认模拟参数：latency 为 (中位数秒数, 对数正态 sigma)，rate_limit 为每秒请求数（None 不限）
+DEFAULT_PROFILE = {
+    "deepseek": {"latency": (1.5, 0.4), "error_rate": 0.0, "rate_limit": None},
+    "kling": {"latency": (0.3, 0.3), "error_rate": 0.0, "rate_limit": None},
+    "kling_status": {"latency": (0.05, 0.3), "error_rate": 0.0, "rate_limit": None},
+    "download": {"latency": (0.1, 0.3), "error_rate": 0.0, "rate_limit": None},
+    # Kling 任务从提交到完成的时长，以及任务失败的比例
+    "kling_job": {"duration": (5.0, 0.4), "failure_rate": 0.0},
+    # 每个视频文件的字节数
+    "video_size": 2 * 1024 * 1024
+}
+
+# 句末标点，与 SentenceIndex 一致
+SENTENCE_PATTERN = re.compile(r'[^。！？；]*[。！？；]+|[^。！？；]+')
+
+
+class _RateLimiter:
+    """按秒计数的简单限流器"""
+
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate
+        self._window = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if not self.rate:
+            return True
+        with self._lock:
+            window = int(time.time())
+            if window != self._window:
+                self._window, self._count = window, 0
+            self._count += 1
+            return self._count <= self.rate
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """客户端提前断开连接（如只读取响应头的探测请求）时不打印异常"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            super().handle_error(request, client_address)
+
+
+class FakeApiServer:
+    """DeepSeek / Kling 模拟服务"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, profile: Optional[Dict] = None,
+                 seed: Optional[int] = None):
+        self.profile = copy.deepcopy(DEFAULT_PROFILE)
+        for key, value in (profile or {}).items():
+            if isinstance(value, dict):
+                self.profile[key].update(value)
+            else:
+                self.profile[key] = value
+
+        self.random = random.Random(seed)
+        self.limiters = {
+            endpoint: _RateLimiter(self.profile[endpoint].get("rate_limit"))
+            for endpoint in ("deepseek", "kling", "kling_status", "download")
+        }
+
+        size = self.profile["video_size"]
+        block = bytes(self.random.getrandbits(8) for _ in range(4096))
+        self.video = (block * (size // len(block) + 1))[:size]
+        self.video_etag = '"%s"' % hashlib.md5(self.video).hexdigest()
+
+        self.jobs = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+
+        self.httpd = _QuietHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake_api", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def snapshot(self) -> Dict:
+        """请求统计：每个接口按状态码计数"""
+
+        with self._lock:
+            return {
+                "stats": copy.deepcopy(self.stats),
+                "jobs": len(self.jobs)
+            }
+
+    def _record(self, endpoint: str, status: int):
+        with self._lock:
+            counts = self.stats.setdefault(endpoint, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def _sample(self, distribution) -> float:
+        median, sigma = distribution
+        with self._lock:
+            return median * math.exp(self.random.gauss(0, sigma)) if median > 0 else 0.0
+
+    def _chance(self, rate: float) -> bool:
+        with self._lock:
+            return self.random.random() < rate
+
+    def _admit(self, endpoint: str, delay: bool = True) -> Optional[int]:
+        """模拟延迟、限流和错误，返回应当直接返回的错误状态码"""
+
+        if not self.limiters[endpoint].allow():
+            return 429
+        if delay:
+            time.sleep(self._sample(self.profile[endpoint]["latency"]))
+        if self._chance(self.profile[endpoint]["error_rate"]):
+            return 500
+        return None
+
+    def _fake_scenes(self, text: str):
+        """按句子生成场景：每隔一句取一个场景，叙事与技术类型交替"""
+
+        sentences = [s.strip() for s in SENTENCE_PATTERN.findall(text) if s.strip(" \n\t。！？；")]
+        scenes = []
+        for position in range(1, len(sentences) + 1, 2):
+            scenes.append({
+                "id": f"scene_{len(scenes) + 1:03d}",
+                "prompt": sentences[position - 1].rstrip("。！？；"),
+                "position": position,
+                "duration": 5,
+                "style": "realistic",
+                "type": "technical" if len(scenes) % 4 == 3 else "narrative"
+            })
+        return scenes
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, endpoint: str, status: int, payload, headers=None):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+                server._record(endpoint, status)
+
+            def _send_error(self, endpoint: str, status: int):
+                headers = {"Retry-After": "1"} if status == 429 else None
+                self._send_json(endpoint, status, {"error": f"simulated {status}"}, headers)
+
+            def _read_json(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_POST(self):
+                if self.path.endswith("/chat/completions"):
+                    request = self._read_json()
+                    stream = bool(request.get("stream"))
+                    # 流式回复的延迟分摊到各个增量事件上
+                    error = server._admit("deepseek", delay=not stream)
+                    if error:
+                        return self._send_error("deepseek", error)
+                    text = request["messages"][-1]["content"].split("\n\n", 1)[-1]
+                    content = json.dumps(server._fake_scenes(text), ensure_ascii=False, indent=2)
+                    if stream:
+                        return self._send_stream(content)
+                    return self._send_json("deepseek", 200, {
+                        "choices": [{"message": {"role": "assistant", "content": content}}]
+                    })
+
+                if self.path.endswith("/videos/generate"):
+                    self._read_json()
+                    error = server._admit("kling")
+                    if error:
+                        return self._send_error("kling", error)
+                    job = server.profile["kling_job"]
+                    ready_at = time.time() + server._sample(job["duration"])
+                    failed = server._chance(job["failure_rate"])
+                    with server._lock:
+                        video_id = f"video_{len(server.jobs) + 1:06d}"
+                        server.jobs[video_id] = {"ready_at": ready_at, "failed": failed}
+                    return self._send_json("kling", 200, {"video_id": video_id})
+
+                self._send_json("unknown", 404, {"error": "not found"})
+
+            def _send_stream(self, content: str):
+                """以 server-sent events 分段发送回复内容，总耗时服从 deepseek 的延迟分布"""
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                deltas = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+                interval = server._sample(server.profile["deepseek"]["latency"]) / len(deltas)
+                for delta in deltas:
+                    time.sleep(interval)
+                    event = {"choices": [{"index": 0, "delta": {"content": delta}}]}
+                    self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                server._record("deepseek", 200)
+
+            def do_GET(self):
+                if self.path == "/_stats":
+                    body = json.dumps(server.snapshot()).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                match = re.fullmatch(r'.*/videos/generate/([\w-]+)/status', self.path)
+                if match:
+                    error = server._admit("kling_status")
+                    if error:
+                        return self._send_error("kling_status", error)
+                    job = server.jobs.get(match.group(1))
+                    if job is None:
+                        return self._send_json("kling_status", 404, {"error": "unknown video"})
+                    if time.time() < job["ready_at"]:
+                        return self._send_json("kling_status", 200, {"status": "processing"})
+                    if job["failed"]:
+                        return self._send_json("kling_status", 200, {"status": "failed", "error": "simulated"})
+                    return self._send_json("kling_status", 200, {
+                        "status": "completed",
+                        "video_url": f"{server.base_url}/v1/videos/files/{match.group(1)}.mp4"
+                    })
+
+                if "/videos/files/" in self.path:
+                    return self._send_video()
+
+                self._send_json("unknown", 404, {"error": "not found"})
+
+            def _send_video(self):
+                error = server._admit("download")
+                if error:
+                    return self._send_error("download", error)
+
+                data = server.video
+                range_match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get("Range", ""))
+                if range_match:
+                    start = int(range_match.group(1))
+                    end = int(range_match.group(2)) if range_match.group(2) else len(data) - 1
+                    end = min(end, len(data) - 1)
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+                    body, status = data[start:end + 1], 206
+                else:
+                    self.send_response(200)
+                    body, status = data, 200
+                self.send_header("Content-Type", "video/mp4")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("ETag", server.video_etag)
+                self.end_headers()
+                self.wfile.write(body)
+                server._record("download", status)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DeepSeek / Kling 本地模拟服务')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8900, help='监听端口，0 表示随机端口')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='所有接口延迟的缩放倍数')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='各接口返回500的比例')
+    parser.add_argument('--kling-job-time', type=float, default=5.0, help='Kling任务完成时长中位数（秒）')
+    parser.add_argument('--kling-failure-rate', type=float, default=0.0, help='Kling任务失败的比例')
+    parser.add_argument('--kling-rate-limit', type=float, default=None, help='Kling提交接口每秒请求上限，超出返回429')
+    parser.add_argument('--deepseek-rate-limit', type=float, default=None, help='DeepSeek接口每秒请求上限，超出返回429')
+    parser.add_argument('--video-size', type=int, default=DEFAULT_PROFILE["video_size"], help='视频文件字节数')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    args = parser.parse_args()
+
+    server = FakeApiServer(args.host, args.port, build_profile(args), seed=args.seed)
+    server.start()
+    # 第一行输出监听地址，供压测脚本读取
+    print(f"listening on {server.base_url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+def build_profile(args) -> Dict:
+    """根据命令行参数生成模拟参数"""
+
+    profile = copy.deepcopy(DEFAULT_PROFILE)
+    for endpoint in ("deepseek", "kling", "kling_status", "download"):
+        median, sigma = profile[endpoint]["latency"]
+        profile[endpoint]["latency"] = (median * args.latency_scale, sigma)
+        profile[endpoint]["error_rate"] = args.error_rate
+    profile["kling"]["rate_limit"] = args.kling_rate_limit
+    profile["deepseek"]["rate_limit"] = args.deepseek_rate_limit
+    profile["kling_job"]["duration"] = (args.kling_job_time, profile["kling_job"]["duration"][1])
+    profile["kling_job"]["failure_rate"] = args.kling_failure_rate
+    profile["video_size"] = args.video_size
+    return profile
+
+
+if __name__ == "__main__":
+    main()
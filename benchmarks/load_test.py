@@ -0,0 +1,229 @@
+# =============================================================================
+# benchmarks/load_test.py - 端到端压测
+# =============================================================================
+
+"""
+启动本地模拟服务（benchmarks/fake_server.py），生成 N 篇合成文档，
+以批量模式运行 main.py 同时处理 N 篇文档，统计吞吐量与延迟分位数。
+
+完整经过 DeepSeek 提取、Kling 提交/轮询/下载的 HTTP 路径，
+可在上线前衡量生成路径上任何性能改动的效果。
+
+运行方法：
+    python benchmarks/load_test.py --documents 8 --sentences 40 --kling-job-time 3
+    python benchmarks/load_test.py --documents 8 --pipeline --error-rate 0.05 --kling-rate-limit 5
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# 添加项目根目录到路径
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+import main as cli
+from config.config import Config
+
+
+# 合成文档使用的句式，部分句子包含规则提取的关键词
+SUBJECTS = ["工人们", "研究人员", "学生", "士兵", "工程师", "村民", "化学家", "船员"]
+ACTIONS = ["站在岸边观察潮水", "把木箱搬运到仓库", "演示新的实验装置", "走向远处的工地",
+           "记录温度的变化", "讨论下一步的计划", "操作巨大的起重机", "将溶液倒入烧杯"]
+DETAILS = ["天色渐渐暗了下来", "空气中弥漫着刺鼻的气味", "周围的人都安静下来",
+           "整个过程持续了很久", "结果出乎所有人的意料"]
+DELIMITERS = "。。。！；"
+
+
+def make_document(sentences: int, rng: random.Random) -> str:
+    """生成一篇合成文档"""
+
+    parts = []
+    for _ in range(sentences):
+        sentence = f"{rng.choice(SUBJECTS)}{rng.choice(ACTIONS)}，{rng.choice(DETAILS)}"
+        parts.append(sentence + rng.choice(DELIMITERS))
+    return "".join(parts)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩法计算分位数"""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def start_server(args) -> Tuple[subprocess.Popen, str]:
+    """以子进程启动模拟服务，返回进程与服务地址"""
+
+    command = [
+        sys.executable, str(ROOT / "benchmarks" / "fake_server.py"), "--port", "0",
+        "--latency-scale", str(args.latency_scale),
+        "--error-rate", str(args.error_rate),
+        "--kling-job-time", str(args.kling_job_time),
+        "--kling-failure-rate", str(args.kling_failure_rate),
+        "--video-size", str(args.video_size),
+        "--seed", str(args.seed)
+    ]
+    if args.kling_rate_limit:
+        command += ["--kling-rate-limit", str(args.kling_rate_limit)]
+    if args.deepseek_rate_limit:
+        command += ["--deepseek-rate-limit", str(args.deepseek_rate_limit)]
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    match = re.search(r'listening on (\S+)', line)
+    if not match:
+        process.kill()
+        raise RuntimeError(f"模拟服务启动失败: {line!r}")
+    return process, match.group(1)
+
+
+def run_documents(args, base_url: str, work_dir: str) -> Tuple[Dict, Dict]:
+    """把 Config 指向模拟服务，以批量模式运行 main.py，返回汇总报告与运行指标"""
+
+    rng = random.Random(args.seed)
+    input_dir = os.path.join(work_dir, "input")
+    output_dir = os.path.join(work_dir, "output")
+    os.makedirs(input_dir)
+    for i in range(args.documents):
+        with open(os.path.join(input_dir, f"doc_{i:04d}.txt"), 'w', encoding='utf-8') as f:
+            f.write(make_document(args.sentences, rng))
+
+    Config.DEEPSEEK_API_KEY = "load-test"
+    Config.DEEPSEEK_API_URL = f"{base_url}/v1/chat/completions"
+    Config.KLING_API_KEY = "load-test"
+    Config.KLING_API_URL = f"{base_url}/v1/videos/generate"
+
+    argv = ["main.py", "-i", input_dir, "-o", output_dir, "--batch",
+            "--documents", str(args.concurrency or args.documents)]
+    if not args.use_cache:
+        argv.append("--no-cache")
+    if args.pipeline:
+        argv.append("--pipeline")
+
+    saved_argv = sys.argv
+    sys.argv = argv
+    try:
+        cli.main()
+    finally:
+        sys.argv = saved_argv
+
+    with open(os.path.join(output_dir, "summary.json"), 'r', encoding='utf-8') as f:
+        summary = json.load(f)
+    with open(os.path.join(output_dir, "metrics.json"), 'r', encoding='utf-8') as f:
+        metrics = json.load(f)
+    return summary, metrics
+
+
+def build_report(args, summary: Dict, metrics: Dict, elapsed: float, server_stats: Dict) -> Dict:
+    """汇总吞吐量、文档延迟分位数、各阶段耗时分位数、视频结果与服务端请求统计"""
+
+    latencies = [document["elapsed"] for document in summary["documents"]]
+    videos = {"success": 0, "failed": 0, "cached": 0}
+    for document in summary["documents"]:
+        for key, value in document.get("videos", {}).items():
+            videos[key] += value
+
+    return {
+        "documents": summary["total"],
+        "concurrency": args.concurrency or args.documents,
+        "mode": summary["mode"],
+        "succeeded": summary["succeeded"],
+        "failed": summary["failed"],
+        "scenes": summary["scenes"],
+        "videos": videos,
+        "elapsed": round(elapsed, 3),
+        "throughput": {
+            "documents_per_second": round(summary["total"] / elapsed, 3),
+            "scenes_per_second": round(summary["scenes"] / elapsed, 3)
+        },
+        "document_latency": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies, default=0.0)
+        },
+        "spans": [
+            {key: histogram[key] for key in ("name", "labels", "count", "p50", "p90", "p99", "max")}
+            for histogram in metrics["histograms"]
+        ],
+        "counters": metrics["counters"],
+        "server": server_stats
+    }
+
+
+def print_report(report: Dict):
+    print(f"文档: {report['documents']} 篇（并发 {report['concurrency']}，模式 {report['mode']}），"
+          f"成功 {report['succeeded']}，失败 {report['failed']}")
+    print(f"场景: {report['scenes']}，视频: 成功 {report['videos']['success']}，"
+          f"失败 {report['videos']['failed']}，缓存命中 {report['videos']['cached']}")
+    print(f"总耗时: {report['elapsed']:.2f} 秒，吞吐量: "
+          f"{report['throughput']['documents_per_second']:.2f} 篇/秒，"
+          f"{report['throughput']['scenes_per_second']:.2f} 场景/秒")
+    latency = report["document_latency"]
+    print(f"文档延迟(秒): p50 {latency['p50']:.2f}  p90 {latency['p90']:.2f}  "
+          f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}")
+    print("各阶段耗时(秒):")
+    for span in report["spans"]:
+        labels = ",".join(f"{key}={value}" for key, value in sorted(span["labels"].items()))
+        print(f"  {span['name']:<16} {labels:<44} n={span['count']:<5} p50 {span['p50']:.3f}  "
+              f"p90 {span['p90']:.3f}  p99 {span['p99']:.3f}")
+    print("服务端请求:")
+    for endpoint, counts in sorted(report["server"].get("stats", {}).items()):
+        detail = "  ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+        print(f"  {endpoint:<14} {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端压测')
+    parser.add_argument('--documents', type=int, default=8, help='文档数')
+    parser.add_argument('--concurrency', type=int, default=None, help='同时处理的文档数，默认等于文档数')
+    parser.add_argument('--sentences', type=int, default=40, help='每篇文档的句子数')
+    parser.add_argument('--pipeline', action='store_true', help='使用流水线模式')
+    parser.add_argument('--use-cache', action='store_true', help='使用场景提取缓存和视频缓存')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='模拟服务接口延迟的缩放倍数')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='模拟服务各接口返回500的比例')
+    parser.add_argument('--kling-job-time', type=float, default=5.0, help='Kling任务完成时长中位数（秒）')
+    parser.add_argument('--kling-failure-rate', type=float, default=0.0, help='Kling任务失败的比例')
+    parser.add_argument('--kling-rate-limit', type=float, default=None, help='Kling提交接口每秒请求上限')
+    parser.add_argument('--deepseek-rate-limit', type=float, default=None, help='DeepSeek接口每秒请求上限')
+    parser.add_argument('--video-size', type=int, default=2 * 1024 * 1024, help='视频文件字节数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--json-report', default=None, help='把压测报告写入该JSON文件')
+    args = parser.parse_args()
+
+    process, base_url = start_server(args)
+    try:
+        with tempfile.TemporaryDirectory(prefix="load_test_") as work_dir:
+            start = time.perf_counter()
+            summary, metrics = run_documents(args, base_url, work_dir)
+            elapsed = time.perf_counter() - start
+
+            with urllib.request.urlopen(f"{base_url}/_stats") as response:
+                server_stats = json.load(response)
+    finally:
+        process.terminate()
+        process.wait()
+
+    report = build_report(args, summary, metrics, elapsed, server_stats)
+    print_report(report)
+
+    if args.json_report:
+        with open(args.json_report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
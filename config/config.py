@@ -8,11 +8,91 @@ class Config:
     # DeepSeek API 配置
     DEEPSEEK_API_KEY = "your_deepseek_api_key_here"
     DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
+    DEEPSEEK_MODEL = "deepseek-chat"
+    DEEPSEEK_TEMPERATURE = 0.7
+    DEEPSEEK_STREAM = True                    # 流水线模式下流式接收回复，逐个产出场景
+
+    # 规则提取的可视化关键词；配置关键词文件（每行一个）时以文件为准
+    RULE_KEYWORDS = [
+        '站在', '走向', '搬运', '倒入', '发生', '产生', '销毁',
+        '建造', '实验', '反应', '展示', '演示', '操作'
+    ]
+    RULE_KEYWORDS_FILE = None
+    RULE_KEYWORDS_AUTOMATON_MIN = 200         # 关键词数达到此值时用 Aho-Corasick 自动机，较少时逐个关键词查找
+
+    # 长文本分块提取配置
+    EXTRACT_CHUNKING = True
+    EXTRACT_CHUNK_MAX_TOKENS = 3000           # 每个窗口的输入token预算（估算）
+    EXTRACT_CHUNK_CONCURRENCY = 4
+
+    # 场景提取缓存配置
+    SCENE_CACHE_ENABLED = True
+    SCENE_CACHE_DIR = "cache/scenes"
+    SCENE_CACHE_MAX_ENTRIES = 1000
+    SCENE_CACHE_MAX_AGE = 7 * 24 * 3600       # 秒，固定的条目不受限制
+
+    # 场景输出配置：场景逐行写入输出目录中的JSONL场景存储
+    SCENES_FILE = "scenes.jsonl"
+    SCENES_JSON_EXPORT = True                 # 是否另外导出旧格式的 scenes.json（缩进的JSON数组）
 
     # Kling AI API 配置
     KLING_API_KEY = "your_kling_api_key_here"
     KLING_API_URL = "https://api.kling.ai/v1/videos/generate"
 
+    # 已提交但未完成的场景数上限，超过时提交方阻塞（反压）
+    MAX_PENDING_SCENES = 64
+
+    # 流水线模式下提取与生成之间的场景队列长度
+    PIPELINE_QUEUE_SIZE = 16
+
+    # 批量模式下同时处理的文档数
+    BATCH_DOCUMENT_CONCURRENCY = 4
+
+    # Kling 任务轮询配置（秒）
+    KLING_JOB_TIMEOUT = 300
+    KLING_POLL_INITIAL_INTERVAL = 2
+    KLING_POLL_MAX_INTERVAL = 30
+    KLING_POLL_BACKOFF = 1.5
+    # 同时处于提交/生成中的Kling任务数上限
+    KLING_MAX_OUTSTANDING = 100
+    # Kling任务日志：记录已提交任务，中断后重新运行时续用而不重复提交
+    KLING_JOURNAL_ENABLED = True
+    KLING_JOURNAL_FILE = "kling_jobs.jsonl"   # 位于输出目录
+
+    # 视频缓存配置
+    VIDEO_CACHE_ENABLED = True
+    VIDEO_CACHE_DIR = "cache/videos"
+    VIDEO_CACHE_MAX_SIZE = 10 * 1024 ** 3     # 字节
+    VIDEO_CACHE_MAX_AGE = 30 * 24 * 3600      # 秒
+
+    # 场景提示词近似去重：生成参数相同且提示词相似的场景共用一个视频
+    DEDUP_ENABLED = True
+    DEDUP_THRESHOLD = 0.8                     # 字符 n-gram 的 Jaccard 相似度阈值
+    DEDUP_SHINGLE_SIZE = 2                    # n-gram 长度（字符）
+    DEDUP_MINHASH_BANDS = 16                  # LSH 分带数，与每带行数共同决定签名长度
+    DEDUP_MINHASH_ROWS = 4
+    DEDUP_MAX_ENTRIES = 100000                # 索引中保留的代表场景数
+
+    # HTTP客户端配置
+    HTTP_CONNECT_TIMEOUT = 10                 # 秒
+    HTTP_READ_TIMEOUT = 120                   # 秒
+    HTTP_POOL_SIZE = 32                       # 每个主机保持的连接数
+    HTTP_MAX_RETRIES = 3                      # 429/5xx/连接错误的最大重试次数
+    HTTP_BACKOFF_BASE = 1.0                   # 秒，指数退避基数
+    HTTP_BACKOFF_MAX = 30                     # 秒
+    # 各接口的令牌桶限流：rate 为每秒请求数，burst 为突发容量
+    HTTP_RATE_LIMITS = {
+        "deepseek": {"rate": 2, "burst": 4},
+        "kling": {"rate": 2, "burst": 5},
+        "kling_status": {"rate": 10, "burst": 20}
+    }
+
+    # 视频下载配置
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024         # 字节，读写缓冲区大小
+    DOWNLOAD_SEGMENTS = 4                     # 支持 Range 时大文件的并行分段数
+    DOWNLOAD_SEGMENT_MIN_SIZE = 8 * 1024 ** 2  # 字节，小于此大小的文件不分段
+    DOWNLOAD_MAX_ATTEMPTS = 3                 # 每个分段中断后的最大尝试次数
+
     # 默认视频参数
     DEFAULT_VIDEO_PARAMS = {
         "duration": 5,
@@ -21,6 +101,60 @@ class Config:
         "fps": 30
     }
 
+    # 模拟视频的生成耗时（秒），基准测试中设为 0
+    MOCK_VIDEO_DELAY = 1
+
+    # 并发生成配置
+    CONCURRENT_GENERATION = True
+    # 各生成后端的线程池大小。manim/mock 即同时生成的场景数上限，manim 为 None 时与渲染进程数相同；
+    # kling 只是提交与下载的线程数，同时进行中的Kling任务数由 KLING_MAX_OUTSTANDING 限制
+    BACKEND_CONCURRENCY = {
+        "kling": 4,
+        "manim": None,
+        "mock": 8
+    }
+
+    # 场景调度配置：生成顺序、每篇文档的Kling预算与截止时间
+    SCHEDULE_POLICY = "position"              # position: 按文档位置；shortest: 估算耗时最短优先；fifo: 提交顺序
+    SCHEDULE_KLING_BUDGET = None              # 秒，每篇文档提交给Kling的视频总时长上限，None 表示不限
+    SCHEDULE_DEADLINE = None                  # 秒，文档开始生成后超过此时间，其余场景降级为模拟视频
+    # 各后端的生成耗时估算：基础秒数 + 每秒视频所需秒数
+    SCHEDULE_ESTIMATES = {
+        "kling": (60, 6),
+        "manim": (10, 4),
+        "mock": (1, 0)
+    }
+
+    # Manim本地渲染配置
+    MANIM_QUALITY = "preview"                 # preview: 480p15 快速预览；full: 场景分辨率与帧率
+    MANIM_RENDER_PROCESSES = None             # 渲染进程数，None 表示CPU核数
+    MANIM_RENDER_TIMEOUT = 600                # 秒，单个场景的渲染超时
+    MANIM_FONT = "Noto Sans CJK SC"           # 中文字体
+
+    # 视频封面配置：生成后用 ffmpeg 截取封面，输出页面据此懒加载视频
+    POSTER_ENABLED = True
+    POSTER_PROCESSES = None                   # 封面提取进程数，None 表示CPU核数
+    POSTER_MAX_WIDTH = 640                    # 像素，封面图片的最大宽度
+    POSTER_TIMEOUT = 60                       # 秒，单个视频的提取超时
+
+    # 常驻服务配置（python main.py --serve）
+    SERVICE_HOST = "127.0.0.1"
+    SERVICE_PORT = 8800
+    SERVICE_DOCUMENT_CONCURRENCY = 4          # 同时处理的文档数
+    SERVICE_MAX_QUEUED = 256                  # 排队任务数上限，超出时拒绝提交
+    SERVICE_MAX_JOBS = 1000                   # 内存中保留的任务记录数
+    SERVICE_MAX_REQUEST_SIZE = 16 * 1024 ** 2  # 字节，提交请求体的大小上限，超出时返回413
+
+    # 运行指标配置：每次运行后在输出目录写出 metrics.json 与 metrics.prom
+    METRICS_ENABLED = True
+    METRICS_PREFIX = "text_to_video"
+    METRICS_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]  # 秒
+    METRICS_MAX_EVENTS = 100000               # 逐场景事件的记录上限
+
     # 日志配置
     LOG_LEVEL = "INFO"
-    LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
\ No newline at end of file
+    LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_QUEUED = True                         # 日志经队列交给后台线程写出，调用线程不做I/O
+    LOG_JSON = False                          # 日志文件使用 JSON Lines 格式
+    LOG_MAX_BYTES = 50 * 1024 ** 2            # 字节，单个日志文件超过后轮转
+    LOG_BACKUP_COUNT = 5                      # 轮转保留的旧日志文件数
\ No newline at end of file
@@ -1,5 +1,4 @@
 import argparse
-import json
 import os
 import sys
 from pathlib import Path
@@ -7,63 +6,135 @@ from pathlib import Path
 # 添加项目根目录到路径
 sys.path.append(str(Path(__file__).parent))
 
+from config.config import Config
 from modules.text_analyzer import TextAnalyzer
 from modules.video_generator import VideoGenerator
 from modules.video_inserter import VideoInserter
+from modules.pipeline import process_document
+from modules.corpus import CorpusRunner
+from modules.keyword_matcher import KeywordMatcher
+from modules.manim_renderer import ManimRenderer
+from modules.scene_scheduler import SceneScheduler
 from modules.logger import setup_logger
-from config.config import Config
+from modules.metrics import get_metrics
+from modules.service import JobService, ServiceServer
+
+
+def write_metrics(metrics_dir: str, logger):
+    """写出本次运行的指标报告与Prometheus文本文件"""
+
+    try:
+        metrics = get_metrics()
+        metrics.write_report(os.path.join(metrics_dir, "metrics.json"))
+        metrics.write_prometheus(os.path.join(metrics_dir, "metrics.prom"))
+        logger.info(f"运行指标已写入: {metrics_dir}")
+    except OSError as e:
+        logger.warning(f"运行指标写入失败: {str(e)}")
 
 
 def main():
     """主程序入口"""
     parser = argparse.ArgumentParser(description='文本生成视频工具')
-    parser.add_argument('--input', '-i', required=True, help='输入文本文件路径')
+    parser.add_argument('--input', '-i', default=None,
+                        help='输入文本文件路径；批量模式下为目录或清单文件（每行一个路径）')
     parser.add_argument('--output', '-o', default='output', help='输出目录')
     parser.add_argument('--format', '-f', choices=['html', 'markdown'], default='html', help='输出格式')
+    parser.add_argument('--serial', action='store_true', help='逐个串行生成视频（关闭并发生成）')
+    parser.add_argument('--no-cache', action='store_true', help='不使用场景提取缓存和视频缓存')
+    parser.add_argument('--no-journal', action='store_true',
+                        help='不记录Kling任务日志（中断后重新运行将重新提交全部任务）')
+    parser.add_argument('--no-dedup', action='store_true', help='不复用近似重复场景的视频，每个场景单独生成')
+    parser.add_argument('--no-stream', action='store_true',
+                        help='场景提取不使用流式响应，等待API完整返回后再处理')
+    parser.add_argument('--no-scenes-json', action='store_true',
+                        help='只写出 scenes.jsonl，不再导出旧格式的 scenes.json（场景很多时节省时间和内存）')
+    parser.add_argument('--pin-scenes', action='store_true', help='固定场景提取结果，之后的运行复用相同场景')
+    parser.add_argument('--pipeline', action='store_true', help='流水线模式：提取、生成与插入并行进行')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量模式：只为上次运行后改动过的文本重新生成视频')
+    parser.add_argument('--batch', action='store_true',
+                        help='批量模式：处理目录或清单中的全部文档，每篇输出到独立子目录')
+    parser.add_argument('--documents', type=int, default=None, help='批量模式下同时处理的文档数')
+    parser.add_argument('--keywords', default=None, help='规则提取使用的关键词文件（每行一个关键词）')
+    parser.add_argument('--metrics-dir', default=None,
+                        help='运行指标（metrics.json / metrics.prom）的输出目录，默认为输出目录')
+    parser.add_argument('--serve', action='store_true',
+                        help='服务模式：常驻运行，通过本地HTTP接口接收文档并处理')
+    parser.add_argument('--host', default=None, help='服务模式的监听地址')
+    parser.add_argument('--port', type=int, default=None, help='服务模式的监听端口')
+    parser.add_argument('--schedule', choices=list(SceneScheduler.POLICIES), default=None,
+                        help='视频生成顺序：position 按文档位置，shortest 估算耗时最短优先，fifo 提交顺序')
+    parser.add_argument('--kling-budget', type=float, default=None,
+                        help='每篇文档提交给Kling的视频总秒数上限，超出的场景降级为模拟视频')
+    parser.add_argument('--deadline', type=float, default=None,
+                        help='每篇文档的生成截止时间（秒），之后开始的场景降级为模拟视频')
+    parser.add_argument('--manim-quality', choices=['preview', 'full'], default=None,
+                        help='技术视频的Manim渲染质量：preview 快速预览，full 完整质量')
 
     args = parser.parse_args()
+    if not args.serve and not args.input:
+        parser.error("需要指定 --input（服务模式 --serve 除外）")
+
+    if args.no_scenes_json:
+        Config.SCENES_JSON_EXPORT = False
 
     # 设置日志
     logger = setup_logger()
 
-    try:
-        # 读取输入文本
-        with open(args.input, 'r', encoding='utf-8') as f:
-            input_text = f.read()
-
-        logger.info(f"开始处理文本文件: {args.input}")
+    mode = "incremental" if args.incremental else "pipeline" if args.pipeline else "staged"
 
+    try:
         # 初始化模块
-        text_analyzer = TextAnalyzer()
-        video_generator = VideoGenerator()
-        video_inserter = VideoInserter()
-
-        # 步骤1: 分析文本，提取场景
-        logger.info("步骤1: 分析文本，提取场景")
-        scenes = text_analyzer.extract_scenes(input_text)
-        logger.info(f"提取到 {len(scenes)} 个场景")
-
-        # 保存场景信息
-        os.makedirs(args.output, exist_ok=True)
-        scenes_file = os.path.join(args.output, 'scenes.json')
-        with open(scenes_file, 'w', encoding='utf-8') as f:
-            json.dump(scenes, f, ensure_ascii=False, indent=2)
-
-        # 步骤2: 生成视频
-        logger.info("步骤2: 生成视频")
-        video_results = video_generator.generate_videos(scenes, args.output)
-
-        # 步骤3: 插入视频到原文
-        logger.info("步骤3: 插入视频到原文")
-        output_content = video_inserter.insert_videos(
-            input_text, scenes, video_results, args.format
+        text_analyzer = TextAnalyzer(
+            use_cache=False if args.no_cache else None,
+            pin=args.pin_scenes,
+            stream=False if args.no_stream else None,
+            keyword_matcher=KeywordMatcher.from_file(args.keywords) if args.keywords else None
+        )
+        video_generator = VideoGenerator(
+            concurrent=False if args.serial else None,
+            use_cache=False if args.no_cache else None,
+            use_journal=False if args.no_journal else None,
+            use_dedup=False if args.no_dedup else None,
+            renderer=ManimRenderer(quality=args.manim_quality),
+            scheduler=SceneScheduler(policy=args.schedule, kling_budget=args.kling_budget,
+                                     deadline=args.deadline)
         )
+        video_inserter = VideoInserter()
 
-        # 保存最终结果
-        output_ext = 'html' if args.format == 'html' else 'md'
-        output_file = os.path.join(args.output, f'result.{output_ext}')
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(output_content)
+        try:
+            if args.serve:
+                # 服务模式：所有请求共用同一组模块实例，输出到 --output 下的各任务子目录
+                service = JobService(text_analyzer, video_generator, video_inserter, args.output,
+                                     document_concurrency=args.documents)
+                server = ServiceServer(service, args.host, args.port)
+                try:
+                    server.serve_forever()
+                except KeyboardInterrupt:
+                    logger.info("服务停止中，等待处理中的任务完成")
+                finally:
+                    server.stop()
+                    service.close()
+                return
+
+            if args.batch:
+                # 批量处理：所有文档共用同一组模块实例
+                runner = CorpusRunner(text_analyzer, video_generator, video_inserter,
+                                      document_concurrency=args.documents)
+                runner.run(args.input, args.output, args.format, mode)
+                return
+
+            # 读取输入文本
+            with open(args.input, 'r', encoding='utf-8') as f:
+                input_text = f.read()
+
+            logger.info(f"开始处理文本文件: {args.input}")
+            output_file = process_document(input_text, args.output, args.format, mode,
+                                           text_analyzer, video_generator, video_inserter, logger)
+        finally:
+            video_generator.close()
+            if Config.METRICS_ENABLED:
+                write_metrics(args.metrics_dir or args.output, logger)
 
         logger.info(f"处理完成！结果保存在: {output_file}")
 
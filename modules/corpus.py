@@ -0,0 +1,163 @@
+# =============================================================================
+# modules/corpus.py - 批量语料处理模块
+# =============================================================================
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+from config.config import Config
+from modules.logger import setup_logger
+from modules.pipeline import process_document
+
+
+class CorpusRunner:
+    """
+    批量语料处理器
+
+    一次处理一个目录或清单文件中的全部文档。所有文档共用同一组
+    TextAnalyzer / VideoGenerator / VideoInserter，因而共用其线程池、
+    Kling任务追踪器和缓存；各文档的场景进入同一组后端线程池，
+    在文档之间统一调度。每篇文档输出到独立子目录，最后生成汇总报告。
+    """
+
+    def __init__(self, text_analyzer, video_generator, video_inserter,
+                 document_concurrency: Optional[int] = None):
+        self.logger = setup_logger()
+        self.text_analyzer = text_analyzer
+        self.video_generator = video_generator
+        self.video_inserter = video_inserter
+        self.document_concurrency = document_concurrency or Config.BATCH_DOCUMENT_CONCURRENCY
+
+    def collect_inputs(self, source: str) -> List[Dict]:
+        """
+        收集输入文档
+
+        Args:
+            source: 目录（递归查找 .txt 文件）或清单文件（每行一个路径，# 开头为注释）
+
+        Returns:
+            文档列表，每项包含 input（文件路径）和 name（输出子目录名）
+        """
+
+        if os.path.isdir(source):
+            paths = []
+            for root, _, files in os.walk(source):
+                for name in files:
+                    if name.endswith(".txt"):
+                        paths.append(os.path.join(root, name))
+            paths.sort()
+            names = [os.path.splitext(os.path.relpath(path, source))[0] for path in paths]
+        else:
+            base_dir = os.path.dirname(os.path.abspath(source))
+            paths = []
+            with open(source, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    paths.append(line if os.path.isabs(line) else os.path.join(base_dir, line))
+            names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+
+        # 输出子目录重名时追加序号
+        documents = []
+        seen = {}
+        for path, name in zip(paths, names):
+            count = seen.get(name, 0) + 1
+            seen[name] = count
+            documents.append({
+                "input": path,
+                "name": name if count == 1 else f"{name}_{count}"
+            })
+        return documents
+
+    def run(self, source: str, output_root: str, output_format: str = "html",
+            mode: str = "staged") -> Dict:
+        """
+        处理全部文档并写出汇总报告
+
+        Returns:
+            汇总报告字典
+        """
+
+        documents = self.collect_inputs(source)
+        self.logger.info(f"批量处理 {len(documents)} 篇文档，输出目录: {output_root}")
+        os.makedirs(output_root, exist_ok=True)
+
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, self.document_concurrency),
+                                thread_name_prefix="document") as executor:
+            reports = list(executor.map(
+                lambda document: self._process(document, output_root, output_format, mode),
+                documents
+            ))
+
+        summary = {
+            "source": source,
+            "mode": mode,
+            "format": output_format,
+            "documents": reports,
+            "total": len(reports),
+            "succeeded": sum(1 for r in reports if r["status"] == "success"),
+            "failed": sum(1 for r in reports if r["status"] == "failed"),
+            "scenes": sum(r.get("scenes", 0) for r in reports),
+            "elapsed": round(time.time() - start_time, 3)
+        }
+
+        summary_file = os.path.join(output_root, "summary.json")
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        self.logger.info(
+            f"批量处理完成: 成功 {summary['succeeded']} 篇，失败 {summary['failed']} 篇，"
+            f"共 {summary['scenes']} 个场景，用时 {summary['elapsed']} 秒。汇总报告: {summary_file}"
+        )
+        return summary
+
+    def _process(self, document: Dict, output_root: str, output_format: str, mode: str) -> Dict:
+        """处理单篇文档，异常不影响其他文档"""
+
+        output_dir = os.path.join(output_root, document["name"])
+        report = {
+            "input": document["input"],
+            "output_dir": output_dir
+        }
+
+        start_time = time.time()
+        try:
+            with open(document["input"], 'r', encoding='utf-8') as f:
+                input_text = f.read()
+
+            self.logger.info(f"开始处理文本文件: {document['input']}")
+            result_file = process_document(
+                input_text, output_dir, output_format, mode,
+                self.text_analyzer, self.video_generator, self.video_inserter, self.logger
+            )
+
+            report.update({"status": "success", "result_file": result_file})
+            report.update(self._count_results(output_dir))
+
+        except Exception as e:
+            self.logger.error(f"文档 {document['input']} 处理失败: {str(e)}")
+            report.update({"status": "failed", "error": str(e)})
+
+        report["elapsed"] = round(time.time() - start_time, 3)
+        return report
+
+    @staticmethod
+    def _count_results(output_dir: str) -> Dict:
+        """根据运行清单统计场景与视频数量"""
+
+        with open(os.path.join(output_dir, "manifest.json"), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        results = manifest.get("video_results", {}).values()
+        return {
+            "scenes": len(manifest.get("scenes", [])),
+            "videos": {
+                "success": sum(1 for r in results if r.get("status") == "success"),
+                "failed": sum(1 for r in results if r.get("status") != "success"),
+                "cached": sum(1 for r in results if r.get("cached"))
+            }
+        }
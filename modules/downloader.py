@@ -0,0 +1,253 @@
+# =============================================================================
+# modules/downloader.py - 文件下载模块
+# =============================================================================
+
+import hashlib
+import json
+import os
+import re
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from config.config import Config
+from modules.http_client import HttpClient, get_http_client
+from modules.logger import setup_logger
+from modules.metrics import get_metrics
+
+
+class Downloader:
+    """
+    可续传的文件下载器
+
+    数据先写入 <目标>.part，下载进度记录在 <目标>.part.json；
+    中断后再次下载同一地址时从已完成的位置继续。服务器支持 Range 时，
+    大文件分成多段并行下载。全部完成并校验大小（及可选的 sha256）后
+    原子重命名为目标文件，目标路径上不会出现写了一半的文件。
+    """
+
+    def __init__(self, http_client: Optional[HttpClient] = None,
+                 chunk_size: Optional[int] = None, segments: Optional[int] = None,
+                 segment_min_size: Optional[int] = None, max_attempts: Optional[int] = None):
+        self.logger = setup_logger()
+        self.metrics = get_metrics()
+        self.http = http_client or get_http_client()
+        self.chunk_size = chunk_size or Config.DOWNLOAD_CHUNK_SIZE
+        self.segments = max(1, segments or Config.DOWNLOAD_SEGMENTS)
+        self.segment_min_size = segment_min_size or Config.DOWNLOAD_SEGMENT_MIN_SIZE
+        self.max_attempts = max(1, max_attempts or Config.DOWNLOAD_MAX_ATTEMPTS)
+
+    def download(self, url: str, dest_path: str, expected_size: Optional[int] = None,
+                 sha256: Optional[str] = None) -> str:
+        """
+        下载文件到 dest_path
+
+        Args:
+            url: 文件地址
+            dest_path: 目标路径
+            expected_size: 预期字节数，不提供时以服务器返回的长度为准
+            sha256: 预期的 sha256 十六进制摘要，不提供时不校验内容
+
+        Returns:
+            目标路径
+        """
+
+        part_file = f"{dest_path}.part"
+        state_file = f"{part_file}.json"
+
+        # 用 1 字节的 Range 请求探测文件大小与是否支持分段
+        probe = self.http.get(url, endpoint="download", stream=True, headers={"Range": "bytes=0-0"})
+        try:
+            if probe.status_code == 206:
+                total = self._parse_content_range(probe.headers.get("Content-Range"))
+                etag = probe.headers.get("ETag")
+            else:
+                probe.raise_for_status()
+                # 不支持 Range：直接使用这次的完整响应，从头下载
+                total = self._parse_length(probe.headers.get("Content-Length"))
+                self._remove(state_file)
+                with open(part_file, 'wb') as f:
+                    self._copy_body(probe, f)
+                    self._sync(f)
+                return self._finalize(part_file, state_file, dest_path,
+                                      expected_size or total, sha256)
+        finally:
+            probe.close()
+
+        if total is None:
+            raise ValueError(f"无法确定文件大小: {url}")
+
+        state = self._load_state(state_file, part_file, url, total, etag)
+        if state is None:
+            state = {"url": url, "size": total, "etag": etag,
+                     "segments": self._plan_segments(total)}
+            with open(part_file, 'wb') as f:
+                f.truncate(total)
+            self._save_state(state_file, state)
+        else:
+            done = sum(segment[2] for segment in state["segments"])
+            self.logger.info("续传下载: 已完成 %s/%s 字节 %s", done, total, dest_path)
+            self.metrics.increment("download_resumes")
+
+        self._download_segments(url, part_file, state_file, state)
+        return self._finalize(part_file, state_file, dest_path, expected_size or total, sha256)
+
+    def _plan_segments(self, total: int) -> List[List[int]]:
+        """
+        把文件划分为下载分段 [起始偏移, 结束偏移(含), 已下载字节数]
+
+        小于 segment_min_size 的文件只用一段。
+        """
+
+        if total <= 0:
+            return []
+        count = 1 if total < self.segment_min_size else self.segments
+        size = -(-total // count)
+        return [[start, min(start + size, total) - 1, 0] for start in range(0, total, size)]
+
+    def _download_segments(self, url: str, part_file: str, state_file: str, state: Dict):
+        """下载所有未完成的分段，每写入一块即记录进度"""
+
+        lock = threading.Lock()
+        pending = [segment for segment in state["segments"] if segment[0] + segment[2] <= segment[1]]
+
+        def run(segment):
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    self._download_segment(url, part_file, state_file, state, segment, lock)
+                    return
+                except (requests.RequestException, ValueError) as e:
+                    if attempt >= self.max_attempts:
+                        raise
+                    self.metrics.increment("download_retries")
+                    self.logger.warning(
+                        f"分段 {segment[0]}-{segment[1]} 下载中断: {str(e)}，"
+                        f"从 {segment[0] + segment[2]} 继续（第 {attempt} 次重试）"
+                    )
+
+        if len(pending) <= 1:
+            for segment in pending:
+                run(segment)
+            return
+
+        with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="download") as executor:
+            for future in [executor.submit(run, segment) for segment in pending]:
+                future.result()
+
+    def _download_segment(self, url: str, part_file: str, state_file: str, state: Dict,
+                          segment: List[int], lock: threading.Lock):
+        """从分段的已下载位置继续下载该分段"""
+
+        start, end = segment[0] + segment[2], segment[1]
+        headers = {"Range": f"bytes={start}-{end}"}
+        if state.get("etag"):
+            # 文件在服务器端变化时返回 200 而非 206，避免拼接出错
+            headers["If-Range"] = state["etag"]
+
+        response = self.http.get(url, endpoint="download", stream=True, headers=headers)
+        try:
+            if response.status_code != 206:
+                response.raise_for_status()
+                raise ValueError(f"服务器未按分段返回内容（状态码 {response.status_code}），文件可能已变化")
+
+            with open(part_file, 'r+b') as f:
+                f.seek(start)
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    remaining = end + 1 - (segment[0] + segment[2])
+                    chunk = chunk[:remaining]
+                    f.write(chunk)
+                    f.flush()
+                    with lock:
+                        segment[2] += len(chunk)
+                        self._save_state(state_file, state)
+                    if len(chunk) == remaining:
+                        break
+        finally:
+            response.close()
+
+        if segment[0] + segment[2] <= end:
+            raise ValueError(f"分段内容不完整: 缺少 {end + 1 - segment[0] - segment[2]} 字节")
+
+    def _copy_body(self, response: requests.Response, f):
+        """把响应体按块写入文件"""
+
+        for chunk in response.iter_content(chunk_size=self.chunk_size):
+            f.write(chunk)
+
+    def _finalize(self, part_file: str, state_file: str, dest_path: str,
+                  expected_size: Optional[int], sha256: Optional[str]) -> str:
+        """校验下载结果并原子替换为目标文件，校验失败时丢弃临时文件"""
+
+        try:
+            actual_size = os.path.getsize(part_file)
+            if expected_size is not None and actual_size != expected_size:
+                raise ValueError(f"文件大小不符: 预期 {expected_size} 字节，实际 {actual_size} 字节")
+            if sha256 and self._file_sha256(part_file) != sha256.lower():
+                raise ValueError("文件校验和不符")
+        except ValueError:
+            self._remove(part_file)
+            self._remove(state_file)
+            raise
+
+        with open(part_file, 'rb') as f:
+            self._sync(f)
+        os.replace(part_file, dest_path)
+        self._remove(state_file)
+        return dest_path
+
+    def _file_sha256(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(self.chunk_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _load_state(self, state_file: str, part_file: str, url: str, total: int,
+                    etag: Optional[str]) -> Optional[Dict]:
+        """读取可续传的下载进度，与本次下载不匹配时返回 None"""
+
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            part_size = os.path.getsize(part_file)
+        except (OSError, ValueError):
+            return None
+
+        if state.get("url") != url or state.get("size") != total or part_size != total:
+            return None
+        if etag and state.get("etag") and state["etag"] != etag:
+            return None
+        return state
+
+    @staticmethod
+    def _save_state(state_file: str, state: Dict):
+        tmp_file = f"{state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_file, state_file)
+
+    @staticmethod
+    def _parse_content_range(value: Optional[str]) -> Optional[int]:
+        """从 Content-Range（bytes 0-0/12345）中取出文件总大小"""
+
+        match = re.match(r'bytes\s+\d+-\d+/(\d+)', value or "")
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def _parse_length(value: Optional[str]) -> Optional[int]:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _sync(f):
+        f.flush()
+        os.fsync(f.fileno())
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
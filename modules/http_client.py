@@ -0,0 +1,164 @@
+# =============================================================================
+# modules/http_client.py - 共享HTTP客户端模块
+# =============================================================================
+
+import random
+import threading
+import time
+import requests
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from config.config import Config
+from modules.logger import setup_logger
+from modules.metrics import get_metrics
+
+
+class TokenBucket:
+    """令牌桶限流器：平均每秒 rate 个请求，允许 burst 个突发"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取得一个令牌，不足时阻塞等待"""
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HttpClient:
+    """
+    共享HTTP客户端
+
+    所有外部接口调用共用一个带连接池的 Session（保持长连接，避免每次握手）。
+    每个接口（endpoint）有独立的令牌桶限流；遇到连接错误、超时、429 和 5xx
+    时按带抖动的指数退避重试，优先遵循 Retry-After。超时时间取自 Config。
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, pool_size: Optional[int] = None,
+                 rate_limits: Optional[Dict[str, Dict]] = None):
+        self.logger = setup_logger()
+        self.metrics = get_metrics()
+        self.timeout = (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+        self.max_retries = Config.HTTP_MAX_RETRIES
+
+        pool_size = pool_size or Config.HTTP_POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        limits = Config.HTTP_RATE_LIMITS if rate_limits is None else rate_limits
+        self.buckets = {
+            endpoint: TokenBucket(limit["rate"], limit["burst"])
+            for endpoint, limit in limits.items()
+        }
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, endpoint: Optional[str] = None,
+                retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """
+        发送请求
+
+        Args:
+            method: HTTP方法
+            url: 请求地址
+            endpoint: 限流使用的接口名，未配置限流的接口不限速
+            retries: 最大重试次数，默认取 Config.HTTP_MAX_RETRIES；
+                     为 0 时由调用方自行处理 429/5xx
+            **kwargs: 透传给 requests 的参数
+
+        Returns:
+            最后一次请求的响应（可能仍是 429/5xx，由调用方 raise_for_status）
+        """
+
+        retries = self.max_retries if retries is None else retries
+        kwargs.setdefault("timeout", self.timeout)
+        bucket = self.buckets.get(endpoint)
+
+        for attempt in range(retries + 1):
+            if bucket is not None:
+                bucket.acquire()
+
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.metrics.increment("http_requests", endpoint=endpoint or "other", status="error")
+                if attempt >= retries:
+                    raise
+                self.metrics.increment("http_retries", endpoint=endpoint or "other", reason="connection")
+                delay = self._backoff(attempt)
+                self.logger.warning("请求 %s 失败: %s，%.1f秒后重试", endpoint or url, e, delay)
+                time.sleep(delay)
+                continue
+
+            self.metrics.increment("http_requests", endpoint=endpoint or "other", status=response.status_code)
+            if response.status_code not in self.RETRY_STATUSES or attempt >= retries:
+                return response
+
+            self.metrics.increment("http_retries", endpoint=endpoint or "other", reason=response.status_code)
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                delay = min(retry_after, Config.HTTP_BACKOFF_MAX)
+            else:
+                delay = self._backoff(attempt)
+            self.logger.warning("请求 %s 返回 %s，%.1f秒后重试", endpoint or url, response.status_code, delay)
+            response.close()
+            time.sleep(delay)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """带完全抖动的指数退避时间"""
+
+        ceiling = min(Config.HTTP_BACKOFF_MAX, Config.HTTP_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或HTTP日期），无法解析时返回 None"""
+
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """获取进程内共享的HTTP客户端"""
+
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
@@ -0,0 +1,252 @@
+# =============================================================================
+# modules/incremental.py - 增量构建模块
+# =============================================================================
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from typing import List, Dict, Mapping, Optional, Tuple
+from modules.logger import setup_logger
+from modules.scene_record import SceneRecord
+from modules.sentence_index import SentenceIndex
+
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2
+
+# 视频结果中的文件路径字段，清单中保存为相对输出目录的路径
+PATH_FIELDS = ("video_path", "poster")
+
+
+def sentence_digest(sentence: str) -> str:
+    """句子内容摘要，用于比较两次运行的句子列表"""
+    return hashlib.sha1(sentence.strip().encode("utf-8")).hexdigest()
+
+
+class IncrementalBuilder:
+    """
+    增量构建器
+
+    每次运行后在输出目录保存清单（句子摘要、场景、视频结果）。
+    再次运行时按句子对比新旧文本：未改动句子上的场景连同视频直接沿用，
+    只对新增或修改的句子提取场景并生成视频，不再被引用的旧视频文件会被删除。
+    """
+
+    def __init__(self, text_analyzer, video_generator):
+        self.logger = setup_logger()
+        self.text_analyzer = text_analyzer
+        self.video_generator = video_generator
+
+    def load_manifest(self, output_dir: str) -> Optional[Dict]:
+        """读取上一次运行的清单，不存在或版本不符时返回 None"""
+
+        manifest_file = os.path.join(output_dir, MANIFEST_FILE)
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"运行清单无法读取，将全量构建: {str(e)}")
+            return None
+
+        version = manifest.get("version")
+        if version not in (1, MANIFEST_VERSION):
+            return None
+
+        # 版本 1 的清单保存的是相对当前工作目录的路径
+        base_dir = output_dir if version == MANIFEST_VERSION else None
+        manifest["video_results"] = {
+            scene_id: self._resolve_paths(result, base_dir)
+            for scene_id, result in manifest.get("video_results", {}).items()
+        }
+        return manifest
+
+    def save_manifest(self, output_dir: str, input_text: str, scenes: List[SceneRecord],
+                      video_results: Mapping[str, Dict], index: Optional[SentenceIndex] = None):
+        """保存本次运行的清单"""
+
+        index = index or SentenceIndex(input_text)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "sentences": [sentence_digest(s) for s in index.sentences()],
+            "scenes": [dict(scene) for scene in scenes],
+            "video_results": {scene_id: self._relative_paths(result, output_dir)
+                              for scene_id, result in video_results.items()}
+        }
+
+        manifest_file = os.path.join(output_dir, MANIFEST_FILE)
+        tmp_file = f"{manifest_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_file, manifest_file)
+
+    @staticmethod
+    def _relative_paths(result: Dict, output_dir: str) -> Dict:
+        """视频结果中的文件路径改为相对输出目录，输出目录移动或换工作目录运行后仍然有效"""
+
+        result = dict(result)
+        for field in PATH_FIELDS:
+            if result.get(field):
+                result[field] = os.path.relpath(result[field], output_dir)
+        return result
+
+    @staticmethod
+    def _resolve_paths(result: Dict, base_dir: Optional[str]) -> Dict:
+        """清单中的相对路径解析为绝对路径；base_dir 为 None 时相对当前工作目录"""
+
+        for field in PATH_FIELDS:
+            if result.get(field):
+                path = os.path.join(base_dir, result[field]) if base_dir else result[field]
+                result[field] = os.path.abspath(path)
+        return result
+
+    def build(self, input_text: str, output_dir: str,
+              index: Optional[SentenceIndex] = None) -> Tuple[List[SceneRecord], Dict[str, Dict]]:
+        """
+        增量提取场景并生成视频
+
+        Returns:
+            (场景列表, 视频生成结果字典)
+        """
+
+        index = index or SentenceIndex(input_text)
+        manifest = self.load_manifest(output_dir)
+        if manifest is None:
+            self.logger.info("没有可用的上次运行清单，全量构建")
+            scenes = self.text_analyzer.extract_scenes(input_text, index)
+            return scenes, self.video_generator.generate_videos(scenes, output_dir)
+
+        digests = [sentence_digest(s) for s in index.sentences()]
+
+        kept_scenes, changed_spans = self._diff(manifest, digests)
+        new_scenes = self._extract_spans(input_text, index, changed_spans)
+        self._assign_ids(manifest.get("scenes", []), new_scenes)
+
+        # 位置映射到新文本后，重新锚定字符偏移
+        scenes = sorted(kept_scenes + new_scenes, key=lambda scene: scene["position"])
+        self.text_analyzer.anchor_scenes(scenes, index)
+        self.logger.info(
+            f"增量构建: 沿用 {len(kept_scenes)} 个场景，"
+            f"{len(changed_spans)} 处改动提取出 {len(new_scenes)} 个新场景"
+        )
+
+        # 沿用未改动场景的视频，其余场景重新生成
+        old_results = manifest.get("video_results", {})
+        reused = {}
+        for scene in kept_scenes:
+            result = old_results.get(scene["id"])
+            if result and result.get("status") == "success" and result.get("video_path") \
+                    and os.path.exists(result["video_path"]):
+                reused[scene["id"]] = result
+
+        to_generate = [scene for scene in scenes if scene["id"] not in reused]
+        self.logger.info(f"沿用 {len(reused)} 个视频，重新生成 {len(to_generate)} 个视频")
+        generated = self.video_generator.generate_videos(to_generate, output_dir)
+
+        video_results = {}
+        for scene in scenes:
+            scene_id = scene["id"]
+            video_results[scene_id] = reused[scene_id] if scene_id in reused else generated[scene_id]
+
+        self._remove_orphans(old_results, video_results, output_dir)
+        return scenes, video_results
+
+    def _diff(self, manifest: Dict, digests: List[str]) -> Tuple[List[SceneRecord], List[Tuple[int, int]]]:
+        """
+        对比新旧句子列表
+
+        Returns:
+            (位置已映射到新文本的沿用场景, 新文本中改动过的句子区间列表)
+        """
+
+        old_scenes_by_position = {}
+        for scene in manifest.get("scenes", []):
+            old_scenes_by_position.setdefault(scene.get("position"), []).append(scene)
+
+        kept_scenes = []
+        changed_spans = []
+        matcher = SequenceMatcher(None, manifest.get("sentences", []), digests, autojunk=False)
+
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                for k in range(i2 - i1):
+                    for scene in old_scenes_by_position.get(i1 + k + 1, []):
+                        kept_scenes.append(SceneRecord(scene, position=j1 + k + 1))
+            elif j2 > j1:
+                changed_spans.append((j1, j2))
+
+        return kept_scenes, changed_spans
+
+    def _extract_spans(self, input_text: str, index: SentenceIndex,
+                       spans: List[Tuple[int, int]]) -> List[SceneRecord]:
+        """提取改动区间中的场景，位置映射为全文句子序号"""
+
+        if not spans:
+            return []
+
+        def extract(span):
+            start, end = span
+            span_text = input_text[index.span(start + 1)[0]:index.span(end)[1]]
+            scenes = self.text_analyzer.extract_scenes(span_text)
+            remapped = []
+            for scene in scenes:
+                try:
+                    position = int(scene["position"])
+                except (TypeError, ValueError):
+                    continue
+                # 位置限制在区间范围内
+                position = min(max(position, 1), end - start)
+                remapped.append(scene.replace(position=position + start))
+            return remapped
+
+        with ThreadPoolExecutor(max_workers=max(1, self.text_analyzer.chunk_concurrency),
+                                thread_name_prefix="incremental") as executor:
+            return [scene for scenes in executor.map(extract, spans) for scene in scenes]
+
+    @staticmethod
+    def _assign_ids(old_scenes: List[Dict], new_scenes: List[SceneRecord]):
+        """沿用场景保留原ID（对应已有视频文件），新场景在上次运行的最大编号之后接续编号"""
+
+        next_id = 1
+        for scene in old_scenes:
+            match = re.fullmatch(r'scene_(\d+)', str(scene.get("id", "")))
+            if match:
+                next_id = max(next_id, int(match.group(1)) + 1)
+
+        for scene in sorted(new_scenes, key=lambda scene: scene["position"]):
+            scene["id"] = f"scene_{next_id:03d}"
+            next_id += 1
+
+    def _remove_orphans(self, old_results: Dict[str, Dict], video_results: Dict[str, Dict],
+                        output_dir: str):
+        """删除上次生成、本次不再引用的视频文件及其封面"""
+
+        in_use = {os.path.abspath(r["video_path"]) for r in video_results.values() if r.get("video_path")}
+        output_root = os.path.abspath(output_dir)
+
+        removed = 0
+        for result in old_results.values():
+            video_path = result.get("video_path")
+            if not video_path:
+                continue
+            video_path = os.path.abspath(video_path)
+            if video_path in in_use or os.path.dirname(video_path) != output_root:
+                continue
+            try:
+                os.remove(video_path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            # 视频的封面一并删除
+            if result.get("poster"):
+                try:
+                    os.remove(result["poster"])
+                except FileNotFoundError:
+                    pass
+
+        if removed:
+            self.logger.info(f"删除 {removed} 个不再使用的视频文件")
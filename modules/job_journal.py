@@ -0,0 +1,116 @@
+# =============================================================================
+# modules/job_journal.py - Kling任务日志模块
+# =============================================================================
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from config.config import Config
+from modules.logger import setup_logger
+
+
+class JobJournal:
+    """
+    Kling任务的崩溃安全日志
+
+    输出目录下的只追加JSONL文件，每行记录一个场景的状态变化：
+    submitted（带 video_id）、completed（带视频地址）、downloaded（带本地路径）、
+    failed（降级后清除记录）。每条记录写入后立即 fsync，进程在任意时刻退出，
+    重新运行时都能按每个场景的最后一条记录重新接上未完成的任务、跳过已下载的视频，
+    不会重复提交。打开时把日志压缩为每个场景一条记录。
+    """
+
+    STATES = ("submitted", "completed", "downloaded", "failed")
+
+    def __init__(self, output_dir: str, filename: Optional[str] = None):
+        self.logger = setup_logger()
+        self.path = os.path.join(output_dir, filename or Config.KLING_JOURNAL_FILE)
+
+        self._lock = threading.Lock()
+        self._entries = self._replay()
+        self._compact()
+
+    @staticmethod
+    def make_key(scene: Dict) -> str:
+        """场景的日志键：场景ID与Kling生成参数都相同才视为同一任务"""
+
+        params = {
+            "id": scene["id"],
+            "prompt": scene["prompt"],
+            "duration": scene["duration"],
+            "style": scene["style"],
+            "resolution": scene.get("resolution", "1920x1080"),
+            "fps": scene.get("fps", 30)
+        }
+        payload = json.dumps(params, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, scene: Dict) -> Optional[Dict]:
+        """场景的最后一条有效记录，没有或已失败时返回 None"""
+
+        with self._lock:
+            entry = self._entries.get(self.make_key(scene))
+        if entry is None or entry["state"] == "failed":
+            return None
+        return dict(entry)
+
+    def record(self, scene: Dict, state: str, **fields):
+        """追加一条状态记录并落盘"""
+
+        if state not in self.STATES:
+            raise ValueError(f"未知的任务状态: {state}")
+
+        key = self.make_key(scene)
+        with self._lock:
+            # 新提交的任务不沿用旧记录的地址和路径
+            entry = {} if state in ("submitted", "failed") else dict(self._entries.get(key) or {})
+            entry.update(fields, key=key, scene=scene["id"], state=state, time=time.time())
+            self._entries[key] = entry
+            # 每次追加后关闭文件，批量模式下大量文档的日志不会占用文件句柄
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _replay(self) -> Dict[str, Dict]:
+        """读取已有日志，每个场景保留最后一条记录"""
+
+        entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 崩溃时写了一半的最后一行
+                        continue
+                    if isinstance(entry, dict) and entry.get("key") and entry.get("state") in self.STATES:
+                        entries[entry["key"]] = entry
+        except FileNotFoundError:
+            return entries
+        except OSError as e:
+            self.logger.warning(f"Kling任务日志无法读取，已忽略: {str(e)}")
+            return entries
+
+        active = sum(1 for entry in entries.values() if entry["state"] != "failed")
+        if active:
+            self.logger.info(f"读取Kling任务日志: {active} 个场景可续用 {self.path}")
+        return entries
+
+    def _compact(self):
+        """把日志重写为每个有效场景一条记录"""
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for entry in self._entries.values():
+                if entry["state"] != "failed":
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
@@ -0,0 +1,309 @@
+# =============================================================================
+# modules/kling_tracker.py - Kling任务追踪模块
+# =============================================================================
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, Executor
+from typing import Dict, Optional, Tuple
+from config.config import Config
+from modules.http_client import parse_retry_after
+
+
+class _KlingJob:
+    """单个已提交的Kling任务"""
+
+    __slots__ = ("scene", "output_dir", "video_id", "future", "submitted_at", "deadline", "interval",
+                 "next_poll")
+
+    def __init__(self, scene: Dict, output_dir: str, video_id: str, future: Future, now: float):
+        self.scene = scene
+        self.output_dir = output_dir
+        self.video_id = video_id
+        self.future = future
+        self.submitted_at = now
+        self.deadline = now + Config.KLING_JOB_TIMEOUT
+        self.interval = Config.KLING_POLL_INITIAL_INTERVAL
+        self.next_poll = now + self.interval
+
+
+class KlingJobTracker:
+    """
+    Kling任务追踪器
+
+    所有任务先集中提交，然后由一个轮询线程统一查询所有未完成任务的状态。
+    每个任务有独立的轮询间隔：开始时较短，随等待时间按倍数增长；
+    状态接口返回 Retry-After 时，整体暂停查询直到指定时间。
+    任务完成后立即把下载提交到执行器，失败或超时则降级为模拟视频。
+    启用任务日志时，每个任务的提交、完成、下载都记入输出目录的日志，
+    重新运行时已提交的任务直接接着轮询或下载，不再重复提交。
+    """
+
+    def __init__(self, generator, executor: Executor, max_outstanding: Optional[int] = None):
+        self.generator = generator
+        self.logger = generator.logger
+        self.metrics = generator.metrics
+        self.executor = executor
+        self.max_outstanding = max_outstanding or Config.KLING_MAX_OUTSTANDING
+
+        self._lock = threading.Condition()
+        self._pending = deque()   # 等待提交的 (scene, output_dir, future)
+        self._submitting = 0      # 正在提交中的任务数
+        self._jobs = []           # 按下次查询时间排序的堆
+        self._counter = itertools.count()
+        self._not_before = 0.0    # Retry-After 指定的最早查询时间
+        self._closed = False
+        self._thread = None
+
+    def submit(self, scene: Dict, output_dir: str) -> Future:
+        """登记一个场景，返回最终结果字典的Future"""
+
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("任务追踪器已关闭")
+            self._pending.append((scene, output_dir, future))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="kling_poller", daemon=True)
+                self._thread.start()
+            self._lock.notify()
+        return future
+
+    def close(self):
+        """不再接受新任务，并等待所有任务结束"""
+
+        with self._lock:
+            self._closed = True
+            self._lock.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _outstanding(self) -> int:
+        return len(self._jobs) + self._submitting
+
+    def _run(self):
+        """轮询主循环"""
+
+        while True:
+            with self._lock:
+                # 在未完成任务数上限内提交新任务
+                while self._pending and self._outstanding() < self.max_outstanding:
+                    scene, output_dir, future = self._pending.popleft()
+                    self._submitting += 1
+                    self.executor.submit(self._submit_job, scene, output_dir, future)
+
+                if not self._jobs:
+                    if self._closed and not self._pending and not self._submitting:
+                        return
+                    self._lock.wait()
+                    continue
+
+                now = time.time()
+                wake_at = max(self._jobs[0][0], self._not_before)
+                if wake_at > now:
+                    self._lock.wait(timeout=wake_at - now)
+                    continue
+
+                _, _, job = heapq.heappop(self._jobs)
+
+            self._poll(job)
+
+    def _submit_job(self, scene: Dict, output_dir: str, future: Future):
+        """
+        提交任务（在执行器线程中运行）
+
+        提交计数在本方法返回时才减少：续用任务按上次记录的地址下载失败、
+        重新排队查询时，轮询线程不会因为没有待处理任务而提前退出。
+        出错时把异常交给 future，不会让调用方一直等待。
+        """
+
+        job = None
+        try:
+            job = self._start_job(scene, output_dir, future)
+        except Exception as e:
+            self.logger.error("场景 %s 提交Kling任务失败: %s", scene.get('id', 'unknown'), e)
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            with self._lock:
+                self._submitting -= 1
+                if job is not None:
+                    self._schedule(job)
+                else:
+                    self._lock.notify()
+
+    def _start_job(self, scene: Dict, output_dir: str, future: Future) -> Optional[_KlingJob]:
+        """日志中已有记录的任务直接续用，否则提交新任务；返回需要轮询的任务"""
+
+        journal = self.generator._get_journal(output_dir)
+        entry = journal.lookup(scene) if journal is not None else None
+        if entry is not None:
+            resumed, job = self._resume(entry, scene, output_dir, future)
+            if resumed:
+                return job
+
+        # 超出预算或截止时间的场景不再提交
+        if self.generator.scheduler.admit(scene, output_dir, "kling") != "kling":
+            self._generate_mock(scene, output_dir, future)
+            return None
+
+        try:
+            with self.metrics.span("kling_submit", scene=scene["id"], document=output_dir):
+                video_id = self.generator._submit_kling_job(scene)
+        except Exception as e:
+            self.generator.scheduler.refund(scene, output_dir)
+            self._fallback(scene, output_dir, future, f"Kling API生成视频失败: {str(e)}", "submit_error")
+            return None
+
+        self.logger.info("场景 %s 已提交Kling任务: %s", scene['id'], video_id)
+        self.metrics.increment("kling_seconds", self.generator.scheduler.duration_of(scene))
+        self._record(scene, output_dir, "submitted", video_id=video_id)
+        return _KlingJob(scene, output_dir, video_id, future, time.time())
+
+    def _resume(self, entry: Dict, scene: Dict, output_dir: str,
+                future: Future) -> Tuple[bool, Optional[_KlingJob]]:
+        """按日志记录续用上次运行的任务，返回 (是否已接管, 需要轮询的任务)"""
+
+        video_path = entry.get("video_path")
+        if entry["state"] == "downloaded" and video_path and os.path.exists(video_path):
+            self.logger.info("场景 %s 的Kling视频已在上次运行中下载: %s", scene['id'], video_path)
+            self.metrics.increment("journal_resumes", state="downloaded")
+            future.set_result({
+                "status": "success",
+                "video_path": video_path,
+                "video_id": entry.get("video_id"),
+                "generator": "kling"
+            })
+            return True, None
+
+        if not entry.get("video_id"):
+            return False, None
+
+        self.logger.info("场景 %s 续用上次提交的Kling任务: %s", scene['id'], entry['video_id'])
+        self.metrics.increment("journal_resumes", state=entry["state"])
+        job = _KlingJob(scene, output_dir, entry["video_id"], future, time.time())
+        if entry.get("video_url"):
+            # 上次已完成：直接下载，地址失效时重新查询状态获取新地址
+            self._download(job, entry["video_url"], requery=True)
+            return True, None
+        return True, job
+
+    def _schedule(self, job: _KlingJob):
+        """把任务放回轮询堆（调用方需持有锁）"""
+
+        heapq.heappush(self._jobs, (job.next_poll, next(self._counter), job))
+        self._lock.notify()
+
+    def _poll(self, job: _KlingJob):
+        """查询单个任务的状态"""
+
+        now = time.time()
+        result = None
+        try:
+            response = self.generator._query_kling_status(job.video_id)
+
+            if response.status_code in (429, 503):
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is None:
+                    retry_after = Config.KLING_POLL_MAX_INTERVAL
+                self.logger.warning("Kling状态接口限流，%.1f秒后重试", retry_after)
+                with self._lock:
+                    self._not_before = max(self._not_before, now + retry_after)
+                    job.next_poll = max(job.next_poll, self._not_before)
+                    self._schedule(job)
+                return
+
+            response.raise_for_status()
+            result = response.json()
+
+        except Exception as e:
+            self.logger.error("查询视频状态失败: %s", e)
+
+        if result is not None:
+            status = result.get("status")
+            if status == "completed":
+                # 从提交成功到查询到完成的等待时间
+                self.metrics.observe("kling_wait", now - job.submitted_at,
+                                     scene=job.scene["id"], document=job.output_dir)
+                self._record(job.scene, job.output_dir, "completed", video_url=result.get("video_url"))
+                self.executor.submit(self._download, job, result.get("video_url"))
+                return
+            elif status == "failed":
+                self._fallback(job.scene, job.output_dir, job.future,
+                               f"Kling API生成视频失败: 视频生成失败: {result.get('error', 'Unknown error')}",
+                               "job_failed")
+                return
+
+        if now >= job.deadline:
+            self._fallback(job.scene, job.output_dir, job.future, "Kling API生成视频失败: 视频生成超时", "timeout")
+            return
+
+        # 尚未完成或查询出错：按倍数延长该任务的轮询间隔
+        job.interval = min(job.interval * Config.KLING_POLL_BACKOFF, Config.KLING_POLL_MAX_INTERVAL)
+        job.next_poll = min(now + job.interval, job.deadline)
+        with self._lock:
+            self._schedule(job)
+
+    def _download(self, job: _KlingJob, video_url: str, requery: bool = False):
+        """下载已完成的视频（在执行器线程中运行）"""
+
+        try:
+            video_path = self.generator._download_video(video_url, job.scene["id"], job.output_dir)
+        except Exception as e:
+            if requery:
+                self.logger.warning("场景 %s 按上次记录的地址下载失败: %s，重新查询任务状态", job.scene['id'], e)
+                job.next_poll = time.time()
+                with self._lock:
+                    self._schedule(job)
+                return
+            self._fallback(job.scene, job.output_dir, job.future, f"Kling API生成视频失败: {str(e)}",
+                           "download_error")
+            return
+
+        self._record(job.scene, job.output_dir, "downloaded", video_path=video_path)
+        job.future.set_result({
+            "status": "success",
+            "video_path": video_path,
+            "video_id": job.video_id,
+            "generator": "kling"
+        })
+
+    def _record(self, scene: Dict, output_dir: str, state: str, **fields):
+        """写入任务日志；日志写入失败只影响续用，不影响本次生成"""
+
+        journal = self.generator._get_journal(output_dir)
+        if journal is None:
+            return
+        try:
+            journal.record(scene, state, **fields)
+        except OSError as e:
+            self.logger.warning("写入Kling任务日志失败: %s", e)
+
+    def _fallback(self, scene: Dict, output_dir: str, future: Future, message: str, reason: str):
+        """记录错误并降级为模拟视频"""
+
+        self.logger.error(message)
+        self.metrics.increment("fallbacks", stage="generate", backend="kling", reason=reason)
+        # 失败的任务从日志中清除，下次运行重新提交
+        self._record(scene, output_dir, "failed")
+        self._generate_mock(scene, output_dir, future)
+
+    def _generate_mock(self, scene: Dict, output_dir: str, future: Future):
+        """在执行器中生成模拟视频作为任务结果"""
+
+        def run():
+            try:
+                future.set_result(self.generator._generate_mock_video(scene, output_dir))
+            except Exception as e:
+                future.set_result({
+                    "status": "failed",
+                    "error": str(e),
+                    "video_path": None
+                })
+
+        self.executor.submit(run)
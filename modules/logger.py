@@ -4,30 +4,60 @@
 # modules/logger.py - 日志模块
 # =============================================================================
 
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 from datetime import datetime
 from config.config import Config
 
 
-def setup_logger(name="text_to_video"):
-    """设置日志器"""
+class JsonFormatter(logging.Formatter):
+    """JSON Lines 格式：每条日志一行JSON"""
 
-    # 创建日志目录
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
 
-    # 创建日志器
-    logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, Config.LOG_LEVEL))
 
-    # 如果已经有处理器，直接返回
-    if logger.handlers:
-        return logger
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    调用线程只合并消息参数（参数对象之后可能被修改），
+    时间、格式和异常堆栈的格式化都留给后台线程
+    """
 
-    # 创建文件处理器
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_setup_lock = threading.Lock()
+
+
+def _build_handlers(log_dir):
+    """创建实际写出日志的文件处理器和控制台处理器"""
+
+    # 创建文件处理器，超过大小上限时轮转
     log_file = os.path.join(log_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=Config.LOG_MAX_BYTES, backupCount=Config.LOG_BACKUP_COUNT, encoding='utf-8'
+    )
     file_handler.setLevel(logging.DEBUG)
 
     # 创建控制台处理器
@@ -36,12 +66,46 @@ def setup_logger(name="text_to_video"):
 
     # 设置格式
     formatter = logging.Formatter(Config.LOG_FORMAT)
-    file_handler.setFormatter(formatter)
+    file_handler.setFormatter(JsonFormatter() if Config.LOG_JSON else formatter)
     console_handler.setFormatter(formatter)
 
-    # 添加处理器到日志器
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    return [file_handler, console_handler]
+
+
+def setup_logger(name="text_to_video"):
+    """
+    设置日志器
+
+    队列模式下日志器只挂一个 QueueHandler：调用线程只把日志记录放入内存队列，
+    格式化和磁盘、终端写入都由单个后台线程完成，并发的场景任务不会阻塞在日志I/O上。
+    进程退出时后台线程写完队列中剩余的日志。
+    """
+
+    # 创建日志目录
+    log_dir = "logs"
+    os.makedirs(log_dir, exist_ok=True)
+
+    # 创建日志器
+    logger = logging.getLogger(name)
+    logger.setLevel(getattr(logging, Config.LOG_LEVEL))
+
+    with _setup_lock:
+        # 如果已经有处理器，直接返回
+        if logger.handlers:
+            return logger
+
+        handlers = _build_handlers(log_dir)
+
+        if Config.LOG_QUEUED:
+            log_queue = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            listener.start()
+            atexit.register(listener.stop)
+            logger.addHandler(_QueueHandler(log_queue))
+        else:
+            # 添加处理器到日志器
+            for handler in handlers:
+                logger.addHandler(handler)
 
     return logger
 
@@ -0,0 +1,215 @@
+# =============================================================================
+# modules/manim_renderer.py - Manim本地渲染模块
+# =============================================================================
+
+import importlib.util
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from typing import Dict, Optional
+from config.config import Config
+from modules.logger import setup_logger
+
+
+# 生成的脚本中场景类的名称
+SCENE_CLASS = "TechnicalScene"
+
+# 渲染质量：preview 为低分辨率快速预览，full 使用场景的分辨率和帧率
+QUALITY_PRESETS = {
+    "preview": {"pixel_width": 854, "pixel_height": 480, "frame_rate": 15},
+    "full": None
+}
+
+SCRIPT_TEMPLATE = '''from manim import *
+
+
+class {scene_class}(Scene):
+    def construct(self):
+        title = Text({title!r}, font={font!r}, font_size=36)
+        title.to_edge(UP)
+        self.play(Write(title), run_time=1)
+
+        steps = VGroup(*[
+            Text(step, font={font!r}, font_size=28) for step in {steps!r}
+        ]).arrange(DOWN, buff=0.6).next_to(title, DOWN, buff=0.8)
+        boxes = VGroup(*[SurroundingRectangle(step, buff=0.15, color=BLUE) for step in steps])
+
+        for i, (step, box) in enumerate(zip(steps, boxes)):
+            if i > 0:
+                arrow = Arrow(boxes[i - 1].get_bottom(), box.get_top(), buff=0.05)
+                self.play(GrowArrow(arrow), run_time={arrow_time})
+            self.play(FadeIn(step, shift=UP * 0.3), Create(box), run_time={step_time})
+
+        self.wait({wait_time})
+'''
+
+
+def build_scene_script(scene: Dict, max_steps: int = 4) -> str:
+    """
+    把技术性场景的提示词转换为Manim场景脚本
+
+    提示词按逗号、分号等切分为若干步骤，依次以流程图的形式出现，
+    动画总时长与场景时长一致。
+    """
+
+    prompt = scene["prompt"].strip()
+    steps = [part.strip() for part in re.split(r'[，,；;、：:]', prompt) if part.strip()]
+    steps = steps[:max_steps] or [prompt]
+
+    duration = float(scene.get("duration", Config.DEFAULT_VIDEO_PARAMS["duration"]))
+    step_time = 0.8
+    arrow_time = 0.4
+    elapsed = 1 + len(steps) * step_time + (len(steps) - 1) * arrow_time
+    title = prompt if len(prompt) <= 20 else prompt[:19] + "…"
+
+    return SCRIPT_TEMPLATE.format(
+        scene_class=SCENE_CLASS,
+        title=title,
+        steps=steps,
+        font=Config.MANIM_FONT,
+        step_time=step_time,
+        arrow_time=arrow_time,
+        wait_time=round(max(0.5, duration - elapsed), 2)
+    )
+
+
+# 项目根目录，渲染子进程在此目录下以模块方式启动
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def render_script(script: str, output_path: str, options: Dict, work_dir: str) -> str:
+    """
+    在当前进程中渲染Manim脚本并把视频移动到 output_path（在渲染子进程中运行）
+
+    媒体文件写入 work_dir，完成后原子替换目标文件；work_dir 由调用方清理。
+    """
+
+    import manim
+
+    namespace = {"__name__": "manim_scene"}
+    exec(compile(script, "<manim_scene>", "exec"), namespace)
+
+    render_config = dict(options, media_dir=work_dir, output_file="scene",
+                         disable_caching=True, progress_bar="none", verbosity="WARNING")
+    with manim.tempconfig(render_config):
+        scene = namespace[SCENE_CLASS]()
+        scene.render()
+        movie_path = str(scene.renderer.file_writer.movie_file_path)
+
+    tmp_path = os.path.join(work_dir, "scene.tmp")
+    shutil.move(movie_path, tmp_path)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def main():
+    """渲染子进程入口：从标准输入读取渲染请求"""
+
+    request = json.load(sys.stdin)
+    render_script(request["script"], request["output_path"], request["options"], request["work_dir"])
+
+
+class ManimRenderer:
+    """
+    Manim渲染器
+
+    渲染是CPU密集的工作，每个场景在独立的子进程中进行，
+    同时运行的子进程数不超过CPU核数。渲染超时的子进程连同其进程组被杀死，
+    不会继续占用渲染名额。
+    """
+
+    def __init__(self, processes: Optional[int] = None, quality: Optional[str] = None):
+        self.logger = setup_logger()
+        self.processes = processes or Config.MANIM_RENDER_PROCESSES or os.cpu_count() or 1
+        self.quality = quality or Config.MANIM_QUALITY
+        if self.quality not in QUALITY_PRESETS:
+            raise ValueError(f"不支持的Manim渲染质量: {self.quality}")
+
+        self._slots = threading.BoundedSemaphore(self.processes)
+
+    @staticmethod
+    def available() -> bool:
+        """是否安装了Manim"""
+        return importlib.util.find_spec("manim") is not None
+
+    def build_script(self, scene: Dict) -> str:
+        return build_scene_script(scene)
+
+    def render_options(self, scene: Dict) -> Dict:
+        """场景在当前渲染质量下的分辨率与帧率"""
+
+        preset = QUALITY_PRESETS[self.quality]
+        if preset is not None:
+            return dict(preset)
+
+        resolution = scene.get("resolution", Config.DEFAULT_VIDEO_PARAMS["resolution"])
+        width, height = (int(value) for value in resolution.lower().split("x"))
+        return {
+            "pixel_width": width,
+            "pixel_height": height,
+            "frame_rate": scene.get("fps", Config.DEFAULT_VIDEO_PARAMS["fps"])
+        }
+
+    def render(self, scene: Dict, output_path: str, script: Optional[str] = None) -> str:
+        """在渲染子进程中渲染场景，阻塞直到视频写入 output_path"""
+
+        if not self.available():
+            raise RuntimeError("未安装manim，无法渲染技术视频")
+
+        request = {
+            "script": script or self.build_script(scene),
+            "output_path": os.path.abspath(output_path),
+            "options": self.render_options(scene)
+        }
+        with self._slots:
+            self._run(request)
+        return output_path
+
+    def close(self):
+        """渲染子进程随每次渲染结束，没有需要释放的资源"""
+
+    def _run(self, request: Dict):
+        """启动渲染子进程并等待结束，超时则杀死整个进程组"""
+
+        work_dir = tempfile.mkdtemp(prefix="manim_")
+        request = dict(request, work_dir=work_dir)
+        try:
+            # 新会话使子进程及其派生的 ffmpeg 等进程同属一个进程组，超时时一并杀死
+            process = subprocess.Popen(
+                [sys.executable, "-m", __name__], cwd=PROJECT_ROOT, text=True,
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                start_new_session=True
+            )
+            try:
+                _, stderr = process.communicate(json.dumps(request), timeout=Config.MANIM_RENDER_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self._kill(process)
+                process.communicate()
+                self.logger.warning(f"Manim渲染超时（{Config.MANIM_RENDER_TIMEOUT}秒），已终止渲染进程")
+                raise TimeoutError(f"Manim渲染超时: {request['output_path']}")
+
+            if process.returncode != 0:
+                detail = stderr.strip().splitlines()[-1] if stderr.strip() else f"退出码 {process.returncode}"
+                raise RuntimeError(f"Manim渲染失败: {detail}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def _kill(process: subprocess.Popen):
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+                return
+            except ProcessLookupError:
+                pass
+        process.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# =============================================================================
+# modules/metrics.py - 运行指标模块
+# =============================================================================
+
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from config.config import Config
+
+
+def _label_key(labels: Dict) -> Tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """最近秩法分位数（ordered 已排序）"""
+
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class Metrics:
+    """
+    运行指标收集器
+
+    - 耗时区间（span）：按名称和低基数标签（阶段、后端等）汇总为直方图；
+      带 scene/document 的区间另外记录为逐场景事件，用于逐场景分析
+    - 计数器：缓存命中、重试、降级等
+
+    线程安全，导出为JSON运行报告和Prometheus文本格式。
+    """
+
+    def __init__(self, buckets: Optional[List[float]] = None, max_events: Optional[int] = None):
+        self.buckets = sorted(buckets or Config.METRICS_BUCKETS)
+        self.max_events = Config.METRICS_MAX_EVENTS if max_events is None else max_events
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._durations = {}
+            self._counters = {}
+            self._events = []
+            self._dropped_events = 0
+
+    @contextmanager
+    def span(self, name: str, scene: Optional[str] = None, document: Optional[str] = None,
+             **labels) -> Iterator[None]:
+        """记录 with 块的耗时（异常时同样记录，并带上 error 标签）"""
+
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            labels["error"] = "true"
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, scene=scene, document=document, **labels)
+
+    def observe(self, name: str, seconds: float, scene: Optional[str] = None,
+                document: Optional[str] = None, **labels):
+        """记录一段在别处测得的耗时（如从提交到生成完成的轮询等待）"""
+
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._durations.setdefault(key, []).append(seconds)
+            if scene is not None:
+                if len(self._events) < self.max_events:
+                    self._events.append({
+                        "span": name,
+                        "scene": scene,
+                        "document": document,
+                        "seconds": round(seconds, 6),
+                        "labels": dict(key[1])
+                    })
+                else:
+                    self._dropped_events += 1
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """计数器加 value"""
+
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> Dict:
+        """当前指标的JSON结构"""
+
+        with self._lock:
+            durations = {key: sorted(values) for key, values in self._durations.items()}
+            counters = dict(self._counters)
+            events = list(self._events)
+            dropped = self._dropped_events
+            started = self.started
+
+        histograms = []
+        for (name, labels), values in sorted(durations.items()):
+            histograms.append({
+                "name": name,
+                "labels": dict(labels),
+                "count": len(values),
+                "sum": round(sum(values), 6),
+                "min": round(values[0], 6),
+                "max": round(values[-1], 6),
+                "p50": round(_percentile(values, 50), 6),
+                "p90": round(_percentile(values, 90), 6),
+                "p99": round(_percentile(values, 99), 6),
+                "buckets": self._bucket_counts(values)
+            })
+
+        scenes = {}
+        for event in events:
+            scene_key = f"{event['document']}/{event['scene']}" if event["document"] else event["scene"]
+            scenes.setdefault(scene_key, []).append(
+                {key: event[key] for key in ("span", "seconds", "labels")}
+            )
+
+        return {
+            "started": started,
+            "elapsed": round(time.time() - started, 3),
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "histograms": histograms,
+            "scenes": scenes,
+            "dropped_events": dropped
+        }
+
+    def write_report(self, path: str):
+        """写出JSON运行报告"""
+
+        self._write(path, json.dumps(self.snapshot(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path: str):
+        """写出Prometheus文本格式（可供 node_exporter textfile collector 采集）"""
+
+        self._write(path, self.to_prometheus())
+
+    def to_prometheus(self) -> str:
+        prefix = Config.METRICS_PREFIX
+        snapshot = self.snapshot()
+        lines = []
+
+        families = {}
+        for counter in snapshot["counters"]:
+            families.setdefault(counter["name"], []).append(counter)
+        for name, counters in families.items():
+            metric = f"{prefix}_{self._metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for counter in counters:
+                lines.append(f"{metric}{self._format_labels(counter['labels'])} {counter['value']}")
+
+        families = {}
+        for histogram in snapshot["histograms"]:
+            families.setdefault(histogram["name"], []).append(histogram)
+        for name, histograms in families.items():
+            metric = f"{prefix}_{self._metric_name(name)}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for histogram in histograms:
+                for bound, count in histogram["buckets"]:
+                    labels = dict(histogram["labels"], le=bound)
+                    lines.append(f"{metric}_bucket{self._format_labels(labels)} {count}")
+                labels = self._format_labels(histogram["labels"])
+                lines.append(f"{metric}_sum{labels} {histogram['sum']}")
+                lines.append(f"{metric}_count{labels} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def _bucket_counts(self, ordered: List[float]) -> List[Tuple[str, int]]:
+        """累计直方图桶计数（含 +Inf）"""
+
+        counts = [(self._format_bound(bound), bisect_right(ordered, bound)) for bound in self.buckets]
+        counts.append(("+Inf", len(ordered)))
+        return counts
+
+    @staticmethod
+    def _format_bound(bound: float) -> str:
+        return str(int(bound)) if float(bound).is_integer() else str(bound)
+
+    @staticmethod
+    def _metric_name(name: str) -> str:
+        return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+    @staticmethod
+    def _format_labels(labels: Dict) -> str:
+        if not labels:
+            return ""
+        pairs = []
+        for key, value in sorted(labels.items()):
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            pairs.append(f'{key}="{value}"')
+        return "{" + ",".join(pairs) + "}"
+
+    @staticmethod
+    def _write(path: str, content: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_file, path)
+
+
+_shared_metrics = None
+_shared_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """获取进程内共享的指标收集器"""
+
+    global _shared_metrics
+    with _shared_lock:
+        if _shared_metrics is None:
+            _shared_metrics = Metrics()
+        return _shared_metrics
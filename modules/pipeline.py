@@ -0,0 +1,240 @@
+# =============================================================================
+# modules/pipeline.py - 文档处理流程模块
+# =============================================================================
+
+import json
+import os
+import queue
+import threading
+from typing import Callable, List, TextIO
+from config.config import Config
+from modules.incremental import IncrementalBuilder
+from modules.metrics import get_metrics
+from modules.scene_record import SceneRecord
+from modules.scene_store import SceneStore
+from modules.sentence_index import SentenceIndex
+from modules.text_analyzer import TextAnalyzer
+from modules.video_generator import PendingResults, VideoGenerator
+from modules.video_inserter import VideoInserter
+
+
+def _open_scene_store(output_dir: str) -> SceneStore:
+    """创建本次运行的JSONL场景存储（覆盖上次运行的内容）"""
+    return SceneStore(os.path.join(output_dir, Config.SCENES_FILE), truncate=True)
+
+
+def _save_scenes(scenes: List[SceneRecord], output_dir: str):
+    """保存场景信息"""
+
+    with _open_scene_store(output_dir) as store:
+        store.extend(scenes)
+    _export_scenes_json(scenes, output_dir)
+
+
+def _export_scenes_json(scenes: List[SceneRecord], output_dir: str):
+    """按配置导出旧格式的 scenes.json"""
+
+    if not Config.SCENES_JSON_EXPORT:
+        return
+
+    scenes_file = os.path.join(output_dir, 'scenes.json')
+    with open(scenes_file, 'w', encoding='utf-8') as f:
+        json.dump([dict(scene) for scene in scenes], f, ensure_ascii=False, indent=2)
+
+
+def _result_file(output_dir: str, output_format: str) -> str:
+    """最终结果文件路径"""
+
+    output_ext = 'html' if output_format == 'html' else 'md'
+    return os.path.join(output_dir, f'result.{output_ext}')
+
+
+def _write_result(output_file: str, input_text: str, write: Callable[[TextIO], int], logger):
+    """
+    流式写出结果文件
+
+    内容先逐段写入 .part 临时文件，完成后原子替换为结果文件；
+    写入过程中出错时改为写出原文，与 insert_videos 的降级方式一致。
+    """
+
+    part_file = f"{output_file}.part"
+    with open(part_file, 'w', encoding='utf-8') as f:
+        try:
+            write(f)
+        except Exception as e:
+            logger.error(f"视频插入失败: {str(e)}")
+            f.seek(0)
+            f.truncate()
+            f.write(input_text)
+
+    os.replace(part_file, output_file)
+
+
+def run_staged(input_text: str, output_dir: str, output_format: str,
+               text_analyzer: TextAnalyzer, video_generator: VideoGenerator,
+               video_inserter: VideoInserter, logger) -> str:
+    """分步处理：提取全部场景后生成全部视频，最后插入视频"""
+
+    # 步骤1: 分析文本，提取场景
+    logger.info("步骤1: 分析文本，提取场景")
+    metrics = get_metrics()
+    with metrics.span("stage", stage="extract"):
+        index = SentenceIndex(input_text)
+        scenes = text_analyzer.extract_scenes(input_text, index)
+    logger.info(f"提取到 {len(scenes)} 个场景")
+
+    # 保存场景信息
+    _save_scenes(scenes, output_dir)
+
+    # 步骤2: 生成视频
+    logger.info("步骤2: 生成视频")
+    with metrics.span("stage", stage="generate"):
+        video_results = video_generator.generate_videos(scenes, output_dir)
+
+    # 步骤3: 插入视频到原文
+    logger.info("步骤3: 插入视频到原文")
+    output_file = _result_file(output_dir, output_format)
+    with metrics.span("stage", stage="insert"):
+        _write_result(output_file, input_text, lambda f: video_inserter.write_videos(
+            f, input_text, scenes, video_results, output_format, index
+        ), logger)
+
+    # 保存运行清单，供下次增量构建
+    IncrementalBuilder(text_analyzer, video_generator).save_manifest(
+        output_dir, input_text, scenes, video_results, index
+    )
+    return output_file
+
+
+def run_incremental(input_text: str, output_dir: str, output_format: str,
+                    text_analyzer: TextAnalyzer, video_generator: VideoGenerator,
+                    video_inserter: VideoInserter, logger) -> str:
+    """增量处理：只为上次运行后改动过的句子重新提取场景、生成视频"""
+
+    logger.info("增量模式: 对比上次运行结果")
+    metrics = get_metrics()
+    index = SentenceIndex(input_text)
+    builder = IncrementalBuilder(text_analyzer, video_generator)
+    with metrics.span("stage", stage="incremental_build"):
+        scenes, video_results = builder.build(input_text, output_dir, index)
+    _save_scenes(scenes, output_dir)
+
+    output_file = _result_file(output_dir, output_format)
+    with metrics.span("stage", stage="insert"):
+        _write_result(output_file, input_text, lambda f: video_inserter.write_videos(
+            f, input_text, scenes, video_results, output_format, index
+        ), logger)
+
+    builder.save_manifest(output_dir, input_text, scenes, video_results, index)
+    return output_file
+
+
+def run_pipeline(input_text: str, output_dir: str, output_format: str,
+                 text_analyzer: TextAnalyzer, video_generator: VideoGenerator,
+                 video_inserter: VideoInserter, logger) -> str:
+    """
+    流水线处理：场景一经提取即开始生成视频并写入场景存储，结果文件按视频就绪顺序逐段写出
+
+    场景文件与结果文件的内容与分步处理完全相同。
+    """
+
+    metrics = get_metrics()
+    index = SentenceIndex(input_text)
+    scene_queue = queue.Queue(maxsize=Config.PIPELINE_QUEUE_SIZE)
+    producer_errors = []
+    # 消费方出错退出后不再读取队列，提取线程据此停止，不会阻塞在已满的队列上
+    cancelled = threading.Event()
+
+    def put(item) -> bool:
+        while not cancelled.is_set():
+            try:
+                scene_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            # 提取阶段含被反压阻塞的时间
+            with metrics.span("stage", stage="extract"):
+                for scene in text_analyzer.iter_scenes(input_text, index):
+                    if not put(scene):
+                        return
+        except Exception as e:
+            producer_errors.append(e)
+        finally:
+            put(None)
+
+    logger.info("流水线模式: 提取场景的同时生成视频")
+    producer = threading.Thread(target=produce, name="scene_producer", daemon=True)
+    producer.start()
+
+    scenes = []
+    futures = {}
+    try:
+        with _open_scene_store(output_dir) as store:
+            while True:
+                scene = scene_queue.get()
+                if scene is None:
+                    break
+                scenes.append(scene)
+                store.append(scene)
+                # 未完成的场景过多时 submit_scene 会阻塞，队列随之填满，提取方暂停
+                futures[scene.get('id', 'unknown')] = video_generator.submit_scene(scene, output_dir)
+    finally:
+        cancelled.set()
+
+    producer.join()
+    if producer_errors:
+        raise producer_errors[0]
+
+    logger.info(f"提取到 {len(scenes)} 个场景")
+    _export_scenes_json(scenes, output_dir)
+
+    # 按文档顺序逐段写出，每段在对应视频就绪后写入
+    logger.info("插入视频到原文")
+    output_file = _result_file(output_dir, output_format)
+    video_results = PendingResults(futures)
+    with metrics.span("stage", stage="insert"):
+        _write_result(output_file, input_text, lambda f: video_inserter.write_videos(
+            f, input_text, scenes, video_results, output_format, index, flush=True
+        ), logger)
+
+    IncrementalBuilder(text_analyzer, video_generator).save_manifest(
+        output_dir, input_text, scenes, video_results, index
+    )
+    return output_file
+
+
+# 处理模式 -> 处理函数
+MODES = {
+    "staged": run_staged,
+    "pipeline": run_pipeline,
+    "incremental": run_incremental
+}
+
+
+def process_document(input_text: str, output_dir: str, output_format: str, mode: str,
+                     text_analyzer: TextAnalyzer, video_generator: VideoGenerator,
+                     video_inserter: VideoInserter, logger) -> str:
+    """
+    按指定模式处理一篇文档
+
+    Args:
+        input_text: 输入文本
+        output_dir: 输出目录
+        output_format: 输出格式 (html/markdown)
+        mode: 处理模式 (staged/pipeline/incremental)
+
+    Returns:
+        最终结果文件路径
+    """
+
+    if mode not in MODES:
+        raise ValueError(f"不支持的处理模式: {mode}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    with get_metrics().span("document", mode=mode), video_generator.document(output_dir):
+        return MODES[mode](input_text, output_dir, output_format,
+                           text_analyzer, video_generator, video_inserter, logger)
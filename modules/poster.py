@@ -0,0 +1,105 @@
+# =============================================================================
+# modules/poster.py - 视频封面提取模块
+# =============================================================================
+
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional
+from config.config import Config
+from modules.logger import setup_logger
+
+
+def poster_path_for(video_path: str) -> str:
+    """视频对应的封面图片路径"""
+    return os.path.splitext(video_path)[0] + ".jpg"
+
+
+def probe_video(video_path: str) -> Dict:
+    """用 ffprobe 读取视频的宽、高与时长"""
+
+    output = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=width,height:format=duration", "-of", "json", video_path],
+        capture_output=True, text=True, check=True, timeout=Config.POSTER_TIMEOUT
+    ).stdout
+    info = json.loads(output)
+    streams = info.get("streams") or [{}]
+    return {
+        "width": streams[0].get("width"),
+        "height": streams[0].get("height"),
+        "duration": float(info.get("format", {}).get("duration") or 0)
+    }
+
+
+def extract_poster(video_path: str, poster_path: str, max_width: int) -> Dict:
+    """
+    从视频中截取一帧作为封面（在封面进程中运行）
+
+    截取第1秒（短视频取中点）的画面，缩放到不超过 max_width 的宽度，
+    写入临时文件后原子替换。返回封面路径和视频的原始宽高。
+    """
+
+    info = probe_video(video_path)
+    seek = min(1.0, info["duration"] / 2) if info["duration"] else 0
+
+    tmp_path = f"{poster_path}.tmp.jpg"
+    try:
+        subprocess.run(
+            ["ffmpeg", "-v", "error", "-y", "-ss", f"{seek:.3f}", "-i", video_path, "-frames:v", "1",
+             "-vf", f"scale='min({max_width},iw)':-2", "-q:v", "4", tmp_path],
+            capture_output=True, check=True, timeout=Config.POSTER_TIMEOUT
+        )
+        os.replace(tmp_path, poster_path)
+    finally:
+        # ffmpeg 失败或超时时删除写了一半的临时文件
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {"poster": poster_path, "width": info["width"], "height": info["height"]}
+
+
+class PosterExtractor:
+    """
+    视频封面提取器
+
+    视频生成或下载完成后，在进程池中用 ffmpeg 截取封面并读取视频宽高，
+    供输出页面使用 poster 与固定宽高的懒加载视频。未安装 ffmpeg 时不提取封面。
+    """
+
+    def __init__(self, processes: Optional[int] = None, max_width: Optional[int] = None):
+        self.logger = setup_logger()
+        self.processes = processes or Config.POSTER_PROCESSES or os.cpu_count() or 1
+        self.max_width = max_width or Config.POSTER_MAX_WIDTH
+
+        self._lock = threading.Lock()
+        self._pool = None
+
+    @staticmethod
+    def available() -> bool:
+        """是否安装了 ffmpeg 与 ffprobe"""
+        return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+    def submit(self, video_path: str) -> Future:
+        """提交封面提取，返回 {"poster", "width", "height"} 的Future"""
+
+        return self._get_pool().submit(extract_poster, video_path, poster_path_for(video_path),
+                                       self.max_width)
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # 调用方是多线程的，使用 spawn 避免 fork 时复制其他线程持有的锁
+                self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
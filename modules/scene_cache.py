@@ -0,0 +1,131 @@
+# =============================================================================
+# modules/scene_cache.py - 场景提取缓存模块
+# =============================================================================
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import List, Dict, Mapping, Optional
+from config.config import Config
+from modules.logger import setup_logger
+
+
+class SceneCache:
+    """
+    场景提取结果的持久化缓存
+
+    缓存键由（规范化文本哈希、系统提示词哈希、模型、温度）组成，
+    每个条目保存为一个JSON文件。普通条目超过最大存活时间未被使用即删除，
+    数量超限时按最近使用时间淘汰；固定（pinned）的条目不会被淘汰，
+    保证重复运行得到相同的场景。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None,
+                 max_age: Optional[float] = None):
+        self.logger = setup_logger()
+        self.cache_dir = cache_dir or Config.SCENE_CACHE_DIR
+        self.max_entries = Config.SCENE_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_age = Config.SCENE_CACHE_MAX_AGE if max_age is None else max_age
+
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """规范化文本：统一Unicode形式并合并空白"""
+
+        text = unicodedata.normalize("NFC", text)
+        return re.sub(r'\s+', ' ', text).strip()
+
+    def make_key(self, text: str, system_prompt: str, model: str, temperature: float) -> str:
+        """计算缓存键"""
+
+        text_hash = hashlib.sha256(self.normalize_text(text).encode("utf-8")).hexdigest()
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        payload = json.dumps([text_hash, prompt_hash, model, temperature])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str, pinned: bool = False) -> str:
+        suffix = ".pinned.json" if pinned else ".json"
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """读取缓存的场景列表，未命中返回 None"""
+
+        for pinned in (True, False):
+            entry_path = self._entry_path(key, pinned)
+
+            try:
+                stat = os.stat(entry_path)
+            except FileNotFoundError:
+                continue
+
+            if not pinned and self.max_age and time.time() - stat.st_mtime > self.max_age:
+                self._remove(entry_path)
+                return None
+
+            try:
+                with open(entry_path, 'r', encoding='utf-8') as f:
+                    scenes = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning("场景缓存条目损坏，已忽略: %s", e)
+                self._remove(entry_path)
+                return None
+
+            if not pinned:
+                # 更新修改时间，作为最近使用时间
+                os.utime(entry_path)
+            return scenes
+
+        return None
+
+    def put(self, key: str, scenes: List[Mapping], pinned: bool = False):
+        """写入场景列表（字典或场景记录）"""
+
+        entry_path = self._entry_path(key, pinned)
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump([dict(scene) for scene in scenes], f, ensure_ascii=False)
+        os.replace(tmp_path, entry_path)
+
+        if pinned:
+            self._remove(self._entry_path(key))
+        else:
+            self.evict()
+
+    def evict(self):
+        """删除过期条目，并按最近使用时间淘汰超出数量上限的普通条目"""
+
+        with self._lock:
+            now = time.time()
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                # 固定条目不参与淘汰
+                if not name.endswith(".json") or name.endswith(".pinned.json"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    mtime = os.stat(path).st_mtime
+                except FileNotFoundError:
+                    continue
+                if self.max_age and now - mtime > self.max_age:
+                    self._remove(path)
+                    continue
+                entries.append((mtime, path))
+
+            if not self.max_entries or len(entries) <= self.max_entries:
+                return
+
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_entries]:
+                self._remove(path)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
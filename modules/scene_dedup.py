@@ -0,0 +1,145 @@
+# =============================================================================
+# modules/scene_dedup.py - 场景提示词近似去重模块
+# =============================================================================
+
+import hashlib
+import random
+import re
+import struct
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from config.config import Config
+
+
+class PromptDeduplicator:
+    """
+    基于 MinHash + LSH 的场景提示词近似去重索引
+
+    提示词规范化后切成字符 n-gram，计算 MinHash 签名并按 LSH 分带建立索引：
+    签名某一带完全相同的已登记提示词才作为候选，再用 n-gram 集合的
+    Jaccard 相似度精确确认，查询耗时与已登记的提示词数量基本无关。
+    只有生成参数（类型、时长、风格、分辨率、帧率）完全相同的场景才会互相匹配，
+    保证代表场景的视频可以原样用于所有相似场景。
+    """
+
+    # 去除标点、符号与空白，只保留文字本身参与比较
+    _STRIP_PATTERN = re.compile(r'[\W_]+', re.UNICODE)
+    _MERSENNE_PRIME = (1 << 61) - 1
+
+    def __init__(self, threshold: Optional[float] = None, shingle_size: Optional[int] = None,
+                 bands: Optional[int] = None, rows: Optional[int] = None,
+                 max_entries: Optional[int] = None, seed: int = 1):
+        self.threshold = Config.DEDUP_THRESHOLD if threshold is None else threshold
+        self.shingle_size = shingle_size or Config.DEDUP_SHINGLE_SIZE
+        self.bands = bands or Config.DEDUP_MINHASH_BANDS
+        self.rows = rows or Config.DEDUP_MINHASH_ROWS
+        self.max_entries = Config.DEDUP_MAX_ENTRIES if max_entries is None else max_entries
+
+        # 每个哈希函数为 (a * x + b) mod p
+        rng = random.Random(seed)
+        self._coefficients = [
+            (rng.randrange(1, self._MERSENNE_PRIME), rng.randrange(0, self._MERSENNE_PRIME))
+            for _ in range(self.bands * self.rows)
+        ]
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # 条目ID -> (参数, n-gram 集合, 分带键列表, 值)
+        self._buckets = {}              # 分带键 -> 条目ID集合
+        self._next_id = 0
+
+    @classmethod
+    def normalize(cls, prompt: str) -> str:
+        """规范化提示词：统一Unicode形式与大小写，去除标点和空白"""
+
+        prompt = unicodedata.normalize("NFKC", prompt).lower()
+        return cls._STRIP_PATTERN.sub("", prompt)
+
+    @staticmethod
+    def render_params(scene: Dict) -> Tuple:
+        """决定视频内容的生成参数，只有参数相同的场景才能共用视频"""
+
+        return (
+            scene.get("type", "narrative"),
+            scene.get("duration"),
+            scene.get("style"),
+            scene.get("resolution", "1920x1080"),
+            scene.get("fps", 30)
+        )
+
+    def shingles(self, prompt: str) -> FrozenSet[str]:
+        text = self.normalize(prompt)
+        if len(text) <= self.shingle_size:
+            return frozenset([text]) if text else frozenset()
+        return frozenset(text[i:i + self.shingle_size] for i in range(len(text) - self.shingle_size + 1))
+
+    def find(self, scene: Dict) -> Optional[Any]:
+        """返回与场景近似重复的已登记场景的值，没有时返回 None"""
+
+        _, shingles, band_keys = self._prepare(scene)
+        if not shingles:
+            return None
+
+        with self._lock:
+            candidates = set()
+            for band_key in band_keys:
+                candidates.update(self._buckets.get(band_key, ()))
+
+            best, best_similarity = None, self.threshold
+            for entry_id in candidates:
+                _, other, _, value = self._entries[entry_id]
+                similarity = len(shingles & other) / len(shingles | other)
+                if similarity >= best_similarity:
+                    best, best_similarity = value, similarity
+            return best
+
+    def add(self, scene: Dict, value: Any):
+        """登记一个代表场景，value 为之后 find 返回的值"""
+
+        params, shingles, band_keys = self._prepare(scene)
+        if not shingles:
+            return
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (params, shingles, band_keys, value)
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, set()).add(entry_id)
+
+            # 超出上限时淘汰最早登记的条目
+            while self.max_entries and len(self._entries) > self.max_entries:
+                old_id, (_, _, old_keys, _) = self._entries.popitem(last=False)
+                for band_key in old_keys:
+                    bucket = self._buckets.get(band_key)
+                    if bucket is not None:
+                        bucket.discard(old_id)
+                        if not bucket:
+                            del self._buckets[band_key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _prepare(self, scene: Dict) -> Tuple[Tuple, FrozenSet[str], List[Tuple]]:
+        """计算场景的生成参数、n-gram 集合与各带的索引键"""
+
+        params = self.render_params(scene)
+        shingles = self.shingles(scene.get("prompt", ""))
+        if not shingles:
+            return params, shingles, []
+
+        signature = self._minhash(shingles)
+        band_keys = [
+            (params, band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+        return params, shingles, band_keys
+
+    def _minhash(self, shingles: FrozenSet[str]) -> List[int]:
+        prime = self._MERSENNE_PRIME
+        values = [
+            struct.unpack("<Q", hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest())[0]
+            for shingle in shingles
+        ]
+        return [min((a * x + b) % prime for x in values) for a, b in self._coefficients]
@@ -0,0 +1,88 @@
+# =============================================================================
+# modules/scene_record.py - 场景记录模块
+# =============================================================================
+
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+
+_MISSING = object()
+
+
+class SceneRecord(MutableMapping):
+    """
+    紧凑的场景记录
+
+    已知字段存放在 __slots__ 中，不为每个场景创建字典，语料级运行中大量场景的
+    内存占用不到同等字典的一半。按映射的方式读写（scene["id"]、scene.get(...)），
+    未设置的字段视为不存在；未知字段放入附加字典，序列化结果与原字典相同。
+    """
+
+    # 字段顺序即序列化时的键顺序
+    FIELDS = ("id", "prompt", "position", "duration", "style", "type",
+              "resolution", "fps", "start", "end")
+
+    __slots__ = FIELDS + ("_extra",)
+
+    def __init__(self, data: Optional[Mapping] = None, **fields):
+        self._extra = None
+        if data is not None:
+            self.update(data)
+        if fields:
+            self.update(fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def copy(self) -> "SceneRecord":
+        return SceneRecord(self)
+
+    def replace(self, **changes) -> "SceneRecord":
+        """返回修改了部分字段的副本"""
+        return SceneRecord(self, **changes)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in self.FIELDS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        if key in self.FIELDS:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"SceneRecord({self.to_dict()!r})"
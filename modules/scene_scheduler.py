@@ -0,0 +1,158 @@
+# =============================================================================
+# modules/scene_scheduler.py - 场景调度模块
+# =============================================================================
+
+import threading
+import time
+from typing import Dict, List, Optional
+from config.config import Config
+from modules.logger import setup_logger
+from modules.metrics import get_metrics
+
+
+class _DocumentRun:
+    """单篇文档（输出目录）的调度状态"""
+
+    __slots__ = ("started_at", "kling_seconds", "charged")
+
+    def __init__(self, now: float):
+        self.started_at = now
+        self.kling_seconds = 0.0   # 已提交给Kling的视频总秒数
+        self.charged = {}          # 场景ID -> 已计入预算的秒数
+
+
+class SceneScheduler:
+    """
+    视频生成的场景调度器
+
+    按优先级排列待生成的场景：position 按场景在文档中的位置，尽快生成首屏的视频；
+    shortest 按估算的生成耗时从短到长，提高吞吐；fifo 保持提交顺序。
+    场景真正开始生成时由 admit 决定使用的后端：每篇文档提交给Kling的视频总秒数
+    不超过预算，超出预算或文档开始生成后超过截止时间的场景降级为模拟视频。
+    预算与截止时间按文档（输出目录）分别计算：start 开始一篇文档的生成，
+    finish 结束并释放其状态，同一目录再次生成时重新计算。
+    """
+
+    POLICIES = ("position", "shortest", "fifo")
+
+    # 降级后使用的后端
+    DOWNGRADE_BACKEND = "mock"
+
+    def __init__(self, policy: Optional[str] = None, kling_budget: Optional[float] = None,
+                 deadline: Optional[float] = None, estimates: Optional[Dict] = None):
+        self.logger = setup_logger()
+        self.metrics = get_metrics()
+        self.policy = policy or Config.SCHEDULE_POLICY
+        if self.policy not in self.POLICIES:
+            raise ValueError(f"不支持的调度策略: {self.policy}")
+        self.kling_budget = Config.SCHEDULE_KLING_BUDGET if kling_budget is None else kling_budget
+        self.deadline = Config.SCHEDULE_DEADLINE if deadline is None else deadline
+        self.estimates = dict(Config.SCHEDULE_ESTIMATES)
+        if estimates:
+            self.estimates.update(estimates)
+
+        self._lock = threading.Lock()
+        self._runs = {}   # 输出目录 -> _DocumentRun
+
+    def start(self, output_dir: str):
+        """开始一篇文档的生成：预算清零，截止时间从现在起计算"""
+
+        with self._lock:
+            self._runs[output_dir] = _DocumentRun(time.time())
+
+    def finish(self, output_dir: str):
+        """文档生成结束，释放其调度状态"""
+
+        with self._lock:
+            self._runs.pop(output_dir, None)
+
+    def position_of(self, scene: Dict) -> int:
+        """场景的句子位置；无法解析时按 0 处理"""
+
+        try:
+            return int(scene.get("position") or 0)
+        except (TypeError, ValueError):
+            self.logger.warning("场景 %s 的位置无效: %r，按 0 调度", scene.get("id"), scene.get("position"))
+            return 0
+
+    def duration_of(self, scene: Dict) -> float:
+        """场景的视频时长（秒）；缺失或无法解析时使用默认时长"""
+
+        default = float(Config.DEFAULT_VIDEO_PARAMS["duration"])
+        try:
+            duration = float(scene.get("duration") or default)
+        except (TypeError, ValueError):
+            self.logger.warning("场景 %s 的时长无效: %r，按 %s 秒计算", scene.get("id"), scene.get("duration"), default)
+            return default
+        return duration if duration > 0 else default
+
+    def estimate(self, scene: Dict, backend: str) -> float:
+        """估算场景在指定后端上的生成耗时（秒）"""
+
+        base, per_second = self.estimates.get(backend, self.estimates["mock"])
+        return base + per_second * self.duration_of(scene)
+
+    def order(self, scenes: List[Dict], backends: List[str]) -> List[int]:
+        """按调度策略返回场景的生成顺序（场景下标列表），优先级相同的保持原顺序"""
+
+        indices = list(range(len(scenes)))
+        if self.policy == "position":
+            positions = [self.position_of(scene) for scene in scenes]
+            indices.sort(key=lambda i: positions[i])
+        elif self.policy == "shortest":
+            keys = [(self.estimate(scene, backend), self.position_of(scene))
+                    for scene, backend in zip(scenes, backends)]
+            indices.sort(key=lambda i: keys[i])
+        return indices
+
+    def admit(self, scene: Dict, output_dir: str, backend: str) -> str:
+        """
+        场景开始生成时调用，返回实际使用的后端
+
+        Kling场景按时长计入文档的预算；同一场景重复调用不会重复计入。
+        """
+
+        if backend == self.DOWNGRADE_BACKEND:
+            return backend
+
+        scene_id = scene.get("id")
+        seconds = self.duration_of(scene)
+        with self._lock:
+            run = self._run(output_dir)
+            if backend == "kling" and scene_id in run.charged:
+                return backend
+
+            reason = None
+            if self.deadline and time.time() - run.started_at > self.deadline:
+                reason = "deadline"
+            elif backend == "kling" and self.kling_budget:
+                if run.kling_seconds + seconds > self.kling_budget:
+                    reason = "budget"
+                else:
+                    run.kling_seconds += seconds
+                    run.charged[scene_id] = seconds
+
+        if reason is None:
+            return backend
+
+        self.logger.warning("场景 %s 超出%s，由 %s 降级为模拟视频", scene_id,
+                            "截止时间" if reason == "deadline" else "Kling预算", backend)
+        self.metrics.increment("schedule_downgrades", backend=backend, reason=reason)
+        return self.DOWNGRADE_BACKEND
+
+    def refund(self, scene: Dict, output_dir: str):
+        """Kling任务提交失败，退回场景计入的预算"""
+
+        with self._lock:
+            run = self._runs.get(output_dir)
+            seconds = run.charged.pop(scene.get("id"), None) if run is not None else None
+            if seconds is not None:
+                run.kling_seconds -= seconds
+
+    def _run(self, output_dir: str) -> _DocumentRun:
+        """获取文档的调度状态，未经 start 开始的文档在首次使用时创建（调用方需持有锁）"""
+
+        run = self._runs.get(output_dir)
+        if run is None:
+            run = self._runs[output_dir] = _DocumentRun(time.time())
+        return run
@@ -0,0 +1,122 @@
+# =============================================================================
+# modules/scene_store.py - 场景存储模块
+# =============================================================================
+
+import json
+import os
+import threading
+from typing import Iterable, Iterator, Mapping, Optional
+from modules.scene_record import SceneRecord
+
+
+class SceneStore:
+    """
+    只追加的 JSONL 场景存储
+
+    每个场景一行JSON，场景产生时即可写入，无需先收集全部场景。
+    内存中只保存场景ID到行偏移的索引，按ID查询时定位读取单行，
+    不必加载整个文件。同一ID多次写入时以最后一次为准。
+    打开已有文件时扫描一遍重建索引，并截掉中断写入留下的不完整末行。
+    """
+
+    def __init__(self, path: str, truncate: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._offsets = {}   # 场景ID -> (行偏移, 行长度)，按首次写入顺序排列
+        self._size = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if truncate or not os.path.exists(path):
+            open(path, 'wb').close()
+        else:
+            self._load()
+
+        self._writer = open(path, 'ab')
+        self._reader = None
+
+    def append(self, scene: Mapping):
+        """写入一个场景"""
+
+        line = (json.dumps(dict(scene), ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            self._writer.write(line)
+            self._offsets[str(scene["id"])] = (self._size, len(line))
+            self._size += len(line)
+
+    def extend(self, scenes: Iterable[Mapping]):
+        for scene in scenes:
+            self.append(scene)
+
+    def get(self, scene_id: str) -> Optional[SceneRecord]:
+        """按ID读取场景，不存在时返回 None"""
+
+        with self._lock:
+            location = self._offsets.get(scene_id)
+            if location is None:
+                return None
+            return self._read(*location)
+
+    def __contains__(self, scene_id) -> bool:
+        return scene_id in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[SceneRecord]:
+        """按首次写入顺序逐个读取场景"""
+
+        with self._lock:
+            locations = list(self._offsets.values())
+        for location in locations:
+            with self._lock:
+                scene = self._read(*location)
+            yield scene
+
+    def flush(self):
+        with self._lock:
+            self._writer.flush()
+
+    def close(self):
+        with self._lock:
+            self._writer.close()
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read(self, offset: int, length: int) -> SceneRecord:
+        """读取单行场景（调用方需持有锁）"""
+
+        self._writer.flush()
+        if self._reader is None:
+            self._reader = open(self.path, 'rb')
+        self._reader.seek(offset)
+        return SceneRecord(json.loads(self._reader.read(length)))
+
+    def _load(self):
+        """扫描已有文件重建索引"""
+
+        offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    scene_id = str(json.loads(line)["id"])
+                except (ValueError, KeyError, TypeError):
+                    break
+                self._offsets[scene_id] = (offset, len(line))
+                offset += len(line)
+
+        # 截掉不完整或损坏的末尾部分，之后的追加从完整行之后开始
+        if offset != os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+        self._size = offset
@@ -0,0 +1,118 @@
+# =============================================================================
+# modules/scene_stream.py - 流式场景解析模块
+# =============================================================================
+
+import json
+from typing import Any, Iterable, Iterator, List
+
+
+def iter_sse_deltas(lines: Iterable[str]) -> Iterator[str]:
+    """
+    解析 chat-completions 的 server-sent events 流，依次产出回复内容的增量文本
+
+    每个事件为一行 "data: {...}"，以 "data: [DONE]" 结束；空行和注释行忽略。
+    """
+
+    for line in lines:
+        if not line or not line.startswith("data:"):
+            continue
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            return
+        event = json.loads(payload)
+        for choice in event.get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
+
+
+class JsonArrayStreamParser:
+    """
+    JSON数组的增量解析器
+
+    文本分段喂入，数组中每个顶层元素一结束就被解析出来，不必等待整个数组。
+    数组之前的内容（如 ```json 代码块标记）被忽略；只跟踪字符串、转义和括号深度，
+    元素本身（包括字符串、数字等非对象元素）仍由 json.loads 解析，
+    因而与一次性解析完整数组的结果相同。
+    """
+
+    def __init__(self):
+        self.started = False    # 是否已遇到数组的左括号
+        self.finished = False   # 是否已遇到数组的右括号
+        self._depth = 0         # 当前元素内的括号深度
+        self._scalar = False    # 当前元素是否为字符串、数字等标量
+        self._in_string = False
+        self._escaped = False
+        self._element = []      # 当前元素已读入的文本片段
+
+    def feed(self, chunk: str) -> List[Any]:
+        """喂入一段文本，返回其中结束的元素"""
+
+        elements = []
+        start = 0 if self._depth or self._scalar else None
+
+        for i, ch in enumerate(chunk):
+            if self.finished:
+                break
+
+            if not self.started:
+                if ch == "[":
+                    self.started = True
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._scalar:
+                        elements.append(self._close_element(chunk[start:i + 1]))
+                        start = None
+                continue
+
+            if self._scalar:
+                # 数字、true/false/null 在逗号、右括号或空白处结束
+                if ch in ",]" or ch.isspace():
+                    elements.append(self._close_element(chunk[start:i]))
+                    start = None
+                    self.finished = ch == "]"
+                continue
+
+            if self._depth == 0:
+                # 元素之间：逗号与空白跳过，右括号表示数组结束
+                if ch == "]":
+                    self.finished = True
+                elif ch in "{[":
+                    self._depth = 1
+                    start = i
+                elif ch != "," and not ch.isspace():
+                    self._scalar = True
+                    self._in_string = ch == '"'
+                    start = i
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    elements.append(self._close_element(chunk[start:i + 1]))
+                    start = None
+
+        if start is not None:
+            self._element.append(chunk[start:])
+
+        return elements
+
+    def _close_element(self, tail: str) -> Any:
+        """当前元素读完，解析并重置元素状态"""
+
+        self._element.append(tail)
+        element = json.loads("".join(self._element))
+        self._element = []
+        self._scalar = False
+        return element
@@ -0,0 +1,82 @@
+# =============================================================================
+# modules/sentence_index.py - 句子索引模块
+# =============================================================================
+
+import re
+from array import array
+from bisect import bisect_right
+from typing import Iterator, Optional, Tuple
+
+
+class SentenceIndex:
+    """
+    文本的句子索引
+
+    对原文只做一遍切分，记录每个句子的字符偏移，不保存子串副本。
+    句子为“正文 + 连续的句末标点”，去掉首尾空白；只有标点、没有正文的
+    片段并入前一个句子。位置（position）从 1 开始编号，
+    场景提取与视频插入共用同一套编号。
+    """
+
+    DELIMITERS = "。！？；"
+    _SEGMENT_PATTERN = re.compile(r'[^。！？；]*[。！？；]+|[^。！？；]+')
+
+    def __init__(self, text: str):
+        self.text = text
+        # 句子起点、正文终点（不含句末标点）、句子终点（含句末标点）
+        self.starts = array('q')
+        self.body_ends = array('q')
+        self.ends = array('q')
+
+        for match in self._SEGMENT_PATTERN.finditer(text):
+            segment = match.group()
+            body = segment.rstrip(self.DELIMITERS)
+            stripped_body = body.strip()
+
+            if not stripped_body:
+                # 没有正文的标点片段并入前一个句子
+                if self.ends and segment.strip():
+                    self.ends[-1] = match.start() + len(segment.rstrip())
+                continue
+
+            start = match.start() + len(body) - len(body.lstrip())
+            self.starts.append(start)
+            self.body_ends.append(start + len(stripped_body))
+            self.ends.append(match.start() + len(segment.rstrip()))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int]]:
+        """产出 (position, start, end)"""
+
+        for i in range(len(self.starts)):
+            yield i + 1, self.starts[i], self.ends[i]
+
+    def span(self, position: int) -> Tuple[int, int]:
+        """句子（含句末标点）的偏移区间"""
+        return self.starts[position - 1], self.ends[position - 1]
+
+    def sentence(self, position: int) -> str:
+        """句子文本（含句末标点）"""
+
+        start, end = self.span(position)
+        return self.text[start:end]
+
+    def body(self, position: int) -> str:
+        """句子正文（不含句末标点）"""
+        return self.text[self.starts[position - 1]:self.body_ends[position - 1]]
+
+    def sentences(self) -> Iterator[str]:
+        """依次产出句子文本"""
+
+        for position in range(1, len(self) + 1):
+            yield self.sentence(position)
+
+    def position_of(self, offset: int) -> Optional[int]:
+        """偏移所在句子的位置，不在任何句子内时返回 None"""
+
+        i = bisect_right(self.starts, offset) - 1
+        if i < 0 or offset >= self.ends[i]:
+            return None
+        return i + 1
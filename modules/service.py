@@ -0,0 +1,324 @@
+# =============================================================================
+# modules/service.py - 常驻服务模块
+# =============================================================================
+
+import json
+import mimetypes
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+from config.config import Config
+from modules.logger import setup_logger
+from modules.metrics import get_metrics
+from modules.pipeline import MODES, process_document
+
+
+class JobService:
+    """
+    文档处理任务服务
+
+    接收文档后放入队列，由常驻的文档线程池按 process_document 处理。
+    所有任务共用同一组 TextAnalyzer / VideoGenerator / VideoInserter，
+    因而共用其线程池、Kling任务追踪器、HTTP连接池与限流，以及各级缓存；
+    上游接口的并发上限对所有调用方统一生效。
+    每个任务输出到 output_root 下的独立子目录；指定 name 的任务输出到同名子目录，
+    同名文档再次提交时可以使用增量模式。
+    """
+
+    # 用 fullmatch 校验：$ 会匹配末尾换行之前的位置
+    NAME_PATTERN = re.compile(r'\w[\w.-]{0,99}')
+
+    def __init__(self, text_analyzer, video_generator, video_inserter, output_root: str,
+                 document_concurrency: Optional[int] = None,
+                 max_queued: Optional[int] = None, max_jobs: Optional[int] = None):
+        self.logger = setup_logger()
+        self.metrics = get_metrics()
+        self.text_analyzer = text_analyzer
+        self.video_generator = video_generator
+        self.video_inserter = video_inserter
+        self.output_root = output_root
+        self.document_concurrency = document_concurrency or Config.SERVICE_DOCUMENT_CONCURRENCY
+        self.max_queued = max_queued or Config.SERVICE_MAX_QUEUED
+        self.max_jobs = max_jobs or Config.SERVICE_MAX_JOBS
+
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()   # 任务ID -> 任务状态，按提交顺序
+        self._active_dirs = set()    # 排队或处理中任务的输出目录
+        self._executor = ThreadPoolExecutor(max_workers=max(1, self.document_concurrency),
+                                            thread_name_prefix="service_job")
+        os.makedirs(self.output_root, exist_ok=True)
+
+    def submit(self, text: str, output_format: str = "html", mode: str = "staged",
+               name: Optional[str] = None) -> Dict:
+        """
+        提交一篇文档
+
+        Returns:
+            任务状态字典
+
+        Raises:
+            ValueError: 参数无效
+            RuntimeError: 排队任务数已达上限，或同名文档正在处理
+        """
+
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError("文档内容为空")
+        if output_format not in ("html", "markdown"):
+            raise ValueError(f"不支持的输出格式: {output_format}")
+        if mode not in MODES:
+            raise ValueError(f"不支持的处理模式: {mode}")
+        if name is not None and not self.NAME_PATTERN.fullmatch(str(name)):
+            raise ValueError(f"文档名称无效: {name}")
+
+        job_id = uuid.uuid4().hex[:12]
+        output_dir = os.path.join(self.output_root, name or job_id)
+
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job["status"] == "queued")
+            if queued >= self.max_queued:
+                raise RuntimeError("任务队列已满，请稍后重试")
+            if output_dir in self._active_dirs:
+                raise RuntimeError(f"文档 {name} 正在处理中")
+
+            job = {
+                "id": job_id,
+                "name": name,
+                "status": "queued",
+                "format": output_format,
+                "mode": mode,
+                "output_dir": output_dir,
+                "submitted": time.time()
+            }
+            self._jobs[job_id] = job
+            self._active_dirs.add(output_dir)
+            self._evict()
+
+        self.metrics.increment("service_jobs", status="submitted")
+        self._executor.submit(self._run, job_id, text)
+        self.logger.info(f"任务 {job_id} 已排队（{mode}，{len(text)} 字符）")
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """任务状态，不存在时返回 None"""
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list(self) -> List[Dict]:
+        """全部任务状态，按提交顺序"""
+
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def job_file(self, job_id: str, relative_path: Optional[str] = None) -> Optional[str]:
+        """
+        任务输出目录中的文件路径
+
+        relative_path 为空时返回结果文件；任务未完成、文件不存在或路径越出输出目录时返回 None
+        """
+
+        job = self.get(job_id)
+        if job is None or job["status"] != "succeeded":
+            return None
+
+        if relative_path is None:
+            return job["result_file"]
+
+        output_dir = os.path.realpath(job["output_dir"])
+        path = os.path.realpath(os.path.join(output_dir, relative_path))
+        if os.path.commonpath([output_dir, path]) != output_dir or not os.path.isfile(path):
+            return None
+        return path
+
+    def close(self):
+        """不再接受新任务，并等待排队和处理中的任务完成"""
+
+        self._executor.shutdown(wait=True)
+
+    def _run(self, job_id: str, text: str):
+        """处理单个任务（在文档线程中运行）"""
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(status="running", started=time.time())
+            output_dir, output_format, mode = job["output_dir"], job["format"], job["mode"]
+
+        try:
+            result_file = process_document(
+                text, output_dir, output_format, mode,
+                self.text_analyzer, self.video_generator, self.video_inserter, self.logger
+            )
+            update = {"status": "succeeded", "result_file": result_file}
+        except Exception as e:
+            self.logger.error(f"任务 {job_id} 处理失败: {str(e)}")
+            update = {"status": "failed", "error": str(e)}
+
+        with self._lock:
+            job.update(update, finished=time.time())
+            job["elapsed"] = round(job["finished"] - job["started"], 3)
+            self._active_dirs.discard(output_dir)
+
+        self.metrics.increment("service_jobs", status=update["status"])
+        outcome = "处理完成" if update["status"] == "succeeded" else "处理失败"
+        self.logger.info(f"任务 {job_id} {outcome}，用时 {job['elapsed']} 秒")
+
+    def _evict(self):
+        """已结束的任务超过保留数量时删除最早的记录（调用方需持有锁），输出文件保留"""
+
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job["status"] in ("succeeded", "failed")]
+        for job_id in finished[:excess]:
+            del self._jobs[job_id]
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """客户端提前断开连接时不打印异常"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            super().handle_error(request, client_address)
+
+
+class ServiceServer:
+    """
+    任务服务的本地HTTP接口
+
+        POST /jobs                    提交文档，JSON: {"text", "format", "mode", "name"}，返回202与任务状态
+        GET  /jobs                    全部任务状态
+        GET  /jobs/<id>               单个任务状态
+        GET  /jobs/<id>/result        结果文件（HTML/Markdown）
+        GET  /jobs/<id>/<文件名>      输出目录中的文件（视频等），结果页面中的相对链接即指向这里
+        GET  /metrics                 Prometheus文本格式的运行指标
+        GET  /health                  存活检查
+    """
+
+    def __init__(self, service: JobService, host: Optional[str] = None, port: Optional[int] = None):
+        self.logger = setup_logger()
+        self.service = service
+        self.httpd = _QuietHTTPServer(
+            (host or Config.SERVICE_HOST, Config.SERVICE_PORT if port is None else port),
+            self._make_handler()
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        self.logger.info(f"服务已启动: {self.base_url}")
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _make_handler(self):
+        service = self.service
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status: int, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self._send(status, body, "application/json; charset=utf-8")
+
+            def _send_file(self, path: str):
+                content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                if content_type.startswith("text/"):
+                    content_type += "; charset=utf-8"
+                size = os.path.getsize(path)
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(size))
+                self.end_headers()
+                with open(path, 'rb') as f:
+                    while True:
+                        chunk = f.read(Config.DOWNLOAD_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        self.wfile.write(chunk)
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/jobs":
+                    return self._send_json(404, {"error": "not found"})
+
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    if length < 0:
+                        raise ValueError("Content-Length 无效")
+                    if length > Config.SERVICE_MAX_REQUEST_SIZE:
+                        # 请求体未读取，连接无法继续使用
+                        self.close_connection = True
+                        return self._send_json(413, {"error": "请求体过大"})
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                    if not isinstance(request, dict):
+                        raise ValueError("请求体必须是JSON对象")
+                    job = service.submit(
+                        request.get("text"),
+                        output_format=request.get("format", "html"),
+                        mode=request.get("mode", "staged"),
+                        name=request.get("name")
+                    )
+                except ValueError as e:
+                    self.close_connection = True
+                    return self._send_json(400, {"error": str(e)})
+                except RuntimeError as e:
+                    return self._send_json(503, {"error": str(e)})
+
+                self._send_json(202, job)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0].rstrip("/")
+
+                if path == "/health":
+                    return self._send_json(200, {"status": "ok"})
+                if path == "/metrics":
+                    body = service.metrics.to_prometheus().encode("utf-8")
+                    return self._send(200, body, "text/plain; version=0.0.4; charset=utf-8")
+                if path == "/jobs":
+                    return self._send_json(200, service.list())
+
+                match = re.fullmatch(r'/jobs/(\w+)(?:/(.+))?', path)
+                if not match:
+                    return self._send_json(404, {"error": "not found"})
+
+                job_id, resource = match.groups()
+                job = service.get(job_id)
+                if job is None:
+                    return self._send_json(404, {"error": "unknown job"})
+                if resource is None:
+                    return self._send_json(200, job)
+
+                if job["status"] != "succeeded":
+                    return self._send_json(409, {"error": f"job is {job['status']}"})
+                file_path = service.job_file(job_id, None if resource == "result" else unquote(resource))
+                if file_path is None:
+                    return self._send_json(404, {"error": "file not found"})
+                self._send_file(file_path)
+
+        return Handler
@@ -2,50 +2,31 @@
 # modules/text_analyzer.py - 文本分析模块
 # =============================================================================
 
+import logging
 import re
 import json
-import requests
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Optional, Tuple
 from config.config import Config
+from modules.http_client import HttpClient, get_http_client
+from modules.keyword_matcher import KeywordMatcher
 from modules.logger import setup_logger
+from modules.metrics import get_metrics
+from modules.scene_cache import SceneCache
+from modules.scene_record import SceneRecord
+from modules.scene_stream import JsonArrayStreamParser, iter_sse_deltas
+from modules.sentence_index import SentenceIndex
 
 
-class TextAnalyzer:
-    """文本分析器，用于从文本中提取场景"""
-
-    def __init__(self):
-        self.logger = setup_logger()
-        self.api_key = Config.DEEPSEEK_API_KEY
-        self.api_url = Config.DEEPSEEK_API_URL
-
-    def extract_scenes(self, text: str) -> List[Dict]:
-        """
-        从文本中提取场景
-
-        Args:
-            text: 输入文本
-
-        Returns:
-            场景列表
-        """
-        try:
-            # 如果没有配置API密钥，使用规则提取
-            if not self.api_key or self.api_key == "your_deepseek_api_key_here":
-                self.logger.warning("未配置DeepSeek API密钥，使用规则提取场景")
-                return self._extract_scenes_by_rules(text)
+# 估算token数时按1个token计的中日韩字符与全角标点
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]')
 
-            # 使用DeepSeek API提取场景
-            return self._extract_scenes_by_api(text)
 
-        except Exception as e:
-            self.logger.error(f"场景提取失败: {str(e)}")
-            # 降级到规则提取
-            return self._extract_scenes_by_rules(text)
-
-    def _extract_scenes_by_api(self, text: str) -> List[Dict]:
-        """使用DeepSeek API提取场景"""
+class TextAnalyzer:
+    """文本分析器，用于从文本中提取场景"""
 
-        system_prompt = """
+    SYSTEM_PROMPT = """
         你是一个专业的场景提取助手。请从给定的文本中提取适合制作视频的场景。
 
         要求：
@@ -73,6 +54,260 @@ class TextAnalyzer:
         ]
         """
 
+    def __init__(self, use_cache: Optional[bool] = None, cache: Optional[SceneCache] = None,
+                 pin: bool = False, chunking: Optional[bool] = None,
+                 http_client: Optional[HttpClient] = None,
+                 keyword_matcher: Optional[KeywordMatcher] = None,
+                 stream: Optional[bool] = None):
+        self.logger = setup_logger()
+        self.metrics = get_metrics()
+        self.api_key = Config.DEEPSEEK_API_KEY
+        self.api_url = Config.DEEPSEEK_API_URL
+        self.http = http_client or get_http_client()
+        self.model = Config.DEEPSEEK_MODEL
+        self.temperature = Config.DEEPSEEK_TEMPERATURE
+
+        if use_cache is None:
+            use_cache = Config.SCENE_CACHE_ENABLED
+        self.cache = cache or (SceneCache() if use_cache else None)
+        # 固定提取结果，使重复运行得到相同的场景
+        self.pin = pin
+        # 长文本分块并行提取
+        self.chunking = Config.EXTRACT_CHUNKING if chunking is None else chunking
+        self.chunk_max_tokens = Config.EXTRACT_CHUNK_MAX_TOKENS
+        self.chunk_concurrency = Config.EXTRACT_CHUNK_CONCURRENCY
+        # 逐个产出场景时以流式响应请求API，每个场景解析完成即交给调用方
+        self.stream = Config.DEEPSEEK_STREAM if stream is None else stream
+
+        # 规则提取使用的关键词自动机，只构建一次
+        if keyword_matcher is None:
+            if Config.RULE_KEYWORDS_FILE:
+                keyword_matcher = KeywordMatcher.from_file(Config.RULE_KEYWORDS_FILE)
+            else:
+                keyword_matcher = KeywordMatcher(Config.RULE_KEYWORDS)
+        self.keyword_matcher = keyword_matcher
+
+    def extract_scenes(self, text: str, index: Optional[SentenceIndex] = None) -> List[SceneRecord]:
+        """
+        从文本中提取场景
+
+        Args:
+            text: 输入文本
+            index: 文本的句子索引，不提供时在此构建
+
+        Returns:
+            场景列表，每个场景以 start/end 字符偏移锚定到所在句子
+        """
+        index = index or SentenceIndex(text)
+
+        try:
+            # 如果没有配置API密钥，使用规则提取
+            if not self._api_configured():
+                self.logger.warning("未配置DeepSeek API密钥，使用规则提取场景")
+                self.metrics.increment("fallbacks", stage="extract", reason="no_api_key")
+                return self._extract_scenes_by_rules(text, index)
+
+            # 长文本按句子分块并行提取
+            if self.chunking and self._estimate_tokens(text) > self.chunk_max_tokens:
+                return self._extract_scenes_chunked(text, index)
+
+            # 使用DeepSeek API提取场景
+            return self.anchor_scenes(self._extract_scenes_by_api(text), index)
+
+        except Exception as e:
+            self.logger.error(f"场景提取失败: {str(e)}")
+            self.metrics.increment("fallbacks", stage="extract", reason="api_error")
+            # 降级到规则提取
+            return self._extract_scenes_by_rules(text, index)
+
+    def iter_scenes(self, text: str, index: Optional[SentenceIndex] = None) -> Iterator[SceneRecord]:
+        """
+        逐个产出场景，已确定的场景尽早交给调用方
+
+        分块模式下每个窗口完成后即产出其场景；流式模式下API回复中每个场景
+        的JSON对象一结束即产出。API正常返回时，产出的场景序列与
+        extract_scenes 的返回结果完全一致。
+        """
+        index = index or SentenceIndex(text)
+
+        if self._api_configured() and self.chunking and self._estimate_tokens(text) > self.chunk_max_tokens:
+            yield from self._iter_scenes_chunked(text, index)
+            return
+
+        if self._api_configured() and self.stream:
+            yield from self._iter_scenes_streamed(text, index)
+            return
+
+        yield from self.extract_scenes(text, index)
+
+    def anchor_scenes(self, scenes: List[SceneRecord], index: SentenceIndex) -> List[SceneRecord]:
+        """按场景位置设置其所在句子的 start/end 字符偏移（原地修改并返回）"""
+
+        for scene in scenes:
+            position = self._scene_position(scene)
+            if 1 <= position <= len(index):
+                scene["start"], scene["end"] = index.span(position)
+            else:
+                scene.pop("start", None)
+                scene.pop("end", None)
+
+        return scenes
+
+    @staticmethod
+    def _scene_position(scene: Dict) -> int:
+        """场景的句子位置，缺失或无法解析时按 0 处理"""
+
+        try:
+            return int(scene["position"])
+        except (KeyError, TypeError, ValueError):
+            return 0
+
+    def _api_configured(self) -> bool:
+        """是否配置了DeepSeek API密钥"""
+        return bool(self.api_key) and self.api_key != "your_deepseek_api_key_here"
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """粗略估计token数：中日韩字符按1个计，其余字符按4个计1个"""
+
+        # 删去中日韩字符后比较长度，不为每个匹配创建字符串
+        cjk = len(text) - len(_CJK_PATTERN.sub("", text))
+        return cjk + (len(text) - cjk + 3) // 4
+
+    def _split_windows(self, text: str, index: SentenceIndex) -> List[Dict]:
+        """
+        按句子边界把文本切分为不超过token预算的窗口
+
+        Returns:
+            窗口列表，每项包含 text、offset（窗口首句之前的句子数）和 count（窗口句子数）
+        """
+
+        windows = []
+        first, current_tokens = 1, 0
+
+        def close_window(last):
+            start, _ = index.span(first)
+            _, end = index.span(last)
+            windows.append({"text": text[start:end], "offset": first - 1, "count": last - first + 1})
+
+        for position, start, end in index:
+            tokens = self._estimate_tokens(text[start:end])
+            if position > first and current_tokens + tokens > self.chunk_max_tokens:
+                close_window(position - 1)
+                first, current_tokens = position, 0
+            current_tokens += tokens
+
+        if len(index) >= first:
+            close_window(len(index))
+
+        return windows
+
+    def _extract_window(self, window: Dict) -> List[SceneRecord]:
+        """提取单个窗口的场景，失败时该窗口降级到规则提取"""
+
+        try:
+            with self.metrics.span("extract_window"):
+                return self._extract_scenes_by_api(window["text"])
+        except Exception as e:
+            self.logger.error("窗口（起始句 %s）场景提取失败: %s", window['offset'] + 1, e)
+            self.metrics.increment("fallbacks", stage="extract", reason="api_error")
+            return self._extract_scenes_by_rules(window["text"])
+
+    def _extract_scenes_chunked(self, text: str, index: SentenceIndex) -> List[SceneRecord]:
+        """分块并行提取场景，并把位置映射回全文句子序号、重新编号"""
+        return list(self._iter_scenes_chunked(text, index))
+
+    def _iter_scenes_chunked(self, text: str, index: SentenceIndex) -> Iterator[SceneRecord]:
+        """按窗口顺序产出分块提取的场景"""
+
+        windows = self._split_windows(text, index)
+        self.logger.info(f"文本较长，分为 {len(windows)} 个窗口并行提取场景")
+
+        scene_id = 1
+        with ThreadPoolExecutor(max_workers=max(1, self.chunk_concurrency),
+                                thread_name_prefix="extract") as executor:
+            # map 按窗口顺序返回，先完成的窗口无需等待后续窗口
+            for window, scenes in zip(windows, executor.map(self._extract_window, windows)):
+                for scene in self._remap_window_scenes(window, scenes):
+                    # 按全文顺序重新编号，避免不同窗口的ID冲突
+                    scene["id"] = f"scene_{scene_id:03d}"
+                    scene_id += 1
+                    self.anchor_scenes([scene], index)
+                    yield scene
+
+    def _remap_window_scenes(self, window: Dict, scenes: List[SceneRecord]) -> List[SceneRecord]:
+        """把窗口内的位置映射为全文句子序号，并按位置排序"""
+
+        remapped = []
+        for scene in scenes:
+            scene = scene.copy()
+            try:
+                position = int(scene["position"])
+            except (TypeError, ValueError):
+                self.logger.warning("场景位置无效，已跳过: %s", scene)
+                continue
+            # 位置限制在窗口范围内，保证各窗口的场景按全文顺序排列
+            position = min(max(position, 1), window["count"])
+            scene["position"] = position + window["offset"]
+            remapped.append(scene)
+
+        remapped.sort(key=lambda scene: scene["position"])
+        return remapped
+
+    def _iter_scenes_streamed(self, text: str, index: SentenceIndex) -> Iterator[SceneRecord]:
+        """
+        流式提取并逐个产出场景
+
+        请求失败或回复无法解析时降级到规则提取；已经产出过场景时，
+        只用规则补充最后一个已产出场景之后的句子，已产出的场景保持不变。
+        """
+
+        yielded = []
+        try:
+            for scene in self._iter_scenes_by_api_stream(text):
+                self.anchor_scenes([scene], index)
+                yielded.append(scene)
+                yield scene
+            return
+        except Exception as e:
+            self.logger.error(f"流式场景提取失败: {str(e)}")
+            self.metrics.increment("fallbacks", stage="extract", reason="stream_error")
+
+        if not yielded:
+            yield from self._extract_scenes_by_rules(text, index)
+            return
+
+        last_position = max(self._scene_position(scene) for scene in yielded)
+        used_ids = {scene["id"] for scene in yielded}
+        scene_id = len(yielded) + 1
+        for scene in self._extract_scenes_by_rules(text, index):
+            if self._scene_position(scene) <= last_position:
+                continue
+            while f"scene_{scene_id:03d}" in used_ids:
+                scene_id += 1
+            scene["id"] = f"scene_{scene_id:03d}"
+            scene_id += 1
+            yield scene
+
+    def _lookup_cache(self, text: str) -> Tuple[Optional[str], Optional[List[SceneRecord]]]:
+        """查询场景提取缓存，返回缓存键和命中的场景列表"""
+
+        if self.cache is None:
+            return None, None
+
+        cache_key = self.cache.make_key(text, self.SYSTEM_PROMPT, self.model, self.temperature)
+        scenes = self.cache.get(cache_key)
+        self.metrics.increment("cache_lookups", cache="scene", result="miss" if scenes is None else "hit")
+        if scenes is not None:
+            self.logger.info("命中场景提取缓存")
+            if self.pin:
+                self.cache.put(cache_key, scenes, pinned=True)
+            scenes = [SceneRecord(scene) for scene in scenes]
+        return cache_key, scenes
+
+    def _build_request(self, text: str) -> Tuple[Dict, Dict]:
+        """DeepSeek请求的请求头与请求体"""
+
         user_prompt = f"请从以下文本中提取场景：\n\n{text}"
 
         headers = {
@@ -81,16 +316,69 @@ class TextAnalyzer:
         }
 
         data = {
-            "model": "deepseek-chat",
+            "model": self.model,
             "messages": [
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": self.SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt}
             ],
-            "temperature": 0.7,
+            "temperature": self.temperature,
             "max_tokens": 2000
         }
+        return headers, data
 
-        response = requests.post(self.api_url, headers=headers, json=data)
+    def _iter_scenes_by_api_stream(self, text: str) -> Iterator[SceneRecord]:
+        """
+        以 server-sent events 流式请求DeepSeek API，边接收边解析场景数组
+
+        每个场景对象一结束就校验并产出；完整接收后与非流式请求一样写入缓存。
+        回复中的场景数组不完整时抛出异常。
+        """
+
+        cache_key, scenes = self._lookup_cache(text)
+        if scenes is not None:
+            yield from scenes
+            return
+
+        headers, data = self._build_request(text)
+        data["stream"] = True
+
+        start = time.perf_counter()
+        with self.metrics.span("deepseek_request", stream="true"):
+            response = self.http.post(self.api_url, endpoint="deepseek", headers=headers, json=data,
+                                      stream=True)
+
+        scenes = []
+        try:
+            response.raise_for_status()
+            # 事件流未声明字符集时 requests 默认按 ISO-8859-1 解码
+            response.encoding = "utf-8"
+            parser = JsonArrayStreamParser()
+            for delta in iter_sse_deltas(response.iter_lines(decode_unicode=True)):
+                for element in parser.feed(delta):
+                    for scene in self._validate_scenes([element]):
+                        if not scenes:
+                            self.metrics.observe("deepseek_first_scene", time.perf_counter() - start)
+                        scenes.append(dict(scene))
+                        yield scene
+            if not parser.finished:
+                raise ValueError("API流式返回的场景数组不完整")
+        finally:
+            response.close()
+
+        if cache_key is not None:
+            self.cache.put(cache_key, scenes, pinned=self.pin)
+
+    def _extract_scenes_by_api(self, text: str) -> List[SceneRecord]:
+        """使用DeepSeek API提取场景，结果按文本与提示词版本缓存"""
+
+        cache_key, scenes = self._lookup_cache(text)
+        if scenes is not None:
+            return scenes
+
+        headers, data = self._build_request(text)
+
+        with self.metrics.span("deepseek_request"):
+            response = self.http.post(self.api_url, endpoint="deepseek", headers=headers, json=data)
         response.raise_for_status()
 
         result = response.json()
@@ -98,45 +386,52 @@ class TextAnalyzer:
 
         # 解析JSON
         try:
-            scenes = json.loads(content)
-            return self._validate_scenes(scenes)
+            scenes = self._validate_scenes(json.loads(content))
         except json.JSONDecodeError:
             self.logger.error("API返回的内容不是有效的JSON格式")
+            self.metrics.increment("fallbacks", stage="extract", reason="invalid_json")
             return self._extract_scenes_by_rules(text)
 
-    def _extract_scenes_by_rules(self, text: str) -> List[Dict]:
+        if cache_key is not None:
+            self.cache.put(cache_key, scenes, pinned=self.pin)
+        return scenes
+
+    def _extract_scenes_by_rules(self, text: str, index: Optional[SentenceIndex] = None) -> List[SceneRecord]:
         """使用规则提取场景"""
 
-        scenes = []
-        sentences = re.split(r'[。！？；]', text)
+        index = index or SentenceIndex(text)
 
-        scene_id = 1
-        for i, sentence in enumerate(sentences):
-            sentence = sentence.strip()
-            if not sentence:
+        # 查找全文中的关键词，按偏移归入句子（只统计句子正文内的命中）
+        hits_by_position = {}
+        for start, end, keyword in self.keyword_matcher.scan(text):
+            position = index.position_of(start)
+            if position is None or end > index.body_ends[position - 1]:
                 continue
+            hits_by_position.setdefault(position, []).append(keyword)
 
-            # 简单的关键词匹配来识别可视化场景
-            visual_keywords = [
-                '站在', '走向', '搬运', '倒入', '发生', '产生', '销毁',
-                '建造', '实验', '反应', '展示', '演示', '操作'
-            ]
-
-            if any(keyword in sentence for keyword in visual_keywords):
-                scene = {
-                    "id": f"scene_{scene_id:03d}",
-                    "prompt": sentence,
-                    "position": i + 1,
-                    "duration": 5,
-                    "style": "realistic",
-                    "type": "narrative"
-                }
-                scenes.append(scene)
-                scene_id += 1
+        # 关闭 DEBUG 时不为每个场景整理命中的关键词
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        scenes = []
+        for scene_id, position in enumerate(sorted(hits_by_position), 1):
+            if debug:
+                self.logger.debug("句子 %s 命中关键词: %s", position, sorted(set(hits_by_position[position])))
+
+            start, end = index.span(position)
+            scene = SceneRecord(
+                id=f"scene_{scene_id:03d}",
+                prompt=index.body(position),
+                position=position,
+                duration=5,
+                style="realistic",
+                type="narrative",
+                start=start,
+                end=end
+            )
+            scenes.append(scene)
 
         return scenes
 
-    def _validate_scenes(self, scenes: List[Dict]) -> List[Dict]:
+    def _validate_scenes(self, scenes: List[Dict]) -> List[SceneRecord]:
         """验证场景数据的有效性"""
 
         validated_scenes = []
@@ -144,14 +439,16 @@ class TextAnalyzer:
 
         for scene in scenes:
             if not isinstance(scene, dict):
+                self.logger.warning("场景不是JSON对象，已忽略: %r", scene)
                 continue
 
             # 检查必需字段
             if not all(field in scene for field in required_fields):
-                self.logger.warning(f"场景缺少必需字段: {scene}")
+                self.logger.warning("场景缺少必需字段: %s", scene)
                 continue
 
             # 设置默认值
+            scene = SceneRecord(scene)
             scene.setdefault("resolution", "1920x1080")
             scene.setdefault("fps", 30)
 
@@ -0,0 +1,167 @@
+# =============================================================================
+# modules/video_cache.py - 视频缓存模块
+# =============================================================================
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Optional
+from config.config import Config
+from modules.logger import setup_logger
+
+
+class VideoCache:
+    """
+    基于内容寻址的视频缓存
+
+    缓存键由生成后端和渲染参数（提示词、时长、风格、分辨率、帧率）计算得到，
+    命中时把缓存文件硬链接（失败则复制）到输出目录。
+    超过最大存活时间的条目会被删除，总大小超限时按最近使用时间淘汰。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size: Optional[int] = None,
+                 max_age: Optional[float] = None):
+        self.logger = setup_logger()
+        self.cache_dir = cache_dir or Config.VIDEO_CACHE_DIR
+        self.max_size = Config.VIDEO_CACHE_MAX_SIZE if max_size is None else max_size
+        self.max_age = Config.VIDEO_CACHE_MAX_AGE if max_age is None else max_age
+
+        self._lock = threading.Lock()
+        self._size = None  # 缓存目录总大小，首次写入时统计
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, backend: str, scene: Dict) -> str:
+        """计算场景在指定后端下的缓存键"""
+
+        params = {
+            "backend": backend,
+            "prompt": scene["prompt"],
+            "duration": scene["duration"],
+            "style": scene["style"],
+            "resolution": scene.get("resolution", "1920x1080"),
+            "fps": scene.get("fps", 30)
+        }
+        payload = json.dumps(params, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def make_script_key(self, backend: str, script: str, options: Dict) -> str:
+        """计算本地渲染视频的缓存键：渲染脚本与渲染参数相同即视为同一视频"""
+
+        payload = json.dumps({"backend": backend, "script": script, "options": options},
+                             ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.mp4")
+
+    def get(self, key: str, dest_path: str) -> bool:
+        """命中时把缓存文件放到 dest_path 并返回 True"""
+
+        entry_path = self._entry_path(key)
+
+        try:
+            stat = os.stat(entry_path)
+        except FileNotFoundError:
+            return False
+
+        if self.max_age and time.time() - stat.st_mtime > self.max_age:
+            self._remove(entry_path)
+            return False
+
+        self._link_or_copy(entry_path, dest_path)
+        # 更新修改时间，作为最近使用时间
+        os.utime(entry_path)
+        return True
+
+    def put(self, key: str, src_path: str):
+        """把生成好的视频文件存入缓存"""
+
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+
+        # 先放到临时文件再原子替换，避免并发读到不完整的条目
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self._link_or_copy(src_path, tmp_path)
+
+        with self._lock:
+            # 替换已有条目时先减去旧文件的大小
+            try:
+                old_size = os.path.getsize(entry_path)
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(tmp_path, entry_path)
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += os.path.getsize(entry_path) - old_size
+            over_limit = self.max_size and self._size > self.max_size
+
+        if over_limit:
+            self.evict()
+
+    def evict(self):
+        """删除过期条目，并按最近使用时间淘汰直到总大小不超过上限"""
+
+        now = time.time()
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".mp4"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if self.max_age and now - stat.st_mtime > self.max_age:
+                    self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        removed = 0
+        for _, size, path in entries:
+            if not self.max_size or total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self._size = total
+
+        if removed:
+            self.logger.info(f"视频缓存淘汰 {removed} 个条目，当前大小 {total} 字节")
+
+    def _scan_size(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".mp4"):
+                    try:
+                        total += os.path.getsize(os.path.join(root, name))
+                    except FileNotFoundError:
+                        pass
+        return total
+
+    @staticmethod
+    def _link_or_copy(src_path: str, dest_path: str):
+        """优先硬链接，跨文件系统等情况下退回复制"""
+
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        try:
+            os.link(src_path, dest_path)
+        except OSError:
+            shutil.copyfile(src_path, dest_path)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -3,25 +3,130 @@
 # =============================================================================
 
 import os
+import shutil
+import threading
 import time
 import requests
-from typing import List, Dict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, Dict, Mapping, Optional
 from config.config import Config
+from modules.downloader import Downloader
+from modules.http_client import HttpClient, get_http_client
+from modules.job_journal import JobJournal
+from modules.kling_tracker import KlingJobTracker
 from modules.logger import setup_logger
+from modules.manim_renderer import ManimRenderer
+from modules.metrics import get_metrics
+from modules.poster import PosterExtractor, poster_path_for
+from modules.scene_dedup import PromptDeduplicator
+from modules.scene_record import SceneRecord
+from modules.scene_scheduler import SceneScheduler
+from modules.video_cache import VideoCache
+
+
+def scene_result(future: Future) -> Dict:
+    """场景Future的结果字典；生成中抛出的异常转为该场景的失败结果，不影响其他场景"""
+
+    try:
+        return future.result()
+    except Exception as e:
+        return {
+            "status": "failed",
+            "error": str(e),
+            "video_path": None
+        }
+
+
+class PendingResults(Mapping):
+    """
+    尚在生成中的视频结果映射
+
+    以场景ID为键，取值时阻塞直到该场景的视频生成完成。
+    """
+
+    def __init__(self, futures: Dict[str, Future]):
+        self._futures = futures
+
+    def __getitem__(self, scene_id: str) -> Dict:
+        return scene_result(self._futures[scene_id])
+
+    def __contains__(self, scene_id) -> bool:
+        return scene_id in self._futures
+
+    def __iter__(self):
+        return iter(self._futures)
+
+    def __len__(self) -> int:
+        return len(self._futures)
 
 
 class VideoGenerator:
     """视频生成器"""
 
-    def __init__(self):
+    # 各生成后端输出文件名的后缀
+    FILENAME_SUFFIXES = {
+        "kling": "",
+        "manim": "_manim",
+        "mock": "_mock"
+    }
+
+    def __init__(self, concurrent: Optional[bool] = None,
+                 backend_concurrency: Optional[Dict[str, int]] = None,
+                 use_cache: Optional[bool] = None, cache: Optional[VideoCache] = None,
+                 http_client: Optional[HttpClient] = None,
+                 renderer: Optional[ManimRenderer] = None,
+                 use_journal: Optional[bool] = None, use_dedup: Optional[bool] = None,
+                 scheduler: Optional[SceneScheduler] = None):
         self.logger = setup_logger()
+        self.metrics = get_metrics()
         self.kling_api_key = Config.KLING_API_KEY
         self.kling_api_url = Config.KLING_API_URL
-
-    def generate_videos(self, scenes: List[Dict], output_dir: str) -> Dict[str, Dict]:
+        self.http = http_client or get_http_client()
+        self.downloader = Downloader(self.http)
+        self.concurrent = Config.CONCURRENT_GENERATION if concurrent is None else concurrent
+        self.renderer = renderer or ManimRenderer()
+        # 是否安装了Manim只检查一次；未安装时技术场景直接使用模拟视频，不启动渲染进程
+        self._manim_installed = self.renderer.available()
+        self._manim_warned = False
+        self.backend_concurrency = dict(Config.BACKEND_CONCURRENCY)
+        if backend_concurrency:
+            self.backend_concurrency.update(backend_concurrency)
+        if self.backend_concurrency.get("manim") is None:
+            # 渲染在子进程中进行，线程只负责提交和等待
+            self.backend_concurrency["manim"] = self.renderer.processes
+
+        if use_cache is None:
+            use_cache = Config.VIDEO_CACHE_ENABLED
+        self.cache = cache or (VideoCache() if use_cache else None)
+        self.use_journal = Config.KLING_JOURNAL_ENABLED if use_journal is None else use_journal
+        if use_dedup is None:
+            use_dedup = Config.DEDUP_ENABLED
+        # 近似去重索引在多次调用间共享，批量模式下跨文档生效
+        self.dedup = PromptDeduplicator() if use_dedup else None
+        # 决定场景的生成顺序，并按预算与截止时间降级后端
+        self.scheduler = scheduler or SceneScheduler()
+        self.posters = None
+        if Config.POSTER_ENABLED:
+            if PosterExtractor.available():
+                self.posters = PosterExtractor()
+            else:
+                self.logger.info("未安装ffmpeg，输出页面中的视频不带封面")
+
+        self._pool_lock = threading.Lock()
+        self._executors = None
+        self._tracker = None
+        self._journals = {}
+        self._documents = {}   # 输出目录 -> 正在进行的生成范围数
+        self._dedup_lock = threading.Lock()
+        self._pending_slots = threading.BoundedSemaphore(Config.MAX_PENDING_SCENES)
+
+    def generate_videos(self, scenes: Iterable[SceneRecord], output_dir: str) -> Dict[str, Dict]:
         """
         生成视频
 
+        场景按调度器的优先级依次提交，各后端按提交顺序开始生成。
+
         Args:
             scenes: 场景列表
             output_dir: 输出目录
@@ -29,127 +134,506 @@ class VideoGenerator:
         Returns:
             视频生成结果字典
         """
-        results = {}
+        scenes = list(scenes)
+        order = self.scheduler.order(scenes, [self._select_backend(scene) for scene in scenes])
+
+        with self.document(output_dir):
+            futures = [None] * len(scenes)
+            for i in order:
+                futures[i] = self.submit_scene(scenes[i], output_dir)
+
+            # 按场景原始顺序收集结果
+            results = {}
+            for scene, future in zip(scenes, futures):
+                results[scene.get('id', 'unknown')] = scene_result(future)
+        return results
 
-        for scene in scenes:
-            try:
-                scene_id = scene["id"]
-                scene_type = scene.get("type", "narrative")
+    @contextmanager
+    def document(self, output_dir: str) -> Iterator[None]:
+        """
+        一篇文档的生成范围
 
-                self.logger.info(f"开始生成场景 {scene_id} 的视频")
+        最外层范围开始时调度器重新计算该文档的预算与截止时间，结束时释放
+        该文档的调度状态和任务日志；嵌套或并发的同目录范围共用同一份状态。
+        范围结束前，其中提交的场景应当都已完成。
+        """
 
-                if scene_type == "narrative":
-                    # 叙事性场景使用Kling AI
-                    result = self._generate_with_kling(scene, output_dir)
-                elif scene_type == "technical":
-                    # 技术性场景使用Manim
-                    result = self._generate_with_manim(scene, output_dir)
+        with self._pool_lock:
+            count = self._documents.get(output_dir, 0)
+            self._documents[output_dir] = count + 1
+            if count == 0:
+                self.scheduler.start(output_dir)
+        try:
+            yield
+        finally:
+            with self._pool_lock:
+                count = self._documents.pop(output_dir) - 1
+                if count:
+                    self._documents[output_dir] = count
                 else:
-                    # 默认使用模拟生成
-                    result = self._generate_mock_video(scene, output_dir)
+                    self.scheduler.finish(output_dir)
+                    self._journals.pop(output_dir, None)
 
-                results[scene_id] = result
+    def submit_scene(self, scene: SceneRecord, output_dir: str) -> Future:
+        """
+        提交单个场景的视频生成，返回结果字典的Future
 
+        与之前提交过的场景近似重复时不再生成，直接复用代表场景的视频。
+        未完成的场景数达到上限时会阻塞，对场景的生产方形成反压。
+        串行模式下直接在当前线程生成。
+        """
+        if self.dedup is None or "id" not in scene:
+            return self._attach_poster(self._submit_new(scene, output_dir))
+
+        with self._dedup_lock:
+            representative = self.dedup.find(scene)
+            if representative is not None and not self._reusable(representative[1]):
+                representative = None
+            if representative is None:
+                # 先登记占位Future，并发提交的相似场景也能找到这个代表
+                future = Future()
+                self.dedup.add(scene, (scene["id"], future))
+
+        if representative is not None:
+            self.metrics.increment("dedup_lookups", result="hit")
+            return self._share_video(representative, scene, output_dir)
+        self.metrics.increment("dedup_lookups", result="miss")
+
+        try:
+            inner = self._attach_poster(self._submit_new(scene, output_dir))
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        inner.add_done_callback(lambda f: self._copy_future(f, future))
+        return future
+
+    @staticmethod
+    def _copy_future(source: Future, target: Future):
+        if source.exception() is not None:
+            target.set_exception(source.exception())
+        else:
+            target.set_result(source.result())
+
+    @staticmethod
+    def _reusable(future: Future) -> bool:
+        """代表场景尚未完成，或已成功且视频文件仍在时可以复用"""
+
+        if not future.done():
+            return True
+        if future.exception() is not None:
+            return False
+        result = future.result()
+        return result.get("status") == "success" and bool(result.get("video_path")) \
+            and os.path.exists(result["video_path"])
+
+    def _share_video(self, representative, scene: Dict, output_dir: str) -> Future:
+        """代表场景完成后把其视频链接（或复制）为本场景的视频"""
+
+        representative_id, representative_future = representative
+        self.logger.info("场景 %s 与场景 %s 近似重复，复用其视频", scene['id'], representative_id)
+        future = Future()
+
+        def share(f: Future):
+            try:
+                result = f.result()
+                if result.get("status") != "success" or not result.get("video_path"):
+                    future.set_result(dict(result))
+                    return
+
+                generator = result.get("generator", "mock")
+                suffix = self.FILENAME_SUFFIXES.get(generator, "")
+                video_path = os.path.join(output_dir, f"{scene['id']}{suffix}.mp4")
+                if os.path.abspath(video_path) != os.path.abspath(result["video_path"]):
+                    os.makedirs(output_dir, exist_ok=True)
+                    if os.path.exists(video_path):
+                        os.remove(video_path)
+                    try:
+                        os.link(result["video_path"], video_path)
+                    except OSError:
+                        shutil.copyfile(result["video_path"], video_path)
+
+                shared = {
+                    "status": "success",
+                    "video_path": video_path,
+                    "generator": generator,
+                    "duplicate_of": representative_id
+                }
+                if result.get("poster"):
+                    poster_path = poster_path_for(video_path)
+                    if os.path.abspath(poster_path) != os.path.abspath(result["poster"]):
+                        shutil.copyfile(result["poster"], poster_path)
+                    shared.update(poster=poster_path, width=result.get("width"), height=result.get("height"))
+                future.set_result(shared)
             except Exception as e:
-                self.logger.error(f"场景 {scene.get('id', 'unknown')} 视频生成失败: {str(e)}")
-                results[scene.get('id', 'unknown')] = {
+                self.logger.error("场景 %s 复用视频失败: %s", scene['id'], e)
+                future.set_result({
                     "status": "failed",
                     "error": str(e),
                     "video_path": None
-                }
+                })
 
-        return results
+        representative_future.add_done_callback(share)
+        return future
 
-    def _generate_with_kling(self, scene: Dict, output_dir: str) -> Dict:
-        """使用Kling AI生成视频"""
+    def _attach_poster(self, future: Future) -> Future:
+        """视频就绪后在封面进程池中提取封面，返回带封面与宽高的结果Future"""
 
-        # 如果没有配置API密钥，使用模拟生成
-        if not self.kling_api_key or self.kling_api_key == "your_kling_api_key_here":
-            self.logger.warning("未配置Kling API密钥，使用模拟视频生成")
-            return self._generate_mock_video(scene, output_dir)
+        if self.posters is None:
+            return future
+
+        outer = Future()
 
+        def on_video(f: Future):
+            if f.exception() is not None:
+                outer.set_exception(f.exception())
+                return
+            result = f.result()
+            # 模拟视频不是真正的视频文件
+            if result.get("status") != "success" or not result.get("video_path") \
+                    or result.get("generator") == "mock":
+                outer.set_result(result)
+                return
+            try:
+                poster_future = self.posters.submit(result["video_path"])
+            except Exception as e:
+                self.logger.warning("提交封面提取失败: %s", e)
+                outer.set_result(result)
+                return
+            poster_future.add_done_callback(lambda p: outer.set_result(self._merge_poster(result, p)))
+
+        future.add_done_callback(on_video)
+        return outer
+
+    def _merge_poster(self, result: Dict, poster_future: Future) -> Dict:
         try:
-            headers = {
-                "Authorization": f"Bearer {self.kling_api_key}",
-                "Content-Type": "application/json"
-            }
+            poster = poster_future.result()
+        except Exception as e:
+            self.logger.warning("视频封面提取失败 %s: %s", result['video_path'], e)
+            return result
+        return dict(result, **poster)
 
-            data = {
-                "prompt": scene["prompt"],
-                "duration": scene["duration"],
-                "style": scene["style"],
-                "resolution": scene.get("resolution", "1920x1080"),
-                "fps": scene.get("fps", 30)
-            }
+    def _submit_new(self, scene: Dict, output_dir: str) -> Future:
+        """提交场景的实际生成"""
+
+        if not self.concurrent:
+            start = time.perf_counter()
+            future = Future()
+            future.set_result(self._generate_scene(scene, output_dir))
+            self._observe_scene(scene, output_dir, future, start)
+            return future
+
+        self._pending_slots.acquire()
+        start = time.perf_counter()
+
+        try:
+            backend = self._select_backend(scene)
+            if backend == "kling" and "id" in scene:
+                self.logger.info("开始生成场景 %s 的视频", scene['id'])
+                cached = self._lookup_cache(scene, backend, output_dir)
+                if cached is not None:
+                    future = Future()
+                    future.set_result(cached)
+                else:
+                    future = self._get_tracker().submit(scene, output_dir)
+                    future.add_done_callback(
+                        lambda f, scene=scene: f.exception() is None and self._store_in_cache(scene, f.result()))
+            else:
+                executors = self._get_executors()
+                executor = executors.get(backend, executors["mock"])
+                future = executor.submit(self._generate_scene, scene, output_dir)
+        except Exception:
+            self._pending_slots.release()
+            raise
+
+        future.add_done_callback(lambda f: self._pending_slots.release())
+        future.add_done_callback(lambda f: self._observe_scene(scene, output_dir, f, start))
+        return future
+
+    def _observe_scene(self, scene: Dict, output_dir: str, future: Future, start: float):
+        """记录单个场景从开始生成到结果就绪的耗时"""
+
+        result = future.result() if future.exception() is None else {"status": "failed"}
+        self.metrics.observe(
+            "scene", time.perf_counter() - start,
+            scene=scene.get("id"), document=output_dir,
+            backend=result.get("generator", "none"), status=result.get("status"),
+            cached="true" if result.get("cached") else "false"
+        )
+
+    def close(self):
+        """等待已提交的场景完成，并关闭线程池和封面进程池"""
+
+        with self._pool_lock:
+            tracker, executors = self._tracker, self._executors
+            self._tracker, self._executors = None, None
+
+        if tracker is not None:
+            tracker.close()
+        for executor in (executors or {}).values():
+            executor.shutdown(wait=True)
+        self.renderer.close()
+        if self.posters is not None:
+            self.posters.close()
+
+    def _get_executors(self) -> Dict[str, ThreadPoolExecutor]:
+        """获取各后端的线程池（首次使用时创建，之后在多次调用间共享）"""
+
+        with self._pool_lock:
+            if self._executors is None:
+                # 每个后端使用独立的线程池，池大小即该后端的并发上限
+                self._executors = {
+                    backend: ThreadPoolExecutor(max_workers=max(1, limit),
+                                                thread_name_prefix=f"video_{backend}")
+                    for backend, limit in self.backend_concurrency.items()
+                }
+            return self._executors
+
+    def _get_tracker(self) -> KlingJobTracker:
+        """获取共享的Kling任务追踪器"""
+
+        executors = self._get_executors()
+        with self._pool_lock:
+            if self._tracker is None:
+                # Kling任务集中提交，由单一线程统一轮询
+                self._tracker = KlingJobTracker(self, executors["kling"])
+            return self._tracker
+
+    def _get_journal(self, output_dir: str) -> Optional[JobJournal]:
+        """获取输出目录的Kling任务日志（每个目录一个，在多次调用间共享）"""
+
+        if not self.use_journal:
+            return None
+
+        with self._pool_lock:
+            journal = self._journals.get(output_dir)
+            if journal is None:
+                try:
+                    journal = JobJournal(output_dir)
+                except OSError as e:
+                    self.logger.warning(f"Kling任务日志不可用: {str(e)}")
+                    return None
+                self._journals[output_dir] = journal
+            return journal
+
+    def _select_backend(self, scene: Dict) -> str:
+        """根据场景类型选择生成后端"""
+
+        scene_type = scene.get("type", "narrative")
+
+        if scene_type == "narrative" and self._kling_configured():
+            return "kling"
+        elif scene_type == "technical" and self._manim_available():
+            return "manim"
+        return "mock"
+
+    def _manim_available(self) -> bool:
+        """是否可以使用Manim渲染，未安装时只警告一次"""
+
+        if self._manim_installed:
+            return True
+        with self._pool_lock:
+            warn, self._manim_warned = not self._manim_warned, True
+        if warn:
+            self.logger.warning("未安装manim，技术场景使用模拟视频生成")
+        return False
+
+    def _kling_configured(self) -> bool:
+        """是否配置了Kling API密钥"""
+        return bool(self.kling_api_key) and self.kling_api_key != "your_kling_api_key_here"
+
+    def _generate_scene(self, scene: Dict, output_dir: str) -> Dict:
+        """生成单个场景的视频，异常不会影响其他场景"""
 
-            # 发送生成请求
-            response = requests.post(self.kling_api_url, headers=headers, json=data)
-            response.raise_for_status()
+        try:
+            scene_id = scene["id"]
+            scene_type = scene.get("type", "narrative")
 
-            result = response.json()
-            video_id = result.get("video_id")
+            self.logger.info("开始生成场景 %s 的视频", scene_id)
 
-            if not video_id:
-                raise Exception("API未返回视频ID")
+            cached = self._lookup_cache(scene, self._select_backend(scene), output_dir)
+            if cached is not None:
+                return cached
 
-            # 等待视频生成完成
-            video_url = self._wait_for_video_completion(video_id)
+            if scene_type == "narrative":
+                # 叙事性场景使用Kling AI
+                result = self._generate_with_kling(scene, output_dir)
+            elif scene_type == "technical":
+                # 技术性场景使用Manim
+                result = self._generate_with_manim(scene, output_dir)
+            else:
+                # 默认使用模拟生成
+                result = self._generate_mock_video(scene, output_dir)
 
-            # 下载视频
-            video_path = self._download_video(video_url, scene["id"], output_dir)
+            self._store_in_cache(scene, result)
+            return result
 
+        except Exception as e:
+            self.logger.error("场景 %s 视频生成失败: %s", scene.get('id', 'unknown'), e)
             return {
-                "status": "success",
-                "video_path": video_path,
-                "video_id": video_id
+                "status": "failed",
+                "error": str(e),
+                "video_path": None
             }
 
+    def _output_path(self, output_dir: str, scene_id: str, generator: str) -> str:
+        """
+        计算视频输出路径
+
+        已存在的文件会先删除，避免原地覆盖写入与缓存条目硬链接共享的文件
+        """
+
+        video_path = os.path.join(output_dir, f"{scene_id}{self.FILENAME_SUFFIXES[generator]}.mp4")
+        if os.path.exists(video_path):
+            os.remove(video_path)
+        return video_path
+
+    def _lookup_cache(self, scene: Dict, backend: str, output_dir: str) -> Optional[Dict]:
+        """查询视频缓存，命中时返回结果字典；模拟视频不缓存"""
+
+        if self.cache is None or backend == "mock":
+            return None
+
+        try:
+            key = self._cache_key(scene, backend)
+            video_path = os.path.join(output_dir, f"{scene['id']}{self.FILENAME_SUFFIXES[backend]}.mp4")
+            hit = self.cache.get(key, video_path)
+        except Exception as e:
+            self.logger.warning("读取视频缓存失败: %s", e)
+            return None
+
+        self.metrics.increment("cache_lookups", cache="video", result="hit" if hit else "miss")
+        if not hit:
+            return None
+
+        self.logger.info("场景 %s 命中视频缓存", scene['id'])
+        return {
+            "status": "success",
+            "video_path": video_path,
+            "generator": backend,
+            "cached": True
+        }
+
+    def _store_in_cache(self, scene: Dict, result: Dict):
+        """
+        把真实后端成功生成的视频存入缓存
+
+        模拟视频（包括Kling、Manim失败后的降级结果）只是占位，不存入缓存，
+        否则后端恢复后相同场景仍会一直命中占位视频。
+        """
+
+        if self.cache is None or result.get("status") != "success" or not result.get("video_path") \
+                or result.get("generator") == "mock":
+            return
+
+        try:
+            key = self._cache_key(scene, result["generator"])
+            self.cache.put(key, result["video_path"])
         except Exception as e:
-            self.logger.error(f"Kling API生成视频失败: {str(e)}")
+            self.logger.warning("写入视频缓存失败: %s", e)
+
+    def _cache_key(self, scene: Dict, backend: str) -> str:
+        """Manim视频按渲染脚本与渲染参数缓存，其他后端按场景参数缓存"""
+
+        if backend == "manim":
+            return self.cache.make_script_key(backend, self.renderer.build_script(scene),
+                                              self.renderer.render_options(scene))
+        return self.cache.make_key(backend, scene)
+
+    def _generate_with_kling(self, scene: Dict, output_dir: str) -> Dict:
+        """使用Kling AI生成视频"""
+
+        # 如果没有配置API密钥，使用模拟生成
+        if not self._kling_configured():
+            self.logger.warning("未配置Kling API密钥，使用模拟视频生成")
+            self.metrics.increment("fallbacks", stage="generate", backend="kling", reason="no_api_key")
             return self._generate_mock_video(scene, output_dir)
 
+        # 单个场景同样通过任务追踪器完成提交、轮询与下载
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="video_kling") as executor:
+            tracker = KlingJobTracker(self, executor)
+            future = tracker.submit(scene, output_dir)
+            tracker.close()
+            return future.result()
+
+    def _submit_kling_job(self, scene: Dict) -> str:
+        """提交Kling生成任务，返回视频ID"""
+
+        headers = {
+            "Authorization": f"Bearer {self.kling_api_key}",
+            "Content-Type": "application/json"
+        }
+
+        data = {
+            "prompt": scene["prompt"],
+            "duration": scene["duration"],
+            "style": scene["style"],
+            "resolution": scene.get("resolution", "1920x1080"),
+            "fps": scene.get("fps", 30)
+        }
+
+        # 发送生成请求
+        response = self.http.post(self.kling_api_url, endpoint="kling", headers=headers, json=data)
+        response.raise_for_status()
+
+        result = response.json()
+        video_id = result.get("video_id")
+
+        if not video_id:
+            raise Exception("API未返回视频ID")
+
+        return video_id
+
+    def _query_kling_status(self, video_id: str) -> requests.Response:
+        """查询Kling任务状态，返回原始响应"""
+
+        status_url = f"{self.kling_api_url}/{video_id}/status"
+        headers = {"Authorization": f"Bearer {self.kling_api_key}"}
+
+        # 状态查询的重试与退避由任务追踪器负责
+        return self.http.get(status_url, endpoint="kling_status", retries=0, headers=headers)
+
     def _generate_with_manim(self, scene: Dict, output_dir: str) -> Dict:
         """使用Manim生成技术性视频"""
 
-        try:
-            # 这里应该调用Manim来生成技术视频
-            # 由于Manim需要复杂的配置，这里先用模拟实现
-
-            self.logger.info(f"使用Manim生成技术视频: {scene['prompt']}")
+        if not self._manim_available():
+            self.metrics.increment("fallbacks", stage="generate", backend="manim", reason="not_installed")
+            return self._generate_mock_video(scene, output_dir)
 
-            # 模拟Manim视频生成过程
-            time.sleep(2)  # 模拟生成时间
+        try:
+            if self.scheduler.admit(scene, output_dir, "manim") != "manim":
+                return self._generate_mock_video(scene, output_dir)
 
-            # 创建一个模拟的视频文件
-            video_filename = f"{scene['id']}_manim.mp4"
-            video_path = os.path.join(output_dir, video_filename)
+            self.logger.info("使用Manim生成技术视频: %s", scene['prompt'])
 
-            # 创建一个空的视频文件作为占位符
-            with open(video_path, 'w') as f:
-                f.write(f"# Manim 生成的视频占位符\n# 场景: {scene['prompt']}\n")
+            # 提示词转换为Manim脚本，在渲染子进程中渲染
+            video_path = self._output_path(output_dir, scene['id'], "manim")
+            with self.metrics.span("render", backend="manim", scene=scene['id'], document=output_dir):
+                self.renderer.render(scene, video_path)
 
             return {
                 "status": "success",
                 "video_path": video_path,
-                "generator": "manim"
+                "generator": "manim",
+                "quality": self.renderer.quality
             }
 
         except Exception as e:
-            self.logger.error(f"Manim生成视频失败: {str(e)}")
+            self.logger.error("Manim生成视频失败: %s", e)
+            self.metrics.increment("fallbacks", stage="generate", backend="manim", reason="render_error")
             return self._generate_mock_video(scene, output_dir)
 
     def _generate_mock_video(self, scene: Dict, output_dir: str) -> Dict:
         """生成模拟视频（用于测试）"""
 
         try:
-            self.logger.info(f"生成模拟视频: {scene['prompt']}")
+            self.logger.info("生成模拟视频: %s", scene['prompt'])
 
             # 模拟视频生成时间
-            time.sleep(1)
+            with self.metrics.span("render", backend="mock", scene=scene['id'], document=output_dir):
+                time.sleep(Config.MOCK_VIDEO_DELAY)
 
             # 创建模拟视频文件
-            video_filename = f"{scene['id']}_mock.mp4"
-            video_path = os.path.join(output_dir, video_filename)
+            video_path = self._output_path(output_dir, scene['id'], "mock")
 
             # 创建一个简单的HTML视频占位符
             mock_content = f"""
@@ -170,55 +654,19 @@ class VideoGenerator:
             }
 
         except Exception as e:
-            self.logger.error(f"模拟视频生成失败: {str(e)}")
+            self.logger.error("模拟视频生成失败: %s", e)
             return {
                 "status": "failed",
                 "error": str(e),
                 "video_path": None
             }
 
-    def _wait_for_video_completion(self, video_id: str, timeout: int = 300) -> str:
-        """等待视频生成完成"""
-
-        start_time = time.time()
-
-        while time.time() - start_time < timeout:
-            try:
-                # 查询视频状态
-                status_url = f"{self.kling_api_url}/{video_id}/status"
-                headers = {"Authorization": f"Bearer {self.kling_api_key}"}
-
-                response = requests.get(status_url, headers=headers)
-                response.raise_for_status()
-
-                result = response.json()
-                status = result.get("status")
-
-                if status == "completed":
-                    return result.get("video_url")
-                elif status == "failed":
-                    raise Exception(f"视频生成失败: {result.get('error', 'Unknown error')}")
-
-                time.sleep(10)  # 等待10秒后再次查询
-
-            except Exception as e:
-                self.logger.error(f"查询视频状态失败: {str(e)}")
-                time.sleep(10)
-
-        raise Exception("视频生成超时")
-
     def _download_video(self, video_url: str, scene_id: str, output_dir: str) -> str:
         """下载视频文件"""
 
-        video_filename = f"{scene_id}.mp4"
-        video_path = os.path.join(output_dir, video_filename)
-
-        response = requests.get(video_url, stream=True)
-        response.raise_for_status()
-
-        with open(video_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        video_path = self._output_path(output_dir, scene_id, "kling")
+        with self.metrics.span("download", scene=scene_id, document=output_dir):
+            self.downloader.download(video_url, video_path)
 
-        self.logger.info(f"视频下载完成: {video_path}")
+        self.logger.info("视频下载完成: %s", video_path)
         return video_path
\ No newline at end of file
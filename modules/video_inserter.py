@@ -2,10 +2,12 @@
 # modules/video_inserter.py - 视频插入模块
 # =============================================================================
 
-import re
 import os
-from typing import List, Dict
+from typing import Iterator, List, Dict, Mapping, Optional, TextIO, Tuple
+from config.config import Config
 from modules.logger import setup_logger
+from modules.scene_record import SceneRecord
+from modules.sentence_index import SentenceIndex
 
 
 class VideoInserter:
@@ -14,8 +16,9 @@ class VideoInserter:
     def __init__(self):
         self.logger = setup_logger()
 
-    def insert_videos(self, original_text: str, scenes: List[Dict],
-                      video_results: Dict[str, Dict], output_format: str = "html") -> str:
+    def insert_videos(self, original_text: str, scenes: List[SceneRecord],
+                      video_results: Dict[str, Dict], output_format: str = "html",
+                      index: Optional[SentenceIndex] = None) -> str:
         """
         将视频插入到原文中
 
@@ -24,42 +27,104 @@ class VideoInserter:
             scenes: 场景列表
             video_results: 视频生成结果
             output_format: 输出格式 (html/markdown)
+            index: 原文的句子索引，不提供时在此构建
 
         Returns:
             包含视频的最终内容
         """
 
         try:
-            if output_format == "html":
-                return self._insert_videos_html(original_text, scenes, video_results)
-            elif output_format == "markdown":
-                return self._insert_videos_markdown(original_text, scenes, video_results)
-            else:
-                raise ValueError(f"不支持的输出格式: {output_format}")
+            return "".join(self.iter_insert_videos(original_text, scenes, video_results,
+                                                   output_format, index))
 
         except Exception as e:
             self.logger.error(f"视频插入失败: {str(e)}")
             return original_text
 
-    def _insert_videos_html(self, original_text: str, scenes: List[Dict],
-                            video_results: Dict[str, Dict]) -> str:
-        """插入视频到HTML格式"""
+    def iter_insert_videos(self, original_text: str, scenes: List[SceneRecord],
+                           video_results: Mapping[str, Dict], output_format: str = "html",
+                           index: Optional[SentenceIndex] = None) -> Iterator[str]:
+        """
+        逐段产出插入视频后的内容，拼接结果与 insert_videos 相同
+
+        video_results 只需支持按场景ID取值，可以是尚在生成中的结果映射，
+        每段内容在其对应视频就绪后立即产出。出错时直接抛出异常。
+        """
+
+        if output_format == "html":
+            parts = self._iter_html_parts(original_text, scenes, video_results, index)
+        elif output_format == "markdown":
+            parts = self._iter_markdown_parts(original_text, scenes, video_results, index)
+        else:
+            raise ValueError(f"不支持的输出格式: {output_format}")
+
+        for i, part in enumerate(parts):
+            yield part if i == 0 else "\n" + part
 
-        # 将文本分割成句子
-        sentences = re.split(r'([。！？；])', original_text)
-        sentences = [s for s in sentences if s.strip()]
+    def write_videos(self, stream: TextIO, original_text: str, scenes: List[SceneRecord],
+                     video_results: Mapping[str, Dict], output_format: str = "html",
+                     index: Optional[SentenceIndex] = None, flush: bool = False) -> int:
+        """
+        逐段把插入视频后的内容写入文件对象，内存占用与文档长度无关
+
+        Args:
+            stream: 可写的文本文件对象
+            flush: 每段写入后是否立即刷新，便于边生成边查看结果
+            其余参数同 iter_insert_videos
 
-        # 重新组合句子，保持标点符号
-        reconstructed_sentences = []
-        for i in range(0, len(sentences), 2):
-            if i + 1 < len(sentences):
-                reconstructed_sentences.append(sentences[i] + sentences[i + 1])
-            else:
-                reconstructed_sentences.append(sentences[i])
+        Returns:
+            写入的字符数。出错时直接抛出异常，已写入的内容由调用方处理
+        """
+
+        written = 0
+        for chunk in self.iter_insert_videos(original_text, scenes, video_results, output_format, index):
+            written += stream.write(chunk)
+            if flush:
+                stream.flush()
+        return written
+
+    @staticmethod
+    def _scenes_by_position(scenes: List[SceneRecord], index: SentenceIndex) -> Dict[int, SceneRecord]:
+        """按所在句子归类场景：优先使用 start 偏移定位，没有偏移时使用 position"""
+
+        scenes_by_position = {}
+        for scene in scenes:
+            position = index.position_of(scene["start"]) if "start" in scene else None
+            scenes_by_position[position or scene["position"]] = scene
+        return scenes_by_position
+
+    @staticmethod
+    def _video_size(scene: SceneRecord, result: Dict) -> Tuple[int, int]:
+        """视频的宽高：优先使用从视频文件读取的值，否则使用场景的分辨率"""
+
+        if result.get("width") and result.get("height"):
+            try:
+                return int(result["width"]), int(result["height"])
+            except (TypeError, ValueError):
+                pass
+        # API返回的分辨率不一定是字符串
+        resolution = scene.get("resolution") or Config.DEFAULT_VIDEO_PARAMS["resolution"]
+        try:
+            width, height = (int(value) for value in str(resolution).lower().split("x"))
+        except ValueError:
+            width, height = (int(value) for value in Config.DEFAULT_VIDEO_PARAMS["resolution"].split("x"))
+        return width, height
+
+    @staticmethod
+    def _poster_attribute(result: Dict) -> str:
+        poster = result.get("poster")
+        return f' poster="{os.path.basename(poster)}"' if poster else ""
+
+    def _iter_html_parts(self, original_text: str, scenes: List[SceneRecord],
+                         video_results: Mapping[str, Dict],
+                         index: Optional[SentenceIndex] = None) -> Iterator[str]:
+        """逐段生成HTML内容"""
+
+        # 使用共享的句子索引，直接按偏移切取原文
+        index = index or SentenceIndex(original_text)
 
         # 创建HTML内容
-        html_parts = []
-        html_parts.append("""
+        yield """
 <!DOCTYPE html>
 <html lang="zh-CN">
 <head>
@@ -71,21 +136,21 @@ class VideoInserter:
         .content { max-width: 800px; margin: 0 auto; }
         .text-section { margin: 20px 0; font-size: 16px; }
         .video-section { margin: 30px 0; text-align: center; }
-        video { max-width: 100%; height: auto; border-radius: 8px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); }
+        video { max-width: 100%; height: auto; background: #000; border-radius: 8px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); }
         .video-caption { margin-top: 10px; font-size: 14px; color: #666; font-style: italic; }
     </style>
 </head>
 <body>
     <div class="content">
-        """)
+        """
 
         # 按位置排序场景
-        scenes_by_position = {scene["position"]: scene for scene in scenes}
+        scenes_by_position = self._scenes_by_position(scenes, index)
 
         # 插入文本和视频
-        for i, sentence in enumerate(reconstructed_sentences, 1):
+        for i, start, end in index:
             # 添加文本段落
-            html_parts.append(f'        <div class="text-section">{sentence.strip()}</div>')
+            yield f'        <div class="text-section">{original_text[start:end]}</div>'
 
             # 检查是否有对应位置的视频
             if i in scenes_by_position:
@@ -96,50 +161,58 @@ class VideoInserter:
                     result = video_results[scene_id]
                     if result["status"] == "success" and result["video_path"]:
                         video_filename = os.path.basename(result["video_path"])
+                        width, height = self._video_size(scene, result)
 
-                        html_parts.append(f"""
+                        # preload="none"：页面加载时不请求视频，接近可视区域时才加载元数据
+                        yield f"""
         <div class="video-section">
-            <video controls>
+            <video class="lazy-video" controls preload="none" playsinline width="{width}" height="{height}"{self._poster_attribute(result)}>
                 <source src="{video_filename}" type="video/mp4">
                 您的浏览器不支持视频播放。
             </video>
             <div class="video-caption">场景: {scene["prompt"]}</div>
-        </div>""")
+        </div>"""
 
-        html_parts.append("""
+        yield """
     </div>
+    <script>
+        (function () {
+            var videos = document.querySelectorAll("video.lazy-video");
+            if (!("IntersectionObserver" in window)) {
+                return;
+            }
+            var observer = new IntersectionObserver(function (entries) {
+                entries.forEach(function (entry) {
+                    if (entry.isIntersecting) {
+                        entry.target.preload = "metadata";
+                        observer.unobserve(entry.target);
+                    }
+                });
+            }, { rootMargin: "300px 0px" });
+            videos.forEach(function (video) { observer.observe(video); });
+        })();
+    </script>
 </body>
-</html>""")
-
-        return "\n".join(html_parts)
+</html>"""
 
-    def _insert_videos_markdown(self, original_text: str, scenes: List[Dict],
-                                video_results: Dict[str, Dict]) -> str:
-        """插入视频到Markdown格式"""
+    def _iter_markdown_parts(self, original_text: str, scenes: List[SceneRecord],
+                             video_results: Mapping[str, Dict],
+                             index: Optional[SentenceIndex] = None) -> Iterator[str]:
+        """逐段生成Markdown内容"""
 
-        # 将文本分割成句子
-        sentences = re.split(r'([。！？；])', original_text)
-        sentences = [s for s in sentences if s.strip()]
-
-        # 重新组合句子
-        reconstructed_sentences = []
-        for i in range(0, len(sentences), 2):
-            if i + 1 < len(sentences):
-                reconstructed_sentences.append(sentences[i] + sentences[i + 1])
-            else:
-                reconstructed_sentences.append(sentences[i])
+        # 使用共享的句子索引，直接按偏移切取原文
+        index = index or SentenceIndex(original_text)
 
         # 创建Markdown内容
-        md_parts = []
-        md_parts.append("# 文本配视频内容\n")
+        yield "# 文本配视频内容\n"
 
         # 按位置排序场景
-        scenes_by_position = {scene["position"]: scene for scene in scenes}
+        scenes_by_position = self._scenes_by_position(scenes, index)
 
         # 插入文本和视频
-        for i, sentence in enumerate(reconstructed_sentences, 1):
+        for i, start, end in index:
             # 添加文本段落
-            md_parts.append(f"{sentence.strip()}\n")
+            yield f"{original_text[start:end]}\n"
 
             # 检查是否有对应位置的视频
             if i in scenes_by_position:
@@ -150,15 +223,15 @@ class VideoInserter:
                     result = video_results[scene_id]
                     if result["status"] == "success" and result["video_path"]:
                         video_filename = os.path.basename(result["video_path"])
+                        width, height = self._video_size(scene, result)
 
-                        md_parts.append(f"""
-<video controls width="100%">
+                        # 固定宽高比预留位置，内联样式让视频随页面宽度缩放
+                        yield f"""
+<video controls preload="none" width="{width}" height="{height}" style="max-width: 100%; height: auto;"{self._poster_attribute(result)}>
   <source src="{video_filename}" type="video/mp4">
   您的浏览器不支持视频播放。
 </video>
 
 *场景: {scene["prompt"]}*
 
-""")
-
-        return "\n".join(md_parts)
\ No newline at end of file
+"""
\ No newline at end of file
@@ -0,0 +1,111 @@
+# =============================================================================
+# tests/conftest.py - 测试公共夹具
+# =============================================================================
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录与 benchmarks 目录（模拟服务）到路径
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from config.config import Config
+from fake_server import FakeApiServer
+from modules.scene_record import SceneRecord
+
+
+# 测试用的模拟服务参数：接口无延迟，Kling任务约0.2秒完成，视频文件很小
+FAST_PROFILE = {
+    "deepseek": {"latency": (0, 0)},
+    "kling": {"latency": (0, 0)},
+    "kling_status": {"latency": (0, 0)},
+    "download": {"latency": (0, 0)},
+    "kling_job": {"duration": (0.2, 0), "failure_rate": 0.0},
+    "video_size": 4096
+}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _work_dir(tmp_path_factory):
+    """在临时目录中运行，日志与缓存不写入项目目录"""
+
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("work"))
+    yield
+    os.chdir(previous)
+
+
+@pytest.fixture(autouse=True)
+def config():
+    """每个测试结束后恢复 Config 的配置项"""
+
+    saved = {key: value for key, value in vars(Config).items() if not key.startswith("__")}
+    Config.MOCK_VIDEO_DELAY = 0
+    Config.POSTER_ENABLED = False
+    Config.VIDEO_CACHE_ENABLED = False
+    Config.SCENE_CACHE_ENABLED = False
+    yield Config
+    for key in [key for key in vars(Config) if not key.startswith("__")]:
+        if key not in saved:
+            delattr(Config, key)
+    for key, value in saved.items():
+        setattr(Config, key, value)
+
+
+@pytest.fixture
+def make_server():
+    """启动模拟服务，profile 覆盖 FAST_PROFILE 中的参数；测试结束时全部停止"""
+
+    servers = []
+
+    def start(profile=None):
+        merged = {key: dict(value) if isinstance(value, dict) else value for key, value in FAST_PROFILE.items()}
+        for key, value in (profile or {}).items():
+            if isinstance(value, dict):
+                merged[key].update(value)
+            else:
+                merged[key] = value
+        server = FakeApiServer(profile=merged, seed=1)
+        server.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def kling_server(make_server, config):
+    """Kling接口指向模拟服务，轮询间隔缩短到测试尺度"""
+
+    def start(profile=None):
+        server = make_server(profile)
+        config.KLING_API_KEY = "test_key"
+        config.KLING_API_URL = f"{server.base_url}/v1/videos/generate"
+        config.KLING_POLL_INITIAL_INTERVAL = 0.05
+        config.KLING_POLL_MAX_INTERVAL = 0.5
+        return server
+
+    return start
+
+
+@pytest.fixture
+def make_scenes():
+    """生成指定数量的场景，提示词互不相似（不触发近似去重）"""
+
+    return _make_scenes
+
+
+def _make_scenes(count, scene_type="narrative"):
+    prompts = ["林则徐站在虎门海滩", "工人搬运装满鸦片的木桶", "石灰倒入销烟池", "浓烟从池中升起",
+               "官员检查销毁结果", "百姓在岸边围观"]
+    return [
+        SceneRecord(id=f"scene_{i:03d}", prompt=prompts[(i - 1) % len(prompts)], position=i,
+                    duration=5, style="realistic", type=scene_type)
+        for i in range(1, count + 1)
+    ]
@@ -0,0 +1,92 @@
+# =============================================================================
+# tests/test_downloader.py - 可续传下载测试
+# =============================================================================
+
+import hashlib
+import json
+import os
+
+import pytest
+
+from modules.downloader import Downloader
+from modules.http_client import HttpClient
+
+
+class RecordingClient(HttpClient):
+    """记录每次请求的 Range 头"""
+
+    def __init__(self):
+        super().__init__(rate_limits={})
+        self.ranges = []
+
+    def get(self, url, **kwargs):
+        self.ranges.append(kwargs.get("headers", {}).get("Range"))
+        return super().get(url, **kwargs)
+
+
+@pytest.fixture
+def server(make_server):
+    return make_server({"video_size": 4000})
+
+
+def make_downloader(client, **kwargs):
+    return Downloader(http_client=client, chunk_size=256, segments=4, segment_min_size=1000, **kwargs)
+
+
+def video_url(server):
+    return f"{server.base_url}/v1/videos/files/video_000001.mp4"
+
+
+def test_download_resumes_from_part_file(server, tmp_path):
+    dest = str(tmp_path / "scene_001.mp4")
+
+    # 第一次下载时第3段中断，其余分段完成
+    downloader = make_downloader(RecordingClient(), max_attempts=1)
+    download_segment = downloader._download_segment
+
+    def interrupted(url, part_file, state_file, state, segment, lock):
+        if segment[0] == 2000:
+            raise ValueError("连接中断")
+        download_segment(url, part_file, state_file, state, segment, lock)
+
+    downloader._download_segment = interrupted
+    with pytest.raises(ValueError):
+        downloader.download(video_url(server), dest)
+    assert not os.path.exists(dest)
+    with open(f"{dest}.part.json", encoding="utf-8") as f:
+        assert [segment[2] for segment in json.load(f)["segments"]] == [1000, 1000, 0, 1000]
+
+    # 再次下载只请求未完成的分段
+    client = RecordingClient()
+    sha256 = hashlib.sha256(server.video).hexdigest()
+    assert make_downloader(client).download(video_url(server), dest, sha256=sha256) == dest
+
+    assert client.ranges == ["bytes=0-0", "bytes=2000-2999"]
+    with open(dest, 'rb') as f:
+        assert f.read() == server.video
+    assert sorted(os.listdir(tmp_path)) == ["scene_001.mp4"]
+
+
+def test_progress_for_another_file_is_discarded(server, tmp_path):
+    dest = str(tmp_path / "scene_001.mp4")
+    with open(f"{dest}.part", 'wb') as f:
+        f.write(b"\0" * 4000)
+    with open(f"{dest}.part.json", 'w', encoding="utf-8") as f:
+        json.dump({"url": "http://old/video.mp4", "size": 4000, "etag": None,
+                   "segments": [[0, 3999, 2000]]}, f)
+
+    client = RecordingClient()
+    make_downloader(client).download(video_url(server), dest)
+
+    assert len(client.ranges) == 5
+    with open(dest, 'rb') as f:
+        assert f.read() == server.video
+
+
+def test_checksum_mismatch_leaves_no_files(server, tmp_path):
+    dest = str(tmp_path / "scene_001.mp4")
+
+    with pytest.raises(ValueError):
+        make_downloader(RecordingClient()).download(video_url(server), dest, sha256="0" * 64)
+
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,65 @@
+# =============================================================================
+# tests/test_incremental.py - 增量构建测试
+# =============================================================================
+
+import json
+import os
+
+from modules.http_client import HttpClient
+from modules.logger import setup_logger
+from modules.pipeline import process_document
+from modules.text_analyzer import TextAnalyzer
+from modules.video_generator import VideoGenerator
+from modules.video_inserter import VideoInserter
+
+
+TEXT = "林则徐站在虎门海滩。天空很蓝。工人搬运木桶。官员走向销烟池。百姓站在岸边。"
+
+
+def run(text, output_dir):
+    generator = VideoGenerator(use_cache=False, use_dedup=False, use_journal=False,
+                               http_client=HttpClient(rate_limits={}))
+    try:
+        process_document(text, output_dir, "markdown", "incremental", TextAnalyzer(use_cache=False),
+                         generator, VideoInserter(), setup_logger())
+    finally:
+        generator.close()
+    with open(os.path.join(output_dir, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def submitted(server):
+    return server.snapshot()["stats"]["kling"]["200"]
+
+
+def videos(output_dir):
+    return sorted(name for name in os.listdir(output_dir) if name.endswith(".mp4"))
+
+
+def test_incremental_run_reuses_unchanged_scenes(kling_server, tmp_path):
+    server = kling_server()
+    output_dir = str(tmp_path / "out")
+
+    first = run(TEXT, output_dir)
+    assert submitted(server) == 4
+    assert videos(output_dir) == ["scene_001.mp4", "scene_002.mp4", "scene_003.mp4", "scene_004.mp4"]
+
+    # 未改动时不提交任何任务
+    assert run(TEXT, output_dir)["video_results"] == first["video_results"]
+    assert submitted(server) == 4
+
+    # 开头插入一句、改写一句：只为改动的句子生成视频，其余场景沿用原ID与视频
+    text = "1839年6月。" + TEXT.replace("工人搬运木桶", "工人搬运石灰")
+    second = run(text, output_dir)
+
+    assert submitted(server) == 5
+    positions = {scene["id"]: scene["position"] for scene in second["scenes"]}
+    assert positions == {"scene_001": 2, "scene_005": 4, "scene_003": 5, "scene_004": 6}
+    for scene_id in ("scene_001", "scene_003", "scene_004"):
+        assert second["video_results"][scene_id] == first["video_results"][scene_id]
+    # 被改写场景的视频已删除
+    assert videos(output_dir) == ["scene_001.mp4", "scene_003.mp4", "scene_004.mp4", "scene_005.mp4"]
+
+    with open(os.path.join(output_dir, "result.md"), encoding="utf-8") as f:
+        result = f.read()
+    assert result.index("工人搬运石灰") < result.index("scene_005.mp4") < result.index("官员走向销烟池")
@@ -0,0 +1,63 @@
+# =============================================================================
+# tests/test_keyword_matcher.py - 多关键词匹配测试
+# =============================================================================
+
+import random
+import re
+
+import pytest
+
+from modules.keyword_matcher import KeywordMatcher
+from modules.text_analyzer import TextAnalyzer
+
+
+KEYWORDS = ["站在", "站在桌", "在桌前", "走向", "搬运", "he", "she", "hers"]
+
+TEXT = "他站在桌前。ushers 走向门口。工人搬运货物！天空很蓝；她站在桌边？"
+
+
+def old_rule_scenes(text, keywords):
+    """原有的规则提取：逐句切分后对每个关键词做子串查找"""
+
+    scenes = []
+    for i, sentence in enumerate(re.split(r'[。！？；]', text)):
+        sentence = sentence.strip()
+        if sentence and any(keyword in sentence for keyword in keywords):
+            scenes.append({"id": f"scene_{len(scenes) + 1:03d}", "prompt": sentence, "position": i + 1})
+    return scenes
+
+
+@pytest.mark.parametrize("automaton_min", [0, 1000], ids=["automaton", "substrings"])
+def test_scan_finds_overlapping_hits(automaton_min):
+    matcher = KeywordMatcher(KEYWORDS, automaton_min=automaton_min)
+
+    hits = sorted(matcher.scan(TEXT))
+
+    expected = sorted((m.start(), m.start() + len(k), k)
+                      for k in KEYWORDS for m in re.finditer(f"(?={re.escape(k)})", TEXT))
+    assert hits == expected
+
+
+def test_strategy_follows_keyword_count(config):
+    config.RULE_KEYWORDS_AUTOMATON_MIN = 5
+
+    assert not KeywordMatcher(KEYWORDS[:4]).use_automaton
+    assert KeywordMatcher(KEYWORDS).use_automaton
+
+
+@pytest.mark.parametrize("automaton_min", [0, 1000], ids=["automaton", "substrings"])
+def test_rule_extraction_matches_old_rule_path(automaton_min, config):
+    rng = random.Random(7)
+    words = config.RULE_KEYWORDS + ["天空", "河流", "远处", "一只鸟", "静静地"]
+    sentences = ["".join(rng.choice(words) for _ in range(rng.randint(1, 4))) + rng.choice("。！？；")
+                 for _ in range(300)]
+    text = "".join(sentences)
+    analyzer = TextAnalyzer(use_cache=False,
+                            keyword_matcher=KeywordMatcher(config.RULE_KEYWORDS, automaton_min=automaton_min))
+
+    scenes = analyzer._extract_scenes_by_rules(text)
+
+    assert [{"id": s["id"], "prompt": s["prompt"], "position": s["position"]} for s in scenes] \
+        == old_rule_scenes(text, config.RULE_KEYWORDS)
+    for scene in scenes:
+        assert text[scene["start"]:scene["end"]].startswith(scene["prompt"])
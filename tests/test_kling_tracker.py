@@ -0,0 +1,135 @@
+# =============================================================================
+# tests/test_kling_tracker.py - Kling任务追踪器测试
+# =============================================================================
+
+import os
+import threading
+import time
+
+import pytest
+import requests
+
+from modules.http_client import HttpClient
+from modules.job_journal import JobJournal
+from modules.video_generator import VideoGenerator
+
+
+# 串行模式每个场景单独建立追踪器，并行模式共用一个追踪器
+MODES = pytest.mark.parametrize("concurrent", [False, True], ids=["serial", "parallel"])
+
+
+def make_generator(concurrent, **kwargs):
+    kwargs.setdefault("use_journal", False)
+    return VideoGenerator(concurrent=concurrent, use_cache=False, use_dedup=False,
+                          http_client=HttpClient(rate_limits={}), **kwargs)
+
+
+def generate(generator, scenes, output_dir, timeout=15):
+    """在线程中生成视频，超时视为挂起"""
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(generator.generate_videos(scenes, output_dir)),
+                              daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "视频生成未在超时前结束"
+    generator.close()
+    return results[0]
+
+
+@MODES
+def test_polls_until_completed(kling_server, make_scenes, tmp_path, concurrent):
+    server = kling_server()
+    scenes = make_scenes(3)
+
+    results = generate(make_generator(concurrent), scenes, str(tmp_path))
+
+    for scene in scenes:
+        result = results[scene["id"]]
+        assert result["generator"] == "kling"
+        assert os.path.getsize(result["video_path"]) == server.profile["video_size"]
+    # 任务约0.2秒完成，首次查询时仍在处理中，每个任务至少查询两次
+    stats = server.snapshot()["stats"]
+    assert stats["kling"]["200"] == len(scenes)
+    assert stats["kling_status"]["200"] >= 2 * len(scenes)
+
+
+@MODES
+def test_failed_job_falls_back_to_mock(kling_server, make_scenes, tmp_path, concurrent):
+    kling_server({"kling_job": {"failure_rate": 1.0}})
+
+    results = generate(make_generator(concurrent), make_scenes(2), str(tmp_path))
+
+    assert {result["generator"] for result in results.values()} == {"mock"}
+
+
+@MODES
+def test_poll_interval_backs_off(kling_server, make_scenes, tmp_path, concurrent, config):
+    config.KLING_POLL_BACKOFF = 2
+    server = kling_server({"kling_job": {"duration": (1.0, 0)}})
+
+    results = generate(make_generator(concurrent), make_scenes(1), str(tmp_path))
+
+    assert results["scene_001"]["generator"] == "kling"
+    # 间隔 0.05 按倍数增长到 0.5 上限：1秒内约查询6次，不退避时约20次
+    polls = server.snapshot()["stats"]["kling_status"]["200"]
+    assert 3 <= polls <= 8
+
+
+@MODES
+def test_status_rate_limit_pauses_polling(kling_server, make_scenes, tmp_path, concurrent):
+    # 每秒只允许一次状态查询，超出时返回 429 与 Retry-After: 1
+    server = kling_server({"kling_status": {"rate_limit": 1}})
+
+    start = time.time()
+    results = generate(make_generator(concurrent), make_scenes(2), str(tmp_path))
+
+    assert {result["generator"] for result in results.values()} == {"kling"}
+    # 收到 429 后暂停到 Retry-After 指定的时间，而不是按轮询间隔继续查询
+    limited = server.snapshot()["stats"]["kling_status"].get("429", 0)
+    assert limited >= 1
+    assert limited <= time.time() - start + 2
+
+
+@MODES
+def test_resumed_job_requeries_expired_url(kling_server, make_scenes, tmp_path, concurrent):
+    server = kling_server()
+    output_dir = str(tmp_path)
+    scene = make_scenes(1)[0]
+
+    # 上次运行已提交并查询到完成，但记录的下载地址已失效
+    video_id = requests.post(f"{server.base_url}/v1/videos/generate", json={}).json()["video_id"]
+    journal = JobJournal(output_dir)
+    journal.record(scene, "submitted", video_id=video_id)
+    journal.record(scene, "completed", video_url=f"{server.base_url}/expired")
+
+    results = generate(make_generator(concurrent, use_journal=True), [scene], output_dir)
+
+    result = results[scene["id"]]
+    assert result["generator"] == "kling"
+    assert result["video_id"] == video_id
+    stats = server.snapshot()["stats"]
+    # 没有重新提交，按视频ID重新查询后下载
+    assert stats["kling"]["200"] == 1
+    assert stats["kling_status"]["200"] >= 1
+    assert JobJournal(output_dir).lookup(scene)["state"] == "downloaded"
+
+
+@MODES
+def test_unexpected_error_fails_only_its_scene(kling_server, make_scenes, tmp_path, concurrent):
+    kling_server()
+    generator = make_generator(concurrent)
+    scenes = make_scenes(3)
+    admit = generator.scheduler.admit
+
+    def broken_admit(scene, output_dir, backend):
+        if scene["id"] == "scene_002":
+            raise RuntimeError("调度出错")
+        return admit(scene, output_dir, backend)
+
+    generator.scheduler.admit = broken_admit
+    results = generate(generator, scenes, str(tmp_path))
+
+    assert results["scene_002"]["status"] == "failed"
+    assert "调度出错" in results["scene_002"]["error"]
+    assert results["scene_001"]["generator"] == results["scene_003"]["generator"] == "kling"
@@ -0,0 +1,90 @@
+# =============================================================================
+# tests/test_manim_renderer.py - Manim渲染测试
+# =============================================================================
+
+import os
+import time
+
+import pytest
+
+from modules.manim_renderer import ManimRenderer
+
+
+# 渲染子进程导入的假 manim 模块：只提供 tempconfig
+FAKE_MANIM = """import contextlib
+
+config = {}
+
+
+@contextlib.contextmanager
+def tempconfig(options):
+    config.update(options)
+    yield
+"""
+
+# 渲染脚本：记录进程号后按 SECONDS 休眠（同时启动一个孙进程），再写出视频
+SCRIPT = """import os, subprocess, time, types
+from manim import config
+
+
+class TechnicalScene:
+    def render(self):
+        child = subprocess.Popen(["sleep", "60"]) if {seconds} else None
+        with open({pid_file!r}, "w") as f:
+            f.write(f"{{os.getpid()}} {{child.pid if child else 0}}")
+        time.sleep({seconds})
+        path = os.path.join(config["media_dir"], "scene.mp4")
+        with open(path, "wb") as f:
+            f.write(b"video")
+        movie = types.SimpleNamespace(movie_file_path=path)
+        self.renderer = types.SimpleNamespace(file_writer=movie)
+"""
+
+
+def alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(") ")[1][0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.fixture
+def renderer(tmp_path, monkeypatch):
+    fake = tmp_path / "fake"
+    fake.mkdir()
+    (fake / "manim.py").write_text(FAKE_MANIM)
+    monkeypatch.setenv("PYTHONPATH", str(fake))
+    monkeypatch.setattr(ManimRenderer, "available", staticmethod(lambda: True))
+    return ManimRenderer(processes=1)
+
+
+def render(renderer, tmp_path, seconds):
+    pid_file = str(tmp_path / "pids")
+    output_path = str(tmp_path / "scene.mp4")
+    script = SCRIPT.format(seconds=seconds, pid_file=pid_file)
+    renderer.render({"prompt": "步骤"}, output_path, script)
+    return output_path
+
+
+def test_render_writes_video(renderer, tmp_path):
+    with open(render(renderer, tmp_path, 0), "rb") as f:
+        assert f.read() == b"video"
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="需要 /proc 检查进程状态")
+def test_timed_out_render_is_killed_and_frees_its_slot(renderer, tmp_path, config):
+    config.MANIM_RENDER_TIMEOUT = 1
+
+    start = time.time()
+    with pytest.raises(TimeoutError):
+        render(renderer, tmp_path, 60)
+    assert time.time() - start < 10
+
+    with open(tmp_path / "pids") as f:
+        pids = [int(pid) for pid in f.read().split()]
+    time.sleep(0.2)
+    assert not any(alive(pid) for pid in pids)
+
+    # 唯一的渲染名额已释放，下一次渲染可以正常完成
+    assert os.path.exists(render(renderer, tmp_path, 0))
@@ -0,0 +1,55 @@
+# =============================================================================
+# tests/test_pipeline.py - 文档处理流程测试
+# =============================================================================
+
+import os
+
+import pytest
+
+from config.config import Config
+from modules.http_client import HttpClient
+from modules.logger import setup_logger
+from modules.pipeline import process_document
+from modules.text_analyzer import TextAnalyzer
+from modules.video_generator import VideoGenerator
+from modules.video_inserter import VideoInserter
+
+
+TEXT = """1839年6月，林则徐站在虎门海滩上。
+工人搬运装满鸦片的木桶，把它们倒入销烟池！天空很蓝。
+石灰倒入池中，浓烟从池中升起；百姓在岸边围观。
+
+官员检查销毁结果？远处的海面很平静。"""
+
+
+def run(mode, output_dir, output_format="html"):
+    generator = VideoGenerator(use_cache=False, use_dedup=False, use_journal=False,
+                               http_client=HttpClient(rate_limits={}))
+    try:
+        return process_document(TEXT, output_dir, output_format, mode, TextAnalyzer(use_cache=False),
+                                 generator, VideoInserter(), setup_logger())
+    finally:
+        generator.close()
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("output_format", ["html", "markdown"])
+@pytest.mark.parametrize("use_deepseek", [False, True], ids=["rules", "deepseek"])
+def test_pipeline_output_equals_staged_output(kling_server, config, tmp_path, output_format, use_deepseek):
+    server = kling_server()
+    if use_deepseek:
+        # 流水线模式流式接收DeepSeek回复，分步模式一次性接收
+        config.DEEPSEEK_API_KEY = "test_key"
+        config.DEEPSEEK_API_URL = f"{server.base_url}/v1/chat/completions"
+
+    staged = run("staged", str(tmp_path / "staged"), output_format)
+    pipeline = run("pipeline", str(tmp_path / "pipeline"), output_format)
+
+    assert read(staged).count(b"<video") >= 3
+    assert server.snapshot()["stats"].get("deepseek", {}).get("200", 0) == (2 if use_deepseek else 0)
+    assert read(pipeline) == read(staged)
+    assert read(tmp_path / "pipeline" / Config.SCENES_FILE) == read(tmp_path / "staged" / Config.SCENES_FILE)
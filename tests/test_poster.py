@@ -0,0 +1,52 @@
+# =============================================================================
+# tests/test_poster.py - 视频封面提取测试
+# =============================================================================
+
+import os
+import subprocess
+
+import pytest
+
+from modules.poster import extract_poster, poster_path_for
+
+
+FFPROBE = """#!/bin/sh
+echo '{"streams": [{"width": 1280, "height": 720}], "format": {"duration": "5.0"}}'
+"""
+
+# 输出文件是最后一个参数：先写入部分内容，按 FAKE_FFMPEG_FAIL 决定是否失败
+FFMPEG = """#!/bin/sh
+for last; do :; done
+printf 'partial' > "$last"
+[ -z "$FAKE_FFMPEG_FAIL" ]
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, script in (("ffprobe", FFPROBE), ("ffmpeg", FFMPEG)):
+        path = bin_dir / name
+        path.write_text(script)
+        path.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return monkeypatch
+
+
+def test_extract_poster(fake_ffmpeg, tmp_path):
+    video = str(tmp_path / "scene_001.mp4")
+    poster = poster_path_for(video)
+
+    assert extract_poster(video, poster, 640) == {"poster": poster, "width": 1280, "height": 720}
+    assert sorted(os.listdir(tmp_path)) == ["bin", "scene_001.jpg"]
+
+
+def test_failed_extraction_leaves_no_temporary_file(fake_ffmpeg, tmp_path):
+    fake_ffmpeg.setenv("FAKE_FFMPEG_FAIL", "1")
+    video = str(tmp_path / "scene_001.mp4")
+
+    with pytest.raises(subprocess.CalledProcessError):
+        extract_poster(video, poster_path_for(video), 640)
+
+    assert os.listdir(tmp_path) == ["bin"]
@@ -0,0 +1,67 @@
+# =============================================================================
+# tests/test_scene_cache.py - 场景提取缓存测试
+# =============================================================================
+
+import os
+import time
+
+from modules.http_client import HttpClient
+from modules.scene_cache import SceneCache
+from modules.text_analyzer import TextAnalyzer
+
+
+TEXT = "林则徐站在虎门海滩。工人搬运木桶。"
+
+SCENES = [{"id": "scene_001", "prompt": "林则徐站在虎门海滩", "position": 1}]
+
+
+def test_repeated_extraction_hits_cache(make_server, config, tmp_path):
+    server = make_server()
+    config.DEEPSEEK_API_KEY = "test_key"
+    config.DEEPSEEK_API_URL = f"{server.base_url}/v1/chat/completions"
+    cache = SceneCache(str(tmp_path / "cache"))
+
+    def extract(text):
+        analyzer = TextAnalyzer(cache=cache, chunking=False, http_client=HttpClient(rate_limits={}))
+        # 字符偏移随文本重新锚定，不属于缓存内容
+        return [{k: v for k, v in scene.items() if k not in ("start", "end")}
+                for scene in analyzer.extract_scenes(text)]
+
+    first = extract(TEXT)
+    # 首尾空白不影响缓存键
+    assert extract(f"  {TEXT}\n") == first
+    assert server.snapshot()["stats"]["deepseek"]["200"] == 1
+
+    config.DEEPSEEK_TEMPERATURE = 0.2
+    extract(TEXT)
+    assert server.snapshot()["stats"]["deepseek"]["200"] == 2
+
+
+def test_eviction_keeps_pinned_and_recently_used_entries(tmp_path):
+    cache = SceneCache(str(tmp_path), max_entries=3, max_age=0)
+    cache.put("pinned", SCENES, pinned=True)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, SCENES)
+        os.utime(os.path.join(str(tmp_path), f"{key}.json"), (1000 + i, 1000 + i))
+    # 读取 a 使其成为最近使用的条目，之后写入 d 时淘汰最久未用的 b
+    assert cache.get("a") == SCENES
+    cache.put("d", SCENES)
+
+    remaining = [key for key in ("pinned", "a", "b", "c", "d") if cache.get(key) is not None]
+    assert remaining == ["pinned", "a", "c", "d"]
+
+
+def test_expired_and_corrupt_entries_are_dropped(tmp_path):
+    cache = SceneCache(str(tmp_path), max_age=60)
+    cache.put("old", SCENES)
+    cache.put("pinned", SCENES, pinned=True)
+    stale = time.time() - 120
+    for name in ("old.json", "pinned.pinned.json"):
+        os.utime(os.path.join(str(tmp_path), name), (stale, stale))
+    with open(os.path.join(str(tmp_path), "broken.json"), 'w', encoding='utf-8') as f:
+        f.write('[{"id": ')
+
+    assert cache.get("old") is None
+    assert cache.get("pinned") == SCENES
+    assert cache.get("broken") is None
+    assert sorted(os.listdir(str(tmp_path))) == ["pinned.pinned.json"]
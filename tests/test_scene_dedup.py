@@ -0,0 +1,73 @@
+# =============================================================================
+# tests/test_scene_dedup.py - 场景近似去重测试
+# =============================================================================
+
+import os
+
+from modules.http_client import HttpClient
+from modules.scene_dedup import PromptDeduplicator
+from modules.scene_record import SceneRecord
+from modules.video_generator import VideoGenerator
+
+
+def scene(prompt, **fields):
+    return dict({"prompt": prompt, "duration": 5, "style": "realistic", "type": "narrative"}, **fields)
+
+
+def test_near_duplicates_match_only_with_same_params():
+    dedup = PromptDeduplicator()
+    dedup.add(scene("林则徐站在虎门海滩上，远眺大海"), "a")
+    dedup.add(scene("工人搬运装满鸦片的木桶"), "b")
+
+    assert dedup.find(scene("林则徐站在虎门海滩上 远眺大海！")) == "a"
+    assert dedup.find(scene("Workers CARRY barrels")) is None
+    assert dedup.find(scene("工人搬运装满鸦片的木桶", duration=8)) is None
+    assert dedup.find(scene("石灰倒入销烟池")) is None
+    assert dedup.find(scene("，。！")) is None
+
+
+def test_lookup_agrees_with_exact_similarity():
+    dedup = PromptDeduplicator()
+    prompts = ["林则徐站在虎门海滩", "工人搬运装满鸦片的木桶", "石灰倒入销烟池", "浓烟从池中升起",
+               "官员检查销毁结果", "百姓在岸边围观"]
+    for i, prompt in enumerate(prompts):
+        dedup.add(scene(prompt), i)
+
+    def jaccard(a, b):
+        a, b = dedup.shingles(a), dedup.shingles(b)
+        return len(a & b) / len(a | b)
+
+    for query in ["林则徐站在虎门海滩上", "工人搬运装满鸦片的木桶。", "浓烟从池中缓缓升起", "百姓围观"]:
+        best = max(range(len(prompts)), key=lambda i: jaccard(query, prompts[i]))
+        expected = best if jaccard(query, prompts[best]) >= dedup.threshold else None
+        assert dedup.find(scene(query)) == expected
+
+
+def test_oldest_entries_are_evicted():
+    dedup = PromptDeduplicator(max_entries=2)
+    for i, prompt in enumerate(["林则徐站在虎门海滩", "工人搬运装满鸦片的木桶", "石灰倒入销烟池"]):
+        dedup.add(scene(prompt), i)
+
+    assert len(dedup) == 2
+    assert dedup.find(scene("林则徐站在虎门海滩")) is None
+    assert dedup.find(scene("石灰倒入销烟池")) == 2
+
+
+def test_duplicate_scenes_share_one_video(kling_server, tmp_path):
+    server = kling_server()
+    output_dir = str(tmp_path)
+    scenes = [SceneRecord(scene(prompt, id=f"scene_{i:03d}", position=i))
+              for i, prompt in enumerate(["林则徐站在虎门海滩", "石灰倒入销烟池", "林则徐站在虎门海滩。"], 1)]
+
+    generator = VideoGenerator(use_cache=False, use_dedup=True, use_journal=False,
+                               http_client=HttpClient(rate_limits={}))
+    try:
+        results = generator.generate_videos(scenes, output_dir)
+    finally:
+        generator.close()
+
+    assert server.snapshot()["stats"]["kling"]["200"] == 2
+    assert results["scene_003"]["duplicate_of"] == "scene_001"
+    assert results["scene_003"]["video_path"] == os.path.join(output_dir, "scene_003.mp4")
+    with open(results["scene_001"]["video_path"], 'rb') as a, open(results["scene_003"]["video_path"], 'rb') as b:
+        assert a.read() == b.read()
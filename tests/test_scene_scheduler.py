@@ -0,0 +1,63 @@
+# =============================================================================
+# tests/test_scene_scheduler.py - 场景调度测试
+# =============================================================================
+
+import time
+
+from modules.http_client import HttpClient
+from modules.scene_scheduler import SceneScheduler
+from modules.video_generator import VideoGenerator
+
+
+def test_kling_budget_resets_for_each_run(kling_server, make_scenes, tmp_path):
+    kling_server()
+    # 预算10秒，每个场景5秒：每次运行前两个场景用Kling，其余降级
+    scheduler = SceneScheduler(kling_budget=10)
+    generator = VideoGenerator(use_cache=False, use_dedup=False, use_journal=False,
+                               http_client=HttpClient(rate_limits={}), scheduler=scheduler)
+    scenes = make_scenes(3)
+
+    try:
+        for _ in range(2):
+            results = generator.generate_videos(scenes, str(tmp_path))
+            assert [results[scene["id"]]["generator"] for scene in scenes] == ["kling", "kling", "mock"]
+    finally:
+        generator.close()
+    assert scheduler._runs == {}
+
+
+def test_deadline_resets_for_each_run(make_scenes):
+    scheduler = SceneScheduler(deadline=0.05)
+    scene = make_scenes(1)[0]
+
+    scheduler.start("out")
+    time.sleep(0.1)
+    assert scheduler.admit(scene, "out", "kling") == "mock"
+    scheduler.finish("out")
+
+    # 同一目录再次生成时截止时间从新的开始时间算起
+    scheduler.start("out")
+    assert scheduler.admit(scene, "out", "kling") == "kling"
+    scheduler.finish("out")
+
+
+def test_budget_is_per_document(make_scenes):
+    scheduler = SceneScheduler(kling_budget=5)
+    first, second = make_scenes(2)
+
+    assert scheduler.admit(first, "a", "kling") == "kling"
+    assert scheduler.admit(second, "a", "kling") == "mock"
+    assert scheduler.admit(second, "b", "kling") == "kling"
+    # 同一场景重复调用不重复计入，退回后预算可再次使用
+    assert scheduler.admit(first, "a", "kling") == "kling"
+    scheduler.refund(first, "a")
+    assert scheduler.admit(second, "a", "kling") == "kling"
+
+
+def test_invalid_fields_use_defaults(make_scenes, config):
+    scheduler = SceneScheduler()
+    scene = make_scenes(1)[0].replace(position="约2", duration="五秒")
+
+    assert scheduler.position_of(scene) == 0
+    assert scheduler.duration_of(scene) == config.DEFAULT_VIDEO_PARAMS["duration"]
+    assert scheduler.order([scene] + make_scenes(1), ["kling", "kling"]) == [0, 1]
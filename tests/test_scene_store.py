@@ -0,0 +1,61 @@
+# =============================================================================
+# tests/test_scene_store.py - 场景记录与场景存储测试
+# =============================================================================
+
+import json
+
+import pytest
+
+from modules.scene_record import SceneRecord
+from modules.scene_store import SceneStore
+
+
+SCENE = {"id": "scene_001", "prompt": "林则徐站在虎门海滩", "position": 1, "duration": 5,
+         "style": "realistic", "type": "narrative", "note": "附加字段"}
+
+
+def test_record_behaves_like_the_dict():
+    record = SceneRecord(SCENE)
+
+    assert record == SCENE
+    assert json.dumps(dict(record), ensure_ascii=False) == json.dumps(SCENE, ensure_ascii=False)
+    assert "resolution" not in record and record.get("resolution", "1920x1080") == "1920x1080"
+
+    del record["note"]
+    record["fps"] = 30
+    assert list(record) == ["id", "prompt", "position", "duration", "style", "type", "fps"]
+    assert record.replace(position=3)["position"] == 3 and record["position"] == 1
+    with pytest.raises(KeyError):
+        del record["start"]
+
+
+def test_store_reads_back_by_id(tmp_path):
+    path = str(tmp_path / "scenes.jsonl")
+    scenes = [dict(SCENE, id=f"scene_{i:03d}", position=i) for i in range(1, 4)]
+
+    with SceneStore(path) as store:
+        store.extend(scenes)
+        store.append(dict(scenes[1], prompt="改写"))
+
+        assert len(store) == 3 and "scene_002" in store
+        assert store.get("scene_002")["prompt"] == "改写"
+        assert store.get("scene_009") is None
+        assert [scene["id"] for scene in store] == ["scene_001", "scene_002", "scene_003"]
+
+
+def test_reopen_truncates_incomplete_last_line(tmp_path):
+    path = str(tmp_path / "scenes.jsonl")
+    with SceneStore(path) as store:
+        store.extend([dict(SCENE, id="scene_001"), dict(SCENE, id="scene_002")])
+    with open(path, 'ab') as f:
+        f.write(b'{"id": "scene_003", "pro')
+
+    with SceneStore(path) as store:
+        assert [scene["id"] for scene in store] == ["scene_001", "scene_002"]
+        store.append(dict(SCENE, id="scene_003"))
+
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["id"] for line in f] == ["scene_001", "scene_002", "scene_003"]
+
+    with SceneStore(path, truncate=True) as store:
+        assert len(store) == 0
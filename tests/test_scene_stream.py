@@ -0,0 +1,150 @@
+# =============================================================================
+# tests/test_scene_stream.py - 流式场景解析测试
+# =============================================================================
+
+import json
+
+import pytest
+
+from modules.scene_stream import JsonArrayStreamParser, iter_sse_deltas
+from modules.text_analyzer import TextAnalyzer
+
+
+SCENES = [
+    {"id": "scene_001", "prompt": "他说：\"站在[海滩]上\"", "position": 1},
+    {"id": "scene_002", "prompt": "路径 C:\\temp\\{a}", "position": 3, "tags": ["a", ["b"]]},
+    {"id": "scene_003", "prompt": "}]，结束", "position": 5}
+]
+
+REPLY = "好的，场景如下：\n```json\n" + json.dumps(SCENES, ensure_ascii=False, indent=2) + "\n```\n以上。"
+
+
+def parse(chunks):
+    parser = JsonArrayStreamParser()
+    elements = []
+    for chunk in chunks:
+        elements.extend(parser.feed(chunk))
+    return parser, elements
+
+
+def test_any_split_point():
+    # 回复在任意位置分成两段，包括字符串、转义和括号中间
+    for split in range(len(REPLY) + 1):
+        parser, elements = parse([REPLY[:split], REPLY[split:]])
+        assert elements == SCENES, split
+        assert parser.finished, split
+
+
+def test_single_characters():
+    parser, elements = parse(REPLY)
+
+    assert elements == SCENES
+    assert parser.finished
+
+
+def test_element_is_returned_when_closed():
+    end = REPLY.index("scene_002")
+    parser = JsonArrayStreamParser()
+
+    assert parser.feed(REPLY[:end]) == SCENES[:1]
+    assert parser.feed(REPLY[end:]) == SCENES[1:]
+
+
+def test_text_after_array_is_ignored():
+    parser, elements = parse(['[{"a": 1}]', '[{"b": 2}]'])
+
+    assert elements == [{"a": 1}]
+    assert parser.finished
+
+
+def test_scalar_elements():
+    reply = '[ "说明，含[括号]和\\"引号\\"", 12, -3.5e2,true ,null, {"a": [1]}, "末尾"]'
+
+    for split in range(len(reply) + 1):
+        parser, elements = parse([reply[:split], reply[split:]])
+        assert elements == json.loads(reply), split
+        assert parser.finished, split
+
+
+def test_sse_deltas():
+    lines = [
+        ": keep-alive",
+        "",
+        'data: {"choices": [{"delta": {"content": "[{\\"a\\""}}]}',
+        'data: {"choices": [{"delta": {}}]}',
+        'data: {"choices": [{"delta": {"content": ": 1}]"}}]}',
+        "data: [DONE]",
+        'data: {"choices": [{"delta": {"content": "ignored"}}]}'
+    ]
+
+    assert "".join(iter_sse_deltas(lines)) == '[{"a": 1}]'
+
+
+class StubResponse:
+    """DeepSeek 回复：非流式时为完整内容，流式时按16字符分段的事件流"""
+
+    def __init__(self, content: str, stream: bool):
+        self.content = content
+        self.stream = stream
+        self.encoding = None
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"choices": [{"message": {"content": self.content}}]}
+
+    def iter_lines(self, decode_unicode=False):
+        for i in range(0, len(self.content), 16):
+            event = {"choices": [{"delta": {"content": self.content[i:i + 16]}}]}
+            yield f"data: {json.dumps(event, ensure_ascii=False)}"
+            yield ""
+        yield "data: [DONE]"
+
+    def close(self):
+        pass
+
+
+class StubHttpClient:
+    def __init__(self, content: str):
+        self.content = content
+
+    def post(self, url, stream=False, **kwargs):
+        return StubResponse(self.content, stream)
+
+
+TEXT = "林则徐站在虎门海滩。天空很蓝。工人搬运木桶。石灰倒入池中。"
+
+
+def make_analyzer(config, content, stream):
+    config.DEEPSEEK_API_KEY = "test_key"
+    return TextAnalyzer(use_cache=False, chunking=False, stream=stream, http_client=StubHttpClient(content))
+
+
+def scene_json(scene_id, position):
+    return json.dumps({"id": scene_id, "prompt": "场景", "position": position, "duration": 5,
+                       "style": "realistic", "type": "narrative"}, ensure_ascii=False)
+
+
+def test_stream_fallback_tolerates_invalid_position(config):
+    # 第一个场景的位置无法解析，随后回复中断
+    content = "[" + scene_json("scene_001", "约2") + ", {\"id\": "
+    analyzer = make_analyzer(config, content, stream=True)
+
+    scenes = list(analyzer.iter_scenes(TEXT))
+
+    # 已产出的场景保留，其后由规则提取补充
+    assert [scene["id"] for scene in scenes] == ["scene_001", "scene_002", "scene_003", "scene_004"]
+    assert [scene["position"] for scene in scenes[1:]] == [1, 3, 4]
+
+
+def test_stream_and_full_reply_give_same_scenes(config):
+    # 数组中夹杂的字符串、数字等非对象元素在两种方式下都被忽略
+    content = "[" + ", ".join([scene_json("scene_001", 1), '"以下为其余场景"', "2",
+                               scene_json("scene_002", 3), "null", scene_json("scene_003", 4)]) + "]"
+
+    streamed = list(make_analyzer(config, content, stream=True).iter_scenes(TEXT))
+    full = make_analyzer(config, content, stream=False).extract_scenes(TEXT)
+
+    assert [dict(scene) for scene in streamed] == [dict(scene) for scene in full]
+    assert [scene["id"] for scene in streamed] == ["scene_001", "scene_002", "scene_003"]
@@ -0,0 +1,45 @@
+# =============================================================================
+# tests/test_sentence_index.py - 句子索引测试
+# =============================================================================
+
+import re
+
+import pytest
+
+from modules.sentence_index import SentenceIndex
+
+
+TEXT = "  他站在桌前。\n\n天空很蓝！！她问：为什么？……；\n结尾没有标点"
+
+
+def test_sentences_keep_trailing_punctuation():
+    index = SentenceIndex(TEXT)
+
+    assert list(index.sentences()) == ["他站在桌前。", "天空很蓝！！", "她问：为什么？", "……；", "结尾没有标点"]
+    assert [index.body(p) for p in range(1, len(index) + 1)] == \
+        ["他站在桌前", "天空很蓝", "她问：为什么", "……", "结尾没有标点"]
+    for position, start, end in index:
+        assert (start, end) == index.span(position)
+        assert TEXT[start:end] == index.sentence(position)
+
+
+def test_punctuation_only_segments_join_previous_sentence():
+    index = SentenceIndex("前言。。！ 。后记")
+
+    assert list(index.sentences()) == ["前言。。！ 。", "后记"]
+    assert len(SentenceIndex("。！  ")) == 0
+
+
+@pytest.mark.parametrize("text", [TEXT, "一。二！三？四；五", "没有标点", "", "\n。\n"])
+def test_bodies_match_splitting_on_delimiters(text):
+    index = SentenceIndex(text)
+
+    expected = [part.strip() for part in re.split(r'[。！？；]', text) if part.strip()]
+    assert [index.body(p) for p in range(1, len(index) + 1)] == expected
+
+
+def test_position_of_offset():
+    index = SentenceIndex(TEXT)
+
+    assert [index.position_of(offset) for offset in (0, 2, 7, 8, 9, 10, 22, 23, 26, 27, 32, 33)] == \
+        [None, 1, 1, None, None, 2, 3, 4, None, 5, 5, None]
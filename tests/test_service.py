@@ -0,0 +1,90 @@
+# =============================================================================
+# tests/test_service.py - 常驻服务测试
+# =============================================================================
+
+import http.client
+import threading
+import time
+
+import pytest
+import requests
+
+from modules.service import JobService, ServiceServer
+from modules.text_analyzer import TextAnalyzer
+from modules.video_generator import VideoGenerator
+from modules.video_inserter import VideoInserter
+
+
+TEXT = "林则徐站在虎门海滩。天空很蓝。工人搬运木桶。"
+
+
+@pytest.fixture
+def service(tmp_path):
+    generator = VideoGenerator(use_cache=False, use_dedup=False, use_journal=False)
+    service = JobService(TextAnalyzer(use_cache=False), generator, VideoInserter(), str(tmp_path))
+    server = ServiceServer(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.stop()
+    service.close()
+    generator.close()
+
+
+def wait_for(base_url, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = requests.get(f"{base_url}/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("任务未在超时前结束")
+
+
+def test_submit_and_fetch_result(service):
+    response = requests.post(f"{service.base_url}/jobs", json={"text": TEXT, "name": "虎门", "mode": "pipeline"})
+    assert response.status_code == 202
+
+    job = wait_for(service.base_url, response.json()["id"])
+    assert job["status"] == "succeeded"
+
+    result = requests.get(f"{service.base_url}/jobs/{job['id']}/result")
+    assert result.status_code == 200
+    assert result.text.count("<video") == 2
+    video = requests.get(f"{service.base_url}/jobs/{job['id']}/scene_001_mock.mp4")
+    assert video.status_code == 200
+    assert requests.get(f"{service.base_url}/jobs/{job['id']}/..%2F..%2Fetc%2Fpasswd").status_code == 404
+    assert [job["id"] for job in requests.get(f"{service.base_url}/jobs").json()] == [job["id"]]
+
+
+@pytest.mark.parametrize("name", ["doc\n", "../doc", ".hidden", "a/b", "x" * 101, ""])
+def test_invalid_names_are_rejected(service, name):
+    response = requests.post(f"{service.base_url}/jobs", json={"text": TEXT, "name": name})
+
+    assert response.status_code == 400
+    assert requests.get(f"{service.base_url}/jobs").json() == []
+
+
+@pytest.mark.parametrize("payload", [{"text": ""}, {"text": TEXT, "format": "pdf"}, {"text": TEXT, "mode": "x"}])
+def test_invalid_requests_are_rejected(service, payload):
+    assert requests.post(f"{service.base_url}/jobs", json=payload).status_code == 400
+
+
+def raw_post(base_url, content_length, body=b""):
+    """发送指定 Content-Length 的原始请求，返回状态码"""
+
+    host, port = base_url[len("http://"):].split(":")
+    connection = http.client.HTTPConnection(host, int(port), timeout=5)
+    connection.putrequest("POST", "/jobs")
+    connection.putheader("Content-Type", "application/json")
+    connection.putheader("Content-Length", content_length)
+    connection.endheaders(body)
+    try:
+        return connection.getresponse().status
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("content_length,status", [("-1", 400), ("abc", 400), (str(32 * 1024 ** 2), 413)])
+def test_bad_content_length_is_rejected_before_reading(service, content_length, status):
+    assert raw_post(service.base_url, content_length) == status
@@ -0,0 +1,75 @@
+# =============================================================================
+# tests/test_video_cache.py - 视频缓存测试
+# =============================================================================
+
+import os
+
+from modules.http_client import HttpClient
+from modules.video_cache import VideoCache
+from modules.video_generator import VideoGenerator
+
+
+def generate(scenes, output_dir, cache):
+    os.makedirs(output_dir, exist_ok=True)
+    generator = VideoGenerator(cache=cache, use_dedup=False, use_journal=False,
+                               http_client=HttpClient(rate_limits={}))
+    try:
+        return generator.generate_videos(scenes, output_dir)
+    finally:
+        generator.close()
+
+
+def cache_entries(cache):
+    return [name for _, _, files in os.walk(cache.cache_dir) for name in files if name.endswith(".mp4")]
+
+
+def test_second_run_hits_cache(kling_server, make_scenes, tmp_path):
+    server = kling_server()
+    cache = VideoCache(str(tmp_path / "cache"))
+    scenes = make_scenes(2)
+
+    first = generate(scenes, str(tmp_path / "a"), cache)
+    second = generate(scenes, str(tmp_path / "b"), cache)
+
+    assert {result["generator"] for result in first.values()} == {"kling"}
+    assert all(result.get("cached") for result in second.values())
+    assert server.snapshot()["stats"]["kling"]["200"] == len(scenes)
+    with open(second["scene_001"]["video_path"], 'rb') as f:
+        assert len(f.read()) == server.profile["video_size"]
+
+
+def test_fallback_placeholders_are_not_cached(kling_server, make_scenes, tmp_path):
+    cache = VideoCache(str(tmp_path / "cache"))
+    scenes = make_scenes(2)
+
+    # Kling任务全部失败，降级为模拟视频
+    kling_server({"kling_job": {"failure_rate": 1.0}})
+    results = generate(scenes, str(tmp_path / "a"), cache)
+    assert {result["generator"] for result in results.values()} == {"mock"}
+    assert cache_entries(cache) == []
+
+    # 后端恢复后重新生成真实视频
+    kling_server()
+    results = generate(scenes, str(tmp_path / "b"), cache)
+    assert {result["generator"] for result in results.values()} == {"kling"}
+    assert not any(result.get("cached") for result in results.values())
+
+
+def test_replacing_entry_keeps_size_tally(tmp_path):
+    cache = VideoCache(str(tmp_path / "cache"), max_size=2500)
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"x" * 1000)
+    cache.put("a" * 64, str(video))
+    cache.put("b" * 64, str(video))
+
+    evictions = []
+    cache.evict = lambda: evictions.append(cache._size)
+
+    # 同一键反复写入不应累计大小，也不应触发淘汰
+    for _ in range(3):
+        cache.put("a" * 64, str(video))
+
+    assert cache._size == 2000
+    assert evictions == []
+    assert sorted(cache_entries(cache)) == ["a" * 64 + ".mp4", "b" * 64 + ".mp4"]
+    assert cache.get("b" * 64, str(tmp_path / "hit.mp4"))
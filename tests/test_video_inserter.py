@@ -0,0 +1,47 @@
+# =============================================================================
+# tests/test_video_inserter.py - 视频插入测试
+# =============================================================================
+
+import re
+
+import pytest
+
+from modules.scene_record import SceneRecord
+from modules.video_inserter import VideoInserter
+
+
+TEXT = "林则徐站在虎门海滩。天空很蓝。"
+
+
+def render(output_format, resolution, result=None):
+    scene = SceneRecord(id="scene_001", prompt="林则徐站在虎门海滩", position=1, duration=5,
+                        style="realistic", type="narrative", resolution=resolution)
+    result = dict({"status": "success", "video_path": "out/scene_001.mp4", "generator": "kling"}, **(result or {}))
+    return "".join(VideoInserter().iter_insert_videos(TEXT, [scene], {"scene_001": result}, output_format))
+
+
+def video_size(content):
+    match = re.search(r'<video[^>]* width="(\d+)" height="(\d+)"', content)
+    return int(match.group(1)), int(match.group(2))
+
+
+@pytest.mark.parametrize("output_format", ["html", "markdown"])
+def test_embed_uses_clip_dimensions(output_format):
+    assert video_size(render(output_format, "1280x720")) == (1280, 720)
+    # 从视频文件读取的宽高优先
+    assert video_size(render(output_format, "1280x720", {"width": 640, "height": 360})) == (640, 360)
+
+
+@pytest.mark.parametrize("output_format", ["html", "markdown"])
+@pytest.mark.parametrize("resolution", [1080, None, "宽屏", ["1280", "720"]])
+def test_invalid_resolution_uses_default(output_format, resolution, config):
+    default = tuple(int(value) for value in config.DEFAULT_VIDEO_PARAMS["resolution"].split("x"))
+
+    assert video_size(render(output_format, resolution)) == default
+
+
+def test_markdown_embed_scales_with_page():
+    content = render("markdown", "1920x1080")
+
+    assert 'style="max-width: 100%; height: auto;"' in content
+    assert "scene_001.mp4" in content